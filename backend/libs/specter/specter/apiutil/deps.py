@@ -0,0 +1,83 @@
+import dataclasses
+import time
+import uuid
+from typing import Optional
+
+from core.config import settings
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from specter import crud
+from specter.apiutil.security import ExpiringLRU, Principal, authenticate
+from specter.crud.shared.crud_account_user import AccountStatus
+from specter.db.session import with_read_db
+from specter.utils import InvalidTokenError
+
+bearer = HTTPBearer(auto_error=False)
+
+# Users that no longer exist are cached as inactive.
+UNKNOWN_ACCOUNT = AccountStatus(is_active=False, tenant_ids=frozenset())
+
+status_cache: ExpiringLRU[uuid.UUID, AccountStatus] = ExpiringLRU(
+    settings.PRINCIPAL_STATUS_CACHE_SIZE, name="status"
+)
+
+
+async def get_current_principal(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer),
+) -> Principal:
+    """
+    Authenticates the request's bearer token, without touching the database.
+
+    Args:
+        credentials (Optional[HTTPAuthorizationCredentials]): The `Authorization` header.
+
+    Returns:
+        Principal: The user the token was issued to.
+
+    Raises:
+        InvalidTokenError: 401 if the token is missing or cannot be trusted.
+    """
+    if credentials is None:
+        raise InvalidTokenError(reason="missing bearer token")
+    return await authenticate(credentials.credentials)
+
+
+async def get_active_principal(
+    principal: Principal = Depends(get_current_principal),
+) -> Principal:
+    """
+    Authenticates the request and checks that the account is still active,
+    resolving the active tenants it owns.
+
+    The account status is cached for `PRINCIPAL_STATUS_CACHE_TTL_SECONDS`, so a
+    deactivation takes at most that long to lock a user out.
+
+    Args:
+        principal (Principal): The authenticated principal.
+
+    Returns:
+        Principal: The principal with `is_active` and `tenant_ids` resolved.
+
+    Raises:
+        HTTPException: 403 if the account is inactive or no longer exists.
+    """
+    account_status = status_cache.get(principal.id)
+    if account_status is None:
+        async with with_read_db(None) as db:
+            account_status = (
+                await crud.account_user.get_status(db=db, id=principal.id)
+                or UNKNOWN_ACCOUNT
+            )
+        status_cache.set(
+            principal.id,
+            account_status,
+            expires_at=time.time() + settings.PRINCIPAL_STATUS_CACHE_TTL_SECONDS,
+        )
+    if not account_status.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account is inactive",
+        )
+    return dataclasses.replace(
+        principal, is_active=True, tenant_ids=account_status.tenant_ids
+    )
@@ -1,6 +1,11 @@
 from fastapi import FastAPI, HTTPException, status
 from fastapi.exceptions import RequestValidationError
-from specter.utils import TenantNotFoundError
+from specter.utils import (
+    ConcurrentUpdateError,
+    InvalidCursorError,
+    InvalidTokenError,
+    TenantNotFoundError,
+)
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
@@ -11,6 +16,7 @@ async def http_exception_handler(
 ) -> JSONResponse:
     """
     Handles FastAPI HTTPException errors by returning a JSON response with the error detail and status code.
+    Headers attached to the exception (e.g. `Retry-After`, `WWW-Authenticate`) are passed through.
 
     Args:
         _request (Request): The incoming HTTP request (not used in this handler).
@@ -23,6 +29,7 @@ async def http_exception_handler(
         return JSONResponse(
             status_code=exc.status_code,
             content={"detail": exc.detail},
+            headers=exc.headers,
         )
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -81,10 +88,87 @@ async def tenant_not_found_exception_handler(
     )
 
 
+async def invalid_token_exception_handler(
+    _request: Request,
+    exc: Exception,
+) -> JSONResponse:
+    """
+    Handles InvalidTokenError exceptions, raised when a bearer token is malformed, expired, signed with an
+    unknown key or fails signature verification.
+
+    Args:
+        _request (Request): The incoming HTTP request (not used in this handler).
+        exc (InvalidTokenError): The exception instance describing why the token was rejected.
+
+    Returns:
+        JSONResponse: A response object with HTTP 401 status and a `WWW-Authenticate: Bearer` challenge.
+    """
+    if isinstance(exc, InvalidTokenError):
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"detail": exc.message},
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return JSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"detail": str(exc)},
+    )
+
+
+async def invalid_cursor_exception_handler(
+    _request: Request,
+    exc: Exception,
+) -> JSONResponse:
+    """
+    Handles InvalidCursorError exceptions, raised when a pagination cursor was tampered with or does not
+    belong to the listing it is passed to.
+
+    Args:
+        _request (Request): The incoming HTTP request (not used in this handler).
+        exc (InvalidCursorError): The exception instance carrying the rejected cursor.
+
+    Returns:
+        JSONResponse: A response object with HTTP 400 status and a descriptive error message.
+    """
+    if isinstance(exc, InvalidCursorError):
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST, content={"detail": exc.message}
+        )
+    return JSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"detail": str(exc)},
+    )
+
+
+async def concurrent_update_exception_handler(
+    _request: Request,
+    exc: Exception,
+) -> JSONResponse:
+    """
+    Handles ConcurrentUpdateError exceptions, raised when an optimistic concurrency check fails because the
+    row was modified since the client read it.
+
+    Args:
+        _request (Request): The incoming HTTP request (not used in this handler).
+        exc (ConcurrentUpdateError): The exception instance identifying the modified row.
+
+    Returns:
+        JSONResponse: A response object with HTTP 409 status and a descriptive error message.
+    """
+    if isinstance(exc, ConcurrentUpdateError):
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT, content={"detail": exc.message}
+        )
+    return JSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"detail": str(exc)},
+    )
+
+
 def register_handlers(app: FastAPI) -> FastAPI:
     """
-    Registers custom exception handlers for HTTPException, RequestValidationError, and TenantNotFoundError
-    with the FastAPI application instance.
+    Registers custom exception handlers for HTTPException, RequestValidationError, TenantNotFoundError,
+    InvalidTokenError, InvalidCursorError and ConcurrentUpdateError with the FastAPI application instance.
 
     Args:
         app (FastAPI): The FastAPI application to which the exception handlers will be added.
@@ -97,4 +181,9 @@ def register_handlers(app: FastAPI) -> FastAPI:
         RequestValidationError, request_validation_exception_handler
     )
     app.add_exception_handler(TenantNotFoundError, tenant_not_found_exception_handler)
+    app.add_exception_handler(InvalidTokenError, invalid_token_exception_handler)
+    app.add_exception_handler(InvalidCursorError, invalid_cursor_exception_handler)
+    app.add_exception_handler(
+        ConcurrentUpdateError, concurrent_update_exception_handler
+    )
     return app
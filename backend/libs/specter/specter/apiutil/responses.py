@@ -0,0 +1,21 @@
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body may be produced while the request body is still
+    being read (e.g. NDJSON in, NDJSON out).
+
+    Starlette's StreamingResponse listens for client disconnects by calling
+    `receive()` concurrently on ASGI servers older than spec 2.4, which would steal
+    the request body messages the body iterator is consuming. This response never
+    calls `receive()`; a disconnect surfaces as a failed `send()` instead.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
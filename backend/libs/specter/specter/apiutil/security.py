@@ -0,0 +1,328 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+import urllib.request
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Generic,
+    Hashable,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from core.config import settings
+from jose import ExpiredSignatureError, JWTError, jwk, jwt
+from jose.backends.base import Key
+from jose.exceptions import JWTClaimsError
+from prometheus_client import Counter
+from specter.utils import InvalidTokenError
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = "RS256"
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+JWKS_REFRESHES = Counter(
+    "specter_jwks_refreshes_total",
+    "Fetches of the identity service key set, by outcome (ok, error).",
+    ["outcome"],
+)
+PRINCIPAL_CACHE_LOOKUPS = Counter(
+    "specter_principal_cache_lookups_total",
+    "Lookups in the principal caches, by cache (token, status) and result (hit, miss).",
+    ["cache", "result"],
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    The authenticated user behind a request, as asserted by a verified access token.
+
+    Attributes:
+        id (UUID): Primary key of the AccountUser (the token's `sub`).
+        name (str): User's name, from the token's claims.
+        email (str): User's email address, from the token's claims.
+        expires_at (float): Expiry of the token, as a UNIX timestamp.
+        is_active (bool): Whether the account is active; only checked by
+            `get_active_principal`, assumed otherwise.
+        tenant_ids (FrozenSet[UUID]): Active tenants owned by the user; only
+            resolved by `get_active_principal`.
+    """
+
+    id: uuid.UUID
+    name: Optional[str]
+    email: Optional[str]
+    expires_at: float
+    is_active: bool = True
+    tenant_ids: FrozenSet[uuid.UUID] = frozenset()
+
+    @classmethod
+    def from_claims(cls, claims: Mapping[str, Any]) -> "Principal":
+        extra = claims.get("claims") or {}
+        try:
+            id = uuid.UUID(str(claims["sub"]))
+        except (KeyError, ValueError):
+            raise InvalidTokenError(reason="invalid subject")
+        return cls(
+            id=id,
+            name=extra.get("name"),
+            email=extra.get("email"),
+            expires_at=float(claims["exp"]),
+        )
+
+
+class ExpiringLRU(Generic[K, V]):
+    """
+    Bounded mapping whose entries each expire at their own (wall clock) time, evicted
+    in least-recently-used order beyond `max_size`.
+    """
+
+    def __init__(self, max_size: int, *, name: str):
+        """
+
+        Args:
+            max_size: Maximum number of entries.
+            name: Cache name used as the metrics label.
+        """
+        self.max_size = max_size
+        self.name = name
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.time():
+            self._entries.move_to_end(key)
+            PRINCIPAL_CACHE_LOOKUPS.labels(cache=self.name, result="hit").inc()
+            return entry[1]
+        if entry is not None:
+            del self._entries[key]
+        PRINCIPAL_CACHE_LOOKUPS.labels(cache=self.name, result="miss").inc()
+        return None
+
+    def set(self, key: K, value: V, *, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def fetch_json(url: str, timeout: float) -> Dict[str, Any]:
+    """
+    Fetches and decodes a JSON document. Blocking; run it in a worker thread.
+    """
+    request = urllib.request.Request(url, headers={"Accept": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:  # nosec B310
+        return dict(json.load(response))
+
+
+class JWKSClient:
+    """
+    Verifies access tokens locally against the key set published by the identity
+    service.
+
+    The key set is fetched once and kept in memory. It is refreshed in the
+    background once older than `ttl` (while the cached keys keep being served), and
+    on demand when a token names an unknown `kid`, at most once every
+    `min_refresh_interval` seconds so that forged key IDs cannot flood the identity
+    service.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str],
+        *,
+        ttl: float,
+        min_refresh_interval: float,
+        timeout: float,
+        fetch: Callable[[str, float], Dict[str, Any]] = fetch_json,
+    ):
+        """
+
+        Args:
+            url: URL of the JSON Web Key Set.
+            ttl: Seconds after which the key set is refreshed in the background.
+            min_refresh_interval: Minimum seconds between two fetches.
+            timeout: Timeout of a fetch, in seconds.
+            fetch: Blocking function fetching a JSON document.
+        """
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._fetch = fetch
+        self._keys: Dict[str, Key] = {}
+        self._fetched_at = -math.inf
+        self._attempted_at = -math.inf
+        self._refresh_task: Optional["asyncio.Task[None]"] = None
+
+    async def start(self) -> None:
+        """
+        Fetches the key set ahead of the first request. Called from the service
+        lifespan; a failure is logged and retried on demand.
+        """
+        await self.refresh()
+
+    async def close(self) -> None:
+        """
+        Cancels a refresh in progress.
+        """
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+
+    def refresh(self) -> "asyncio.Future[None]":
+        """
+        Starts fetching the key set, unless a fetch is already in progress.
+
+        Returns:
+            A future resolved once the fetch in progress has completed; it never
+            raises, failures are logged and the previous keys are kept.
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._attempted_at = time.monotonic()
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return asyncio.shield(self._refresh_task)
+
+    async def get_key(self, kid: Optional[str]) -> Key:
+        """
+        Returns the verification key with the given ID.
+
+        Raises:
+            InvalidTokenError: if no such key is published.
+        """
+        now = time.monotonic()
+        can_fetch = now - self._attempted_at >= self.min_refresh_interval
+        if now - self._fetched_at > self.ttl and can_fetch:
+            self.refresh()
+        key = self._keys.get(kid) if kid else None
+        if key is None and kid and (can_fetch or self._refreshing):
+            await self.refresh()
+            key = self._keys.get(kid)
+        if key is None:
+            raise InvalidTokenError(reason="unknown signing key")
+        return key
+
+    async def verify(
+        self, token: str, *, audience: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Verifies an access token's signature, expiry and audience, without any
+        network hop while its key is cached.
+
+        Args:
+            token: The encoded JWT.
+            audience: Expected `aud` claim (`JWT_AUDIENCE` by default).
+
+        Returns:
+            The token's claims.
+
+        Raises:
+            InvalidTokenError: if the token cannot be trusted.
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError:
+            raise InvalidTokenError(reason="malformed token")
+        key = await self.get_key(header.get("kid"))
+        try:
+            return dict(
+                jwt.decode(
+                    token,
+                    key,
+                    algorithms=[ALGORITHM],
+                    audience=audience or settings.JWT_AUDIENCE,
+                )
+            )
+        except ExpiredSignatureError:
+            raise InvalidTokenError(reason="token expired")
+        except JWTClaimsError as e:
+            raise InvalidTokenError(reason=str(e))
+        except JWTError:
+            raise InvalidTokenError(reason="signature verification failed")
+
+    @property
+    def _refreshing(self) -> bool:
+        return self._refresh_task is not None and not self._refresh_task.done()
+
+    async def _refresh(self) -> None:
+        if not self.url:
+            logger.warning("JWKS_URL is not set, access tokens cannot be verified")
+            return
+        try:
+            document = await asyncio.to_thread(self._fetch, self.url, self.timeout)
+            keys = {
+                entry["kid"]: jwk.construct(entry, algorithm=ALGORITHM)
+                for entry in document.get("keys", [])
+                if entry.get("kid")
+                and entry.get("kty") == "RSA"
+                and entry.get("use", "sig") == "sig"
+            }
+        except Exception as e:
+            JWKS_REFRESHES.labels(outcome="error").inc()
+            logger.warning(f"Fetching the key set from {self.url} failed: {str(e)}")
+            return
+        JWKS_REFRESHES.labels(outcome="ok").inc()
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+
+
+jwks_client = JWKSClient(
+    settings.JWKS_URL,
+    ttl=settings.JWKS_CACHE_TTL_SECONDS,
+    min_refresh_interval=settings.JWKS_MIN_REFRESH_INTERVAL_SECONDS,
+    timeout=settings.JWKS_FETCH_TIMEOUT_SECONDS,
+)
+
+token_cache: ExpiringLRU[bytes, Principal] = ExpiringLRU(
+    settings.PRINCIPAL_TOKEN_CACHE_SIZE, name="token"
+)
+
+
+async def authenticate(token: str) -> Principal:
+    """
+    Resolves an access token to its principal.
+
+    The signature is verified once per token; the result is then served from a
+    bounded cache, keyed by the token's SHA-256 digest, until the token expires.
+
+    Args:
+        token: The encoded JWT.
+
+    Returns:
+        Principal: The user the token was issued to.
+
+    Raises:
+        InvalidTokenError: if the token cannot be trusted.
+    """
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    principal = token_cache.get(digest)
+    if principal is None:
+        principal = Principal.from_claims(await jwks_client.verify(token))
+        token_cache.set(digest, principal, expires_at=principal.expires_at)
+    return principal
@@ -0,0 +1,34 @@
+from typing import List
+
+from core.config import settings
+
+from .core import SHARED, Cache, CacheTier
+from .decorator import cached, session_schema
+from .tiers import Entry, MemoryTier, RedisTier
+
+
+def create_cache() -> Cache:
+    """
+    Creates the cache configured by the `CACHE_*` settings: an in-process tier,
+    backed by a Redis tier when `CACHE_REDIS_URL` is set.
+    """
+    tiers: List[CacheTier] = [
+        MemoryTier(
+            settings.CACHE_MEMORY_MAX_SIZE, max_ttl=settings.CACHE_MEMORY_TTL_SECONDS
+        )
+    ]
+    if settings.CACHE_REDIS_URL:
+        tiers.append(
+            RedisTier.from_url(
+                settings.CACHE_REDIS_URL, max_ttl=settings.CACHE_MAX_TTL_SECONDS
+            )
+        )
+    return Cache(
+        tiers,
+        namespace=settings.CACHE_NAMESPACE,
+        ttl=settings.CACHE_TTL_SECONDS,
+        stale_ttl=settings.CACHE_STALE_TTL_SECONDS,
+    )
+
+
+cache = create_cache()
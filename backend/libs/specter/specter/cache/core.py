@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+)
+
+from prometheus_client import Counter, Histogram
+from specter.cache.tiers import Entry
+
+logger = logging.getLogger(__name__)
+
+# Namespace of the keys not tied to a tenant (shared schema). Not a valid tenant
+# schema name (see `tenant_schema_map`), which never contain a colon either.
+SHARED = "@shared"
+
+CACHE_LOOKUPS = Counter(
+    "specter_cache_lookups_total",
+    "Cache lookups, by result (hit, stale, miss, coalesced) and tier serving hits.",
+    ["result", "tier"],
+)
+CACHE_LOAD_SECONDS = Histogram(
+    "specter_cache_load_seconds",
+    "Time spent loading a value on a cache miss or refresh.",
+)
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class CacheTier(Protocol):
+    name: str
+
+    async def get(self, key: str) -> Optional[Entry]:
+        """Returns the entry of a key, or None."""
+
+    async def set(self, key: str, entry: Entry) -> None:
+        """Stores an entry until its `stale_until`, indexed by its tags."""
+
+    async def delete(self, keys: Sequence[str]) -> None:
+        """Drops entries."""
+
+    async def invalidate_tags(self, tags: Sequence[str]) -> None:
+        """Drops the entries tagged with any of `tags`."""
+
+    async def close(self) -> None:
+        """Releases the tier's resources."""
+
+
+class Cache:
+    """
+    Read-through cache over tiers, fastest first (typically memory, then Redis).
+
+    Every key and tag is namespaced by the tenant schema it belongs to (None for the
+    shared schema), so a tenant can neither read nor invalidate another tenant's
+    entries.
+
+    On a miss, concurrent loads of the same key in a process are coalesced into
+    one. An entry past its TTL but within its stale period is served while a
+    single background load refreshes it. Values must be JSON-compatible when a
+    shared tier is used.
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[CacheTier],
+        *,
+        namespace: str,
+        ttl: float,
+        stale_ttl: float = 0.0,
+    ):
+        """
+
+        Args:
+            tiers: Tiers, looked up in order; a hit backfills the tiers before it.
+            namespace: Prefix of all the keys, e.g. per service.
+            ttl: Default seconds a value is fresh.
+            stale_ttl: Default seconds a value is served stale after its TTL.
+        """
+        self.tiers = list(tiers)
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._loads: Dict[str, "asyncio.Future[Any]"] = {}
+        self._refreshes: Dict[str, "asyncio.Task[Any]"] = {}
+        # Bumped on every invalidation; a load that started before an invalidation
+        # must not store its (possibly stale) result.
+        self._epoch = 0
+
+    def key(self, schema: Optional[str], key: str) -> str:
+        return f"{self.namespace}:{schema or SHARED}:{key}"
+
+    def tag(self, schema: Optional[str], tag: str) -> str:
+        return f"{self.namespace}:{schema or SHARED}:tag:{tag}"
+
+    async def get(self, schema: Optional[str], key: str) -> Optional[Any]:
+        """
+        Returns a cached value, fresh or stale, without loading it.
+
+        Args:
+            schema: Tenant schema, or None for the shared schema.
+            key: Key within the schema's namespace.
+
+        Returns:
+            The value, or None on a miss.
+        """
+        found = await self._lookup(self.key(schema, key))
+        return found[0].value if found is not None else None
+
+    async def get_or_load(
+        self,
+        schema: Optional[str],
+        key: str,
+        loader: Loader,
+        *,
+        ttl: Optional[float] = None,
+        stale_ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """
+        Returns a cached value, loading and caching it on a miss.
+
+        Args:
+            schema: Tenant schema, or None for the shared schema.
+            key: Key within the schema's namespace.
+            loader: Coroutine function loading the value; its errors are raised to
+                every caller waiting for it, and are not cached.
+            ttl: Seconds the value is fresh (default `ttl`).
+            stale_ttl: Seconds the value is served stale after (default
+                `stale_ttl`).
+            tags: Tags, within the schema's namespace, invalidating the value.
+
+        Returns:
+            The value.
+        """
+        full_key = self.key(schema, key)
+        full_tags = tuple(self.tag(schema, tag) for tag in tags)
+        ttls = (self.ttl if ttl is None else ttl, self._stale_ttl(stale_ttl))
+        found = await self._lookup(full_key)
+        if found is not None:
+            entry, tier = found
+            now = time.time()
+            if now < entry.fresh_until:
+                CACHE_LOOKUPS.labels(result="hit", tier=tier).inc()
+                return entry.value
+            CACHE_LOOKUPS.labels(result="stale", tier=tier).inc()
+            self._refresh(full_key, loader, ttls, full_tags)
+            return entry.value
+
+        if full_key in self._loads:
+            CACHE_LOOKUPS.labels(result="coalesced", tier="").inc()
+            return await asyncio.shield(self._loads[full_key])
+        CACHE_LOOKUPS.labels(result="miss", tier="").inc()
+        future = asyncio.ensure_future(self._load(full_key, loader, ttls, full_tags))
+        self._loads[full_key] = future
+        future.add_done_callback(lambda f: self._loaded(full_key, f))
+        return await asyncio.shield(future)
+
+    async def set(
+        self,
+        schema: Optional[str],
+        key: str,
+        value: Any,
+        *,
+        ttl: Optional[float] = None,
+        stale_ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+    ) -> None:
+        ttls = (self.ttl if ttl is None else ttl, self._stale_ttl(stale_ttl))
+        full_tags = tuple(self.tag(schema, tag) for tag in tags)
+        await self._store(self.key(schema, key), value, ttls, full_tags)
+
+    async def delete(self, schema: Optional[str], *keys: str) -> None:
+        """
+        Drops entries from every tier.
+        """
+        self._epoch += 1
+        full_keys = [self.key(schema, key) for key in keys]
+        for tier in self.tiers:
+            await tier.delete(full_keys)
+
+    async def invalidate_tags(self, schema: Optional[str], *tags: str) -> None:
+        """
+        Drops the entries tagged with any of `tags` from every tier.
+        """
+        self._epoch += 1
+        full_tags = [self.tag(schema, tag) for tag in tags]
+        for tier in self.tiers:
+            await tier.invalidate_tags(full_tags)
+
+    async def close(self) -> None:
+        """
+        Waits for the refreshes in progress and closes the tiers.
+        """
+        await asyncio.gather(*self._refreshes.values(), return_exceptions=True)
+        for tier in self.tiers:
+            await tier.close()
+
+    def _stale_ttl(self, stale_ttl: Optional[float]) -> float:
+        return self.stale_ttl if stale_ttl is None else stale_ttl
+
+    async def _lookup(self, full_key: str) -> Optional[Tuple[Entry, str]]:
+        for i, tier in enumerate(self.tiers):
+            entry = await tier.get(full_key)
+            if entry is None or entry.stale_until <= time.time():
+                continue
+            for upper in self.tiers[:i]:
+                await upper.set(full_key, entry)
+            return entry, tier.name
+        return None
+
+    async def _load(
+        self,
+        full_key: str,
+        loader: Loader,
+        ttls: Tuple[float, float],
+        tags: Tuple[str, ...],
+    ) -> Any:
+        epoch = self._epoch
+        with CACHE_LOAD_SECONDS.time():
+            value = await loader()
+        if epoch == self._epoch:
+            await self._store(full_key, value, ttls, tags)
+        return value
+
+    def _loaded(self, full_key: str, future: "asyncio.Future[Any]") -> None:
+        self._loads.pop(full_key, None)
+        # Retrieved here too: the callers waiting for it may have been cancelled.
+        if not future.cancelled():
+            future.exception()
+
+    def _refresh(
+        self,
+        full_key: str,
+        loader: Loader,
+        ttls: Tuple[float, float],
+        tags: Tuple[str, ...],
+    ) -> None:
+        if full_key in self._refreshes:
+            return
+        task = asyncio.create_task(self._load(full_key, loader, ttls, tags))
+        self._refreshes[full_key] = task
+        task.add_done_callback(lambda t: self._refreshed(full_key, t))
+
+    def _refreshed(self, full_key: str, task: "asyncio.Task[Any]") -> None:
+        self._refreshes.pop(full_key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Refreshing {full_key} failed: {task.exception()!r}")
+
+    async def _store(
+        self,
+        full_key: str,
+        value: Any,
+        ttls: Tuple[float, float],
+        tags: Tuple[str, ...],
+    ) -> None:
+        now = time.time()
+        entry = Entry(value, now + ttls[0], now + ttls[0] + ttls[1], tags)
+        for tier in self.tiers:
+            await tier.set(full_key, entry)
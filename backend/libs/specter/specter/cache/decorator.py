@@ -0,0 +1,178 @@
+import functools
+import hashlib
+import inspect
+import json
+from contextlib import AsyncExitStack
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    cast,
+    get_type_hints,
+)
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from specter.cache.core import Cache
+from specter.db.tenant_cache import TenantSnapshot
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+# Arguments identifying the tenant rather than the value: left out of the key.
+CONTEXT_TYPES = (AsyncSession, TenantSnapshot, Request)
+
+
+def session_schema(db: AsyncSession) -> Optional[str]:
+    """
+    Returns the tenant schema a session queries (see `with_db`, `with_read_db`), or
+    None for the shared schema.
+    """
+    schema_map = db.info.get("schema_translate_map")
+    # Only set for sessions given a bind (not those of `with_read_db`).
+    bind = getattr(db, "bind", None)
+    if schema_map is None and bind is not None:
+        # Bound to an engine (`with_db`) or, e.g. in tests, to a connection.
+        sync_bind = (
+            bind.sync_engine if isinstance(bind, AsyncEngine) else bind.sync_connection
+        )
+        if sync_bind is not None:
+            options = sync_bind.get_execution_options()
+            schema_map = options.get("schema_translate_map")
+    return (schema_map or {}).get("tenant")
+
+
+def cached(
+    *,
+    cache: Optional[Cache] = None,
+    ttl: Optional[float] = None,
+    stale_ttl: Optional[float] = None,
+    tags: Sequence[str] = (),
+    model: Any = None,
+    name: Optional[str] = None,
+) -> Callable[[F], F]:
+    """
+    Caches the results of a coroutine function, e.g. a CRUD method or an endpoint.
+
+    The tenant namespace comes from the function's arguments: the schema queried by
+    an `AsyncSession` argument, or a `TenantSnapshot` argument (None, the shared
+    namespace, when a session queries the shared schema). A function with neither
+    is refused, so entries can never be shared across tenants by mistake.
+
+    The key is the function's name and a digest of its other arguments. Results
+    are cached as the JSON form of `model` (the return annotation by default), and
+    returned validated as `model`: pass e.g. `model=schemas.AccountUser` for a CRUD
+    method returning an ORM object.
+
+    Loads may outlive the call that started them (misses shared by concurrent
+    callers, stale-while-revalidate refreshes), so they never use the caller's
+    session: `AsyncSession` arguments are replaced with a session of their own, on
+    the same bind and schema, closed once the load is done. Writes of the caller's
+    transaction that are not committed yet are therefore not seen by the load.
+
+        @cached(ttl=300, tags=["account_user:{id}"], model=Optional[AccountUser])
+        async def get(self, db: AsyncSession, id: Any) -> Optional[models.AccountUser]
+
+        await cache.invalidate_tags(session_schema(db), f"account_user:{id}")
+
+    Args:
+        cache: The cache (`specter.cache.cache` by default).
+        ttl: Seconds a result is fresh.
+        stale_ttl: Seconds a result is served stale while being refreshed.
+        tags: Tags of the results, formatted with the function's arguments.
+        model: Type of the results.
+        name: Key prefix (the function's qualified name by default).
+
+    Returns:
+        The decorator.
+    """
+
+    def decorator(func: F) -> F:
+        signature = inspect.signature(func)
+        prefix = name or f"{func.__module__}.{func.__qualname__}"
+        result_type = model if model is not None else get_type_hints(func)["return"]
+        adapter: TypeAdapter[Any] = TypeAdapter(result_type)
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            from specter.cache import cache as default_cache
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            schema, arguments = _split(prefix, bound.arguments)
+
+            async def load() -> Any:
+                call = signature.bind(*args, **kwargs)
+                async with AsyncExitStack() as stack:
+                    for key, argument in call.arguments.items():
+                        if isinstance(argument, AsyncSession):
+                            call.arguments[key] = await stack.enter_async_context(
+                                _session_like(argument)
+                            )
+                    value = await func(*call.args, **call.kwargs)
+                return adapter.dump_python(
+                    adapter.validate_python(value, from_attributes=True), mode="json"
+                )
+
+            value = await (cache or default_cache).get_or_load(
+                schema,
+                f"{prefix}:{_digest(arguments)}",
+                load,
+                ttl=ttl,
+                stale_ttl=stale_ttl,
+                tags=[tag.format(**bound.arguments) for tag in tags],
+            )
+            return adapter.validate_python(value)
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+def _split(
+    prefix: str, arguments: Dict[str, Any]
+) -> Tuple[Optional[str], Dict[str, Any]]:
+    # The tenant schema, and the arguments making up the key.
+    schemas = set()
+    for value in arguments.values():
+        if isinstance(value, AsyncSession):
+            schemas.add(session_schema(value))
+        elif isinstance(value, TenantSnapshot):
+            schemas.add(value.schema)
+    if len(schemas) != 1:
+        raise TypeError(
+            f"{prefix} cannot be cached: it needs exactly one tenant, from an "
+            f"AsyncSession or TenantSnapshot argument, got {len(schemas)}"
+        )
+    values = {
+        key: value
+        for i, (key, value) in enumerate(arguments.items())
+        if not isinstance(value, CONTEXT_TYPES) and not (i == 0 and key == "self")
+    }
+    return schemas.pop(), values
+
+
+def _digest(arguments: Dict[str, Any]) -> str:
+    encoded = json.dumps(jsonable_encoder(arguments), sort_keys=True, default=str)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _session_like(db: AsyncSession) -> AsyncSession:
+    # A session of the same bind, schema and routing (see `with_read_db`) as `db`.
+    return AsyncSession(
+        bind=getattr(db, "bind", None),
+        info={
+            key: db.info[key]
+            for key in ("schema_translate_map", "bind")
+            if key in db.info
+        },
+        sync_session_class=type(db.sync_session),
+        expire_on_commit=False,
+        autoflush=False,
+    )
@@ -0,0 +1,196 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+CACHE_TIER_ERRORS = Counter(
+    "specter_cache_tier_errors_total",
+    "Cache operations that failed on a tier, by tier and operation.",
+    ["tier", "operation"],
+)
+
+
+class Entry(NamedTuple):
+    """
+    A cached value; times are UNIX timestamps so that entries can be shared across
+    processes.
+
+    Attributes:
+        value: The value, JSON-compatible.
+        fresh_until: Until when the value is served as is.
+        stale_until: Until when the value may be served while being refreshed.
+        tags: Full keys of the tags the entry is invalidated with.
+    """
+
+    value: Any
+    fresh_until: float
+    stale_until: float
+    tags: Tuple[str, ...] = ()
+
+
+class MemoryTier:
+    """
+    In-process tier: bounded, evicted in least-recently-used order, with entries
+    kept at most `max_ttl` seconds so that invalidations made by other processes
+    are picked up.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_size: int, *, max_ttl: float):
+        """
+
+        Args:
+            max_size: Maximum number of entries.
+            max_ttl: Maximum seconds an entry is kept, stale period included.
+        """
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._tagged: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.stale_until <= time.time():
+            self._pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: Entry) -> None:
+        expires_at = time.time() + self.max_ttl
+        if entry.stale_until > expires_at:
+            entry = entry._replace(
+                fresh_until=min(entry.fresh_until, expires_at), stale_until=expires_at
+            )
+        self._pop(key)
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._pop(next(iter(self._entries)))
+
+    async def delete(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            self._pop(key)
+
+    async def invalidate_tags(self, tags: Sequence[str]) -> None:
+        for tag in tags:
+            for key in self._tagged.pop(tag, set()):
+                self._pop(key)
+
+    async def close(self) -> None:
+        self._entries.clear()
+        self._tagged.clear()
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+
+class RedisTier:
+    """
+    Shared tier on any server speaking the Redis protocol (Redis, Valkey,
+    KeyDB...), through a `redis.asyncio` compatible client.
+
+    Entries are stored as JSON with a TTL of their stale period; each tag is a set
+    of the keys tagged with it, kept `max_ttl` seconds after its last use. The tier
+    fails open: an unreachable server is a miss, logged and counted.
+    """
+
+    name = "redis"
+
+    def __init__(self, client: Any, *, max_ttl: float):
+        """
+
+        Args:
+            client: A `redis.asyncio.Redis` (or compatible) client.
+            max_ttl: Maximum seconds an entry is kept, stale period included.
+        """
+        self.client = client
+        self.max_ttl = max_ttl
+
+    @classmethod
+    def from_url(cls, url: str, *, max_ttl: float) -> "RedisTier":
+        """
+        Creates the tier with a `redis.asyncio` client.
+
+        Raises:
+            RuntimeError: if the redis package is not installed.
+        """
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_REDIS_URL is set but redis is not installed")
+        return cls(redis.Redis.from_url(url), max_ttl=max_ttl)
+
+    async def get(self, key: str) -> Optional[Entry]:
+        try:
+            payload = await self.client.get(key)
+        except Exception as e:
+            self._failed("get", e)
+            return None
+        if payload is None:
+            return None
+        value, fresh_until, stale_until, tags = json.loads(payload)
+        return Entry(value, fresh_until, stale_until, tuple(tags))
+
+    async def set(self, key: str, entry: Entry) -> None:
+        ttl = min(entry.stale_until - time.time(), self.max_ttl)
+        if ttl <= 0:
+            return
+        payload = json.dumps(list(entry), separators=(",", ":"))
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            pipeline.set(key, payload, px=int(ttl * 1000))
+            for tag in entry.tags:
+                pipeline.sadd(tag, key)
+                pipeline.pexpire(tag, int(self.max_ttl * 1000))
+            await pipeline.execute()
+        except Exception as e:
+            self._failed("set", e)
+
+    async def delete(self, keys: Sequence[str]) -> None:
+        if not keys:
+            return
+        try:
+            await self.client.delete(*keys)
+        except Exception as e:
+            self._failed("delete", e)
+
+    async def invalidate_tags(self, tags: Sequence[str]) -> None:
+        if not tags:
+            return
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for tag in tags:
+                pipeline.smembers(tag)
+            members: List[Set[Any]] = await pipeline.execute()
+            keys = {key for tagged in members for key in tagged}
+            await self.client.delete(*keys, *tags)
+        except Exception as e:
+            self._failed("invalidate", e)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        CACHE_TIER_ERRORS.labels(tier=self.name, operation=operation).inc()
+        logger.warning(f"Cache {operation} on {self.name} failed: {error!r}")
@@ -1,4 +1,4 @@
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import PostgresDsn, ValidationInfo, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -48,3 +48,77 @@ class CommonSettings(BaseSettings):
                 path=f"{values.data.get('POSTGRES_DB') or ''}",
             )
         )
+
+    TENANT_CACHE_TTL_SECONDS: float = 300.0
+    TENANT_CACHE_NEGATIVE_TTL_SECONDS: float = 30.0
+    TENANT_CACHE_MAX_SIZE: int = 10_000
+    TENANT_CACHE_NOTIFY_CHANNEL: str = "tenant_changed"
+    # Header naming the tenant host, set by a trusted proxy (e.g. X-Forwarded-Host);
+    # requests without it are resolved from their Host header.
+    TENANT_HOST_HEADER: Optional[str] = None
+
+    LAST_LOGIN_FLUSH_INTERVAL_SECONDS: float = 5.0
+    LAST_LOGIN_FLUSH_MAX_PENDING: int = 1_000
+
+    # Key set of the identity service, e.g. http://identity:8080/api/v1/.well-known/jwks.json
+    JWKS_URL: Optional[str] = None
+    JWKS_CACHE_TTL_SECONDS: float = 300.0
+    JWKS_MIN_REFRESH_INTERVAL_SECONDS: float = 30.0
+    JWKS_FETCH_TIMEOUT_SECONDS: float = 5.0
+    JWT_AUDIENCE: str = "account"
+
+    PRINCIPAL_TOKEN_CACHE_SIZE: int = 10_000
+    PRINCIPAL_STATUS_CACHE_SIZE: int = 10_000
+    PRINCIPAL_STATUS_CACHE_TTL_SECONDS: float = 30.0
+
+    # Connection pool of each engine (per process: size it against max_connections
+    # divided by the number of processes across replicas).
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    # always | idle | on_error, see specter.db.pool.create_engine
+    DB_PRE_PING: Literal["always", "idle", "on_error"] = "idle"
+    DB_PRE_PING_IDLE_SECONDS: float = 30.0
+    DB_ECHO: bool = False
+    # Set when SQLALCHEMY_DATABASE_URI points to a PgBouncer in transaction pooling
+    # mode; LISTEN then needs SQLALCHEMY_DIRECT_URI, bypassing the pooler.
+    DB_POOLER_MODE: bool = False
+    SQLALCHEMY_DIRECT_URI: Optional[str] = None
+
+    # Read replicas, used by get_read_db and get_shared_read_db
+    SQLALCHEMY_REPLICA_URIS: List[str] = []
+    DB_REPLICA_SELECTION: Literal["round_robin", "least_connections"] = "round_robin"
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 2.0
+
+    # SQL instrumentation, see specter.db.instrumentation
+    DB_SLOW_QUERY_SECONDS: float = 0.5
+    DB_SLOW_QUERY_LOG_PARAMETERS: bool = False
+    DB_N_PLUS_ONE_THRESHOLD: int = 10
+
+    # Tenant schema migrations, see specter.db.tenant_migrations
+    TENANT_MIGRATION_CONCURRENCY: int = 8
+    # Tenant schemas pre-created for instant sign-up, see specter.db.tenant_provisioning
+    TENANT_STANDBY_SCHEMAS: int = 0
+
+    # Cross-tenant queries, see specter.db.fanout; connections are taken from the
+    # read pools, keep the concurrency below DB_POOL_SIZE
+    FANOUT_CONCURRENCY: int = 8
+    FANOUT_TENANT_TIMEOUT_SECONDS: float = 10.0
+
+    # Cache, see specter.cache; the in-process tier keeps entries at most
+    # CACHE_MEMORY_TTL_SECONDS, bounding staleness across processes
+    CACHE_NAMESPACE: str = "specter"
+    CACHE_REDIS_URL: Optional[str] = None
+    CACHE_TTL_SECONDS: float = 60.0
+    CACHE_STALE_TTL_SECONDS: float = 0.0
+    CACHE_MAX_TTL_SECONDS: float = 86_400.0
+    CACHE_MEMORY_MAX_SIZE: int = 10_000
+    CACHE_MEMORY_TTL_SECONDS: float = 30.0
+
+    # Shards: database clusters holding tenant schemas, by name (see `tenant.shard`);
+    # "primary" is always SQLALCHEMY_DATABASE_URI. The direct URIs bypass a pooler,
+    # for the tenant move tool.
+    SQLALCHEMY_SHARD_URIS: Dict[str, str] = {}
+    SQLALCHEMY_SHARD_DIRECT_URIS: Dict[str, str] = {}
@@ -1 +1 @@
-from .shared import account_user
+from .shared import account_user, refresh_token, tenant
@@ -1,17 +1,88 @@
-from typing import Any, Dict, Generic, Optional, Type, TypeVar, Union, cast
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Collection,
+    Dict,
+    Generic,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
 
 from fastapi.encoders import jsonable_encoder
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from specter.crud.loader import BatchLoader
+from specter.db import uow
 from specter.db.base_class import Base
-from sqlalchemy import select
+from specter.utils import ConcurrentUpdateError, InvalidCursorError
+from sqlalchemy import (
+    ColumnElement,
+    any_,
+    bindparam,
+    delete,
+    exists,
+    func,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.base import ExecutableOption
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+class CreateResult(NamedTuple):
+    """
+    Outcome of `CRUDBase.create_or_conflict`.
+
+    Attributes:
+        obj: The inserted row, or None if a unique key collided.
+        conflicts: Names of the unique keys that collided (empty on success).
+    """
+
+    obj: Optional[Any]
+    conflicts: List[str]
+
+
+# Key of the batch loaders in `AsyncSession.info`.
+LOADERS = "specter.loaders"
+
+
+class Page(NamedTuple):
+    """
+    One page of `CRUDBase.page`.
+
+    Attributes:
+        items: The rows of the page.
+        next_cursor: Opaque cursor of the following page, or None on the last page.
+    """
+
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Unique columns checked by `create_or_conflict` to report collisions; defaults
+    # to every single-column unique key of the model's table.
+    conflict_keys: Optional[Sequence[str]] = None
+    # Ordering of `page` and `stream`. Must be unique (end with the primary key) and
+    # covered by an index, so that every page is an index range scan.
+    keyset: Sequence[str] = ("created_on", "id")
 
     def __init__(self, model: Type[ModelType]):
         """
@@ -23,19 +94,171 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
 
+    async def _commit(self, db: AsyncSession) -> None:
+        # Only flushes inside `specter.db.uow.uow(db)`, which commits once at its end.
+        await uow.commit(db)
+
     async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
         """
+        Fetches a row by id through the session's `loader`: concurrent lookups share
+        one query, and repeated ones within the request none.
 
         Args:
             db:
             id:
 
         Returns:
+            The row, or None if no row has this id.
+        """
+        db_obj: Optional[ModelType] = await self.loader(db).load(id)
+        return db_obj
+
+    async def get_many(
+        self, db: AsyncSession, *, values: Sequence[Any], key: str = "id"
+    ) -> Dict[Any, ModelType]:
+        """
+        Fetches the rows whose `key` column matches any of `values`, with a single
+        `WHERE key = ANY(:values)` query (one bind parameter, however many values).
+
+        Args:
+            db:
+            values:
+            key: Column to match, usually unique.
 
+        Returns:
+            The rows found, by `key` value.
         """
-        stmt = select(self.model).where(getattr(self.model, "id") == id)
+        column = getattr(self.model, "__table__").c[key]
+        stmt = select(self.model).where(
+            column
+            == any_(bindparam("values", value=list(values), type_=ARRAY(column.type)))
+        )
         result = await db.execute(stmt)
-        return cast(Optional[ModelType], result.scalar_one_or_none())
+        return {getattr(db_obj, key): db_obj for db_obj in result.scalars()}
+
+    def loader(self, db: AsyncSession, key: str = "id") -> BatchLoader[Any, ModelType]:
+        """
+        Returns the batch loader of this model by `key` for a session, created on
+        first use and kept in `db.info`, hence scoped to the request owning the
+        session. Concurrent `loader(db).load(id)` calls issue one `get_many` query.
+
+        Args:
+            db:
+            key: Column the loader matches, usually unique.
+
+        Returns:
+            BatchLoader: the loader.
+        """
+        loaders = db.info.setdefault(LOADERS, {})
+        name = f"{getattr(self.model, '__tablename__')}.{key}"
+        if name not in loaders:
+
+            async def load_many(values: List[Any]) -> Dict[Any, ModelType]:
+                return await self.get_many(db, values=values, key=key)
+
+            loaders[name] = BatchLoader(load_many, name=name)
+        return cast(BatchLoader[Any, ModelType], loaders[name])
+
+    async def page(
+        self,
+        db: AsyncSession,
+        *,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        descending: bool = False,
+        filters: Sequence[ColumnElement[bool]] = (),
+        options: Sequence[ExecutableOption] = (),
+    ) -> Page:
+        """
+        Fetches one page of rows ordered by `keyset`, using keyset (seek) pagination:
+        the page starts right after the last row of the previous page, so fetching
+        page 1000 costs the same as page 1 and rows inserted meanwhile are neither
+        skipped nor repeated.
+
+        Args:
+            db:
+            limit: Maximum number of rows of the page.
+            cursor: `next_cursor` of the previous page; None for the first page.
+            descending: Newest first.
+            filters: Extra WHERE clauses; pass the same ones for every page.
+            options: Loader options, e.g. eager loading of relationships.
+
+        Returns:
+            Page: the rows and the cursor of the next page.
+
+        Raises:
+            InvalidCursorError: if the cursor cannot be decoded.
+        """
+        columns = self._keyset_columns()
+        stmt = select(self.model).where(*filters).options(*options)
+        if cursor is not None:
+            key, last = tuple_(*columns), tuple_(*self._decode_cursor(cursor))
+            stmt = stmt.where(key < last if descending else key > last)
+        order = [c.desc() for c in columns] if descending else columns
+        result = await db.execute(stmt.order_by(*order).limit(limit + 1))
+        items = list(result.scalars())
+        if len(items) <= limit:
+            return Page(items=items, next_cursor=None)
+        items = items[:limit]
+        return Page(items=items, next_cursor=self._encode_cursor(items[-1]))
+
+    async def stream(
+        self,
+        db: AsyncSession,
+        *,
+        chunk_size: int = 1000,
+        filters: Sequence[ColumnElement[bool]] = (),
+    ) -> AsyncIterator[ModelType]:
+        """
+        Yields every row ordered by `keyset` from a server-side cursor, fetching
+        `chunk_size` rows at a time, so memory stays bounded whatever the table size.
+
+        The session holds its connection (and a transaction) until the iteration is
+        exhausted or closed.
+
+        Args:
+            db:
+            chunk_size: Rows fetched per round trip.
+            filters: Extra WHERE clauses.
+
+        Returns:
+            Async iterator over the rows.
+        """
+        stmt = (
+            select(self.model)
+            .where(*filters)
+            .order_by(*self._keyset_columns())
+            .execution_options(yield_per=chunk_size)
+        )
+        result = await db.stream_scalars(stmt)
+        try:
+            async for db_obj in result:
+                yield db_obj
+        finally:
+            await result.close()
+
+    def _keyset_columns(self) -> List[Any]:
+        table = getattr(self.model, "__table__")
+        return [table.c[key] for key in self.keyset]
+
+    def _encode_cursor(self, db_obj: ModelType) -> str:
+        values = jsonable_encoder([getattr(db_obj, key) for key in self.keyset])
+        raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+    def _decode_cursor(self, cursor: str) -> List[Any]:
+        columns = self._keyset_columns()
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(columns):
+                raise ValueError("wrong number of values")
+            return [
+                TypeAdapter(column.type.python_type).validate_python(value)
+                for column, value in zip(columns, values)
+            ]
+        except (binascii.Error, ValueError, ValidationError):
+            raise InvalidCursorError(cursor=cursor)
 
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         """
@@ -50,16 +273,142 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
-        await db.commit()
+        await self._commit(db)
         await db.refresh(db_obj)
+        self._forget(db, db_obj)
         return cast(ModelType, db_obj)
 
+    async def create_or_conflict(
+        self, db: AsyncSession, *, obj_in: CreateSchemaType
+    ) -> CreateResult:
+        """
+        Atomically inserts a row unless it collides with a unique key.
+
+        Runs a single `INSERT ... ON CONFLICT DO NOTHING RETURNING *`, so concurrent
+        inserts of the same key cannot fail with an integrity error. Only when the
+        insert was skipped is a follow-up query issued to find the colliding keys.
+
+        Args:
+            db:
+            obj_in:
+
+        Returns:
+            CreateResult: the inserted object, or None and the colliding keys.
+        """
+        obj_in_data = jsonable_encoder(obj_in)
+        stmt = (
+            insert(self.model)
+            .values(**obj_in_data)
+            .on_conflict_do_nothing()
+            .returning(self.model)
+        )
+        result = await db.execute(stmt)
+        db_obj = result.scalar_one_or_none()
+        await self._commit(db)
+        if db_obj is not None:
+            self._forget(db, db_obj)
+            return CreateResult(obj=db_obj, conflicts=[])
+        return CreateResult(
+            obj=None, conflicts=await self._find_conflicts(db, obj_in_data)
+        )
+
+    async def _find_conflicts(
+        self, db: AsyncSession, obj_in_data: Dict[str, Any]
+    ) -> List[str]:
+        table = getattr(self.model, "__table__")
+        columns = [
+            table.c[key]
+            for key in self._unique_keys()
+            if obj_in_data.get(key) is not None
+        ]
+        if not columns:
+            return []
+        stmt = select(
+            *[
+                (column == obj_in_data[column.name]).label(column.name)
+                for column in columns
+            ]
+        ).where(or_(*[column == obj_in_data[column.name] for column in columns]))
+        rows = (await db.execute(stmt)).all()
+        return [
+            column.name
+            for column in columns
+            if any(row._mapping[column.name] for row in rows)
+        ]
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[CreateSchemaType],
+        batch_size: Optional[int] = None,
+    ) -> List[Optional[ModelType]]:
+        """
+        Inserts many rows with multi-row `INSERT ... ON CONFLICT DO NOTHING RETURNING`
+        statements and a single commit.
+
+        Rows colliding with an existing row (or with an earlier row of the same call)
+        on a unique key are skipped instead of aborting the batch. Inserted rows are
+        matched back to their input through the values of all of `conflict_keys`, so
+        that a row skipped on one key is never taken for a row inserted with the
+        same value of another.
+
+        Args:
+            db:
+            objs_in:
+            batch_size: Rows per statement; defaults to as many as fit in Postgres'
+                limit of 32767 bind parameters.
+
+        Returns:
+            For each input, the inserted object, or None if it was skipped.
+
+        Raises:
+            ValueError: If the model has no unique key to match inserted rows by.
+        """
+        if not objs_in:
+            return []
+        rows = [jsonable_encoder(obj_in) for obj_in in objs_in]
+        match_keys = self._unique_keys()
+        if not match_keys:
+            raise ValueError(
+                f"{self.model.__name__} has no conflict_keys or unique column to "
+                "match inserted rows by"
+            )
+        if batch_size is None:
+            batch_size = max(1, 32767 // max(1, len(rows[0])))
+
+        inserted: Dict[Tuple[Any, ...], ModelType] = {}
+        for start in range(0, len(rows), batch_size):
+            stmt = (
+                insert(self.model)
+                .values(rows[start : start + batch_size])
+                .on_conflict_do_nothing()
+                .returning(self.model)
+            )
+            result = await db.execute(stmt)
+            for db_obj in result.scalars():
+                inserted[tuple(getattr(db_obj, key) for key in match_keys)] = db_obj
+                self._forget(db, db_obj)
+        await self._commit(db)
+
+        # pop() so that keys repeated within the input map to one row only.
+        return [
+            inserted.pop(tuple(row.get(key) for key in match_keys), None)
+            for row in rows
+        ]
+
+    def _unique_keys(self) -> List[str]:
+        if self.conflict_keys:
+            return list(self.conflict_keys)
+        table = getattr(self.model, "__table__")
+        return [c.name for c in table.columns if c.unique]
+
     async def update(
         self,
         db: AsyncSession,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
     ) -> ModelType:
         """
 
@@ -77,11 +426,12 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         else:
             update_data = obj_in.dict(exclude_unset=True)
 
+        self._forget(db, db_obj)
         for field, value in update_data.items():
             setattr(db_obj, field, value)
 
         db.add(db_obj)
-        await db.commit()
+        await self._commit(db)
         await db.refresh(db_obj)
         return db_obj
 
@@ -97,6 +447,192 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         obj = await self.get(db=db, id=id)
         if obj is not None:
+            self._forget(db, obj)
             await db.delete(obj)
-            await db.commit()
+            await self._commit(db)
         return obj
+
+    async def update_by_id(
+        self,
+        db: AsyncSession,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        expected_updated_on: Optional[datetime] = None,
+    ) -> Optional[ModelType]:
+        """
+        Updates one row with a single `UPDATE ... RETURNING` statement, without
+        loading it first. `updated_on` is bumped when the model has one.
+
+        Args:
+            db:
+            id:
+            obj_in: Fields to set; unset schema fields are left untouched.
+            expected_updated_on: If given, the update only applies if the row's
+                `updated_on` still has this value (optimistic concurrency).
+
+        Returns:
+            The updated row, or None if no row has this id.
+
+        Raises:
+            ConcurrentUpdateError: if the row changed since `expected_updated_on`.
+        """
+        if not isinstance(obj_in, dict):
+            obj_in = obj_in.model_dump(exclude_unset=True)
+        stmt = (
+            update(self.model)
+            .where(*self._by_id(id, expected_updated_on))
+            .values(self._with_updated_on(obj_in))
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        db_obj = (await db.execute(stmt)).scalar_one_or_none()
+        await self._commit(db)
+        if db_obj is None and expected_updated_on is not None:
+            await self._raise_if_exists(db, id)
+        if db_obj is not None:
+            self._forget(db, db_obj, changed=obj_in.keys())
+        return cast(Optional[ModelType], db_obj)
+
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        filters: Sequence[ColumnElement[bool]],
+        values: Dict[str, Any],
+    ) -> List[Any]:
+        """
+        Updates every row matching `filters` with a single `UPDATE ... RETURNING id`
+        statement. `updated_on` is bumped when the model has one. Objects of the
+        session are synchronized through the returned ids, and the session's loaders
+        of the model are cleared.
+
+        Args:
+            db:
+            filters: WHERE clauses; at least one, to guard against updating the
+                whole table by mistake.
+            values: Columns to set.
+
+        Returns:
+            The ids of the updated rows.
+        """
+        if not filters:
+            raise ValueError("update_many requires at least one filter")
+        stmt = (
+            update(self.model)
+            .where(*filters)
+            .values(self._with_updated_on(values))
+            .returning(getattr(self.model, "id"))
+            .execution_options(synchronize_session="fetch")
+        )
+        ids = list((await db.execute(stmt)).scalars())
+        await self._commit(db)
+        self._forget(db)
+        return ids
+
+    async def remove_by_id(
+        self,
+        db: AsyncSession,
+        *,
+        id: Any,
+        expected_updated_on: Optional[datetime] = None,
+    ) -> Optional[ModelType]:
+        """
+        Deletes one row with a single `DELETE ... RETURNING` statement, without
+        loading it first.
+
+        Args:
+            db:
+            id:
+            expected_updated_on: If given, the row is only deleted if its
+                `updated_on` still has this value (optimistic concurrency).
+
+        Returns:
+            The deleted row, or None if no row has this id.
+
+        Raises:
+            ConcurrentUpdateError: if the row changed since `expected_updated_on`.
+        """
+        stmt = (
+            delete(self.model)
+            .where(*self._by_id(id, expected_updated_on))
+            .returning(self.model)
+        )
+        db_obj = (await db.execute(stmt)).scalar_one_or_none()
+        await self._commit(db)
+        if db_obj is None and expected_updated_on is not None:
+            await self._raise_if_exists(db, id)
+        if db_obj is not None:
+            self._forget(db, db_obj)
+        return cast(Optional[ModelType], db_obj)
+
+    async def remove_many(
+        self, db: AsyncSession, *, filters: Sequence[ColumnElement[bool]]
+    ) -> List[Any]:
+        """
+        Deletes every row matching `filters` with a single `DELETE ... RETURNING id`
+        statement. Objects of the session are synchronized through the returned ids,
+        and the session's loaders of the model are cleared.
+
+        Args:
+            db:
+            filters: WHERE clauses; at least one, to guard against emptying the
+                whole table by mistake.
+
+        Returns:
+            The ids of the deleted rows.
+        """
+        if not filters:
+            raise ValueError("remove_many requires at least one filter")
+        stmt = (
+            delete(self.model)
+            .where(*filters)
+            .returning(getattr(self.model, "id"))
+            .execution_options(synchronize_session="fetch")
+        )
+        ids = list((await db.execute(stmt)).scalars())
+        await self._commit(db)
+        self._forget(db)
+        return ids
+
+    def _by_id(
+        self, id: Any, expected_updated_on: Optional[datetime]
+    ) -> List[ColumnElement[bool]]:
+        clauses = [getattr(self.model, "id") == id]
+        if expected_updated_on is not None:
+            clauses.append(getattr(self.model, "updated_on") == expected_updated_on)
+        return clauses
+
+    def _with_updated_on(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        if "updated_on" in getattr(self.model, "__table__").c and (
+            "updated_on" not in values
+        ):
+            # clock_timestamp(): distinct for successive updates in one transaction.
+            return {**values, "updated_on": func.clock_timestamp()}
+        return values
+
+    async def _raise_if_exists(self, db: AsyncSession, id: Any) -> None:
+        stmt = select(exists().where(getattr(self.model, "id") == id))
+        if (await db.execute(stmt)).scalar():
+            raise ConcurrentUpdateError(
+                model=getattr(self.model, "__tablename__"), id=id
+            )
+
+    def _forget(
+        self,
+        db: AsyncSession,
+        db_obj: Optional[ModelType] = None,
+        changed: Collection[str] = (),
+    ) -> None:
+        # Evicts `db_obj` from the session's loaders of the model, or every row when
+        # None. Loaders keyed by a `changed` column are cleared: the previous value
+        # of the row is unknown.
+        prefix = f"{getattr(self.model, '__tablename__')}."
+        for name, loader in db.info.get(LOADERS, {}).items():
+            if not name.startswith(prefix):
+                continue
+            key = name[len(prefix) :]
+            if db_obj is None or key in changed:
+                loader.clear()
+            else:
+                loader.clear(getattr(db_obj, key))
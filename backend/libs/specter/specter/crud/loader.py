@@ -0,0 +1,139 @@
+import asyncio
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    TypeVar,
+)
+
+from prometheus_client import Counter
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+LOADER_KEYS = Counter(
+    "specter_loader_keys_total",
+    "Keys requested from batch loaders, by loader and outcome (batched, memoized).",
+    ["loader", "outcome"],
+)
+LOADER_BATCHES = Counter(
+    "specter_loader_batches_total",
+    "Queries issued by batch loaders, per loader.",
+    ["loader"],
+)
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    DataLoader-style batching: every key requested within one event loop iteration
+    is fetched with a single call to `load_many`, and results are memoized for the
+    lifetime of the loader (one request, see `CRUDBase.loader`).
+
+    Concurrent callers asking for the same key share one pending result, so an N+1
+    pattern written with `asyncio.gather` collapses into one query.
+    """
+
+    def __init__(
+        self,
+        load_many: Callable[[List[K]], Awaitable[Mapping[K, V]]],
+        *,
+        name: str,
+        max_batch_size: int = 1000,
+    ):
+        """
+
+        Args:
+            load_many: Coroutine fetching the values of many keys at once; keys
+                missing from its result resolve to None.
+            name: Loader name used as the metrics label.
+            max_batch_size: Maximum number of keys per call to `load_many`.
+        """
+        self._load_many = load_many
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self._memo: Dict[K, "asyncio.Future[Optional[V]]"] = {}
+        self._pending: List[K] = []
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    async def load(self, key: K) -> Optional[V]:
+        """
+        Returns the value of one key, batched with the other keys requested in the
+        same event loop iteration.
+        """
+        future = self._memo.get(key)
+        if future is None:
+            LOADER_KEYS.labels(loader=self.name, outcome="batched").inc()
+            future = asyncio.get_running_loop().create_future()
+            self._memo[key] = future
+            if not self._pending:
+                asyncio.get_running_loop().call_soon(self._dispatch)
+            self._pending.append(key)
+        else:
+            LOADER_KEYS.labels(loader=self.name, outcome="memoized").inc()
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Sequence[K]) -> List[Optional[V]]:
+        """
+        Returns the values of many keys, in order, with at most one query.
+        """
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: K, value: Optional[V]) -> None:
+        """
+        Memoizes a value fetched by other means, unless the key is already known.
+        """
+        if key not in self._memo:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._memo[key] = future
+
+    def clear(self, key: Optional[K] = None) -> None:
+        """
+        Forgets one memoized key (e.g. after an update), or every key.
+        """
+        if key is None:
+            self._memo = {k: f for k, f in self._memo.items() if not f.done()}
+        elif key in self._memo and self._memo[key].done():
+            del self._memo[key]
+
+    def _dispatch(self) -> None:
+        keys, self._pending = self._pending, []
+        for start in range(0, len(keys), self.max_batch_size):
+            task = asyncio.create_task(
+                self._fetch(keys[start : start + self.max_batch_size])
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, keys: List[K]) -> None:
+        LOADER_BATCHES.labels(loader=self.name).inc()
+        try:
+            values = await self._load_many(keys)
+        except Exception as e:
+            self._fail(keys, e)
+            return
+        except BaseException:
+            self._fail(keys, None)
+            raise
+        for key in keys:
+            future = self._memo[key]
+            if not future.done():
+                future.set_result(values.get(key))
+
+    def _fail(self, keys: List[K], error: Optional[Exception]) -> None:
+        for key in keys:
+            # Not memoized: the next request for the key retries.
+            future = self._memo.pop(key)
+            if future.done():
+                continue
+            if error is None:
+                future.cancel()
+            else:
+                future.set_exception(error)
@@ -1 +1,3 @@
 from .crud_account_user import account_user
+from .crud_refresh_token import refresh_token
+from .crud_tenant import tenant
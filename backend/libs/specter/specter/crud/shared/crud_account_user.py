@@ -1,29 +1,238 @@
-from typing import Optional
+import uuid
+from datetime import datetime
+from typing import Any, FrozenSet, Mapping, NamedTuple, Optional, cast
 
 from specter.crud.base import CRUDBase
-from specter.models import AccountUser
+from specter.models import AccountUser, Tenant
 from specter.schemas import AccountUserCreate, AccountUserUpdate
-from sqlalchemy import select
+from sqlalchemy import (
+    TIMESTAMP,
+    and_,
+    bindparam,
+    column,
+    func,
+    or_,
+    select,
+    true,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.engine import CursorResult
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import QueryableAttribute, selectinload
+from sqlalchemy.sql.elements import BindParameter
+
+
+class AccountCredentials(NamedTuple):
+    """
+    Lightweight projection of the `account_user` columns needed to authenticate.
+    """
+
+    id: uuid.UUID
+    name: str
+    email: str
+    password_hash: str
+    is_active: bool
+
+
+# Built once at import time so every login reuses the same statement object, and
+# with it SQLAlchemy's compiled cache entry and asyncpg's prepared statement.
+# Both `email` and `username` are unique and indexed, so the OR is a BitmapOr of
+# two index lookups; an email match wins over a username match.
+_login: BindParameter[str] = bindparam("login")
+CREDENTIALS_BY_LOGIN = (
+    select(
+        AccountUser.id,
+        AccountUser.name,
+        AccountUser.email,
+        AccountUser.password_hash,
+        AccountUser.is_active,
+    )
+    .where(or_(AccountUser.email == _login, AccountUser.username == _login))
+    .order_by((AccountUser.email == _login).desc())
+    .limit(1)
+)
+
+
+class AccountStatus(NamedTuple):
+    """
+    Whether a user may act, and the active tenants they own.
+    """
+
+    is_active: bool
+    tenant_ids: FrozenSet[uuid.UUID]
+
+
+STATUS_BY_ID = (
+    select(
+        AccountUser.is_active,
+        func.array_remove(func.array_agg(Tenant.id), None),
+    )
+    .outerjoin(Tenant, and_(Tenant.owner_id == AccountUser.id, Tenant.is_active))
+    .where(AccountUser.id == bindparam("id"))
+    .group_by(AccountUser.id)
+)
 
 
 class CRUDAccountUser(CRUDBase[AccountUser, AccountUserCreate, AccountUserUpdate]):  # type: ignore
+    conflict_keys = ("email", "username")
 
     async def get_by_email(
         self, db: AsyncSession, *, email: str
     ) -> Optional[AccountUser]:
         """
+        Fetches a user by email through the session's email `loader`, so that
+        concurrent lookups share one query.
 
         Args:
             db:
             email:
 
         Returns:
+            The user, or None if no user has this email.
+        """
+        db_obj: Optional[AccountUser] = await self.loader(db, "email").load(email)
+        return db_obj
+
+    async def get_with_tenants(
+        self, db: AsyncSession, *, id: uuid.UUID, active_only: bool = True
+    ) -> Optional[AccountUser]:
+        """
+        Fetches a user with their tenants loaded.
 
+        The tenants are loaded with `selectinload`: a second query filtered on
+        `owner_id` (and `is_active`, served by `ix_tenant_owner_is_active`), which
+        avoids repeating the user's columns on every tenant row as a join would.
+
+        Args:
+            db:
+            id: Primary key of the user.
+            active_only: Only load active tenants.
+
+        Returns:
+            AccountUser with `tenants` loaded, or None if the user does not exist.
         """
-        stmt = select(self.model).where(self.model.email == email)
+        tenants: QueryableAttribute[Any] = AccountUser.tenants
+        if active_only:
+            tenants = tenants.and_(Tenant.is_active == true())
+        stmt = (
+            select(self.model)
+            .where(self.model.id == id)
+            .options(selectinload(tenants))
+            .execution_options(populate_existing=True)
+        )
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def get_credentials(
+        self, db: AsyncSession, *, login: str
+    ) -> Optional[AccountCredentials]:
+        """
+        Fetches only the columns needed to authenticate a user, by email or username.
+
+        Unlike `get_by_email`, no ORM entity is built or added to the session's
+        identity map.
+
+        Args:
+            db:
+            login: Email address or username.
+
+        Returns:
+            AccountCredentials, or None if no user matches.
+        """
+        result = await db.execute(CREDENTIALS_BY_LOGIN, {"login": login})
+        row = result.first()
+        return AccountCredentials._make(row) if row is not None else None
+
+    async def get_status(
+        self, db: AsyncSession, *, id: uuid.UUID
+    ) -> Optional[AccountStatus]:
+        """
+        Fetches a user's active flag and the ids of their active tenants in one query,
+        without loading either entity.
+
+        Args:
+            db:
+            id: Primary key of the user.
+
+        Returns:
+            AccountStatus, or None if the user does not exist.
+        """
+        row = (await db.execute(STATUS_BY_ID, {"id": id})).first()
+        if row is None:
+            return None
+        return AccountStatus(is_active=row[0], tenant_ids=frozenset(row[1]))
+
+    async def touch_last_logged_in(
+        self, db: AsyncSession, *, logins: Mapping[uuid.UUID, datetime]
+    ) -> int:
+        """
+        Records login timestamps for many users with a single
+        `UPDATE ... FROM (VALUES ...)` statement.
+
+        A timestamp older than the stored one is ignored, so out-of-order batches
+        never move `last_logged_in` backwards.
+
+        Args:
+            db:
+            logins: Login timestamp per user id.
+
+        Returns:
+            Number of rows updated.
+        """
+        if not logins:
+            return 0
+        batch = values(
+            column("id", UUID(as_uuid=True)),
+            column("logged_in", TIMESTAMP(timezone=True)),
+            name="logins",
+        ).data(list(logins.items()))
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.id == batch.c.id,
+                self.model.last_logged_in < batch.c.logged_in,
+            )
+            .values(last_logged_in=batch.c.logged_in)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        await self._commit(db)
+        return cast(CursorResult[Any], result).rowcount
+
+    async def replace_password_hash(
+        self,
+        db: AsyncSession,
+        *,
+        id: uuid.UUID,
+        current_hash: str,
+        new_hash: str,
+    ) -> bool:
+        """
+        Swaps a user's password hash, but only if it still is `current_hash`.
+
+        Used to upgrade hashes in the background; a password changed in the meantime
+        is left untouched.
+
+        Args:
+            db:
+            id: Primary key of the user.
+            current_hash: Hash the new one was derived from.
+            new_hash: Replacement hash.
+
+        Returns:
+            True if the hash was replaced.
+        """
+        stmt = (
+            update(self.model)
+            .where(self.model.id == id, self.model.password_hash == current_hash)
+            .values(password_hash=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        await self._commit(db)
+        return bool(cast(CursorResult[Any], result).rowcount)
+
 
 account_user = CRUDAccountUser(AccountUser)
@@ -0,0 +1,139 @@
+import uuid
+from datetime import datetime
+from typing import Any, NamedTuple, Optional, cast
+
+from specter.crud.base import CRUDBase
+from specter.models import AccountUser, RefreshToken
+from specter.schemas import RefreshTokenCreate, RefreshTokenUpdate
+from sqlalchemy import TIMESTAMP, func, insert, literal, select, update
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class RotatedToken(NamedTuple):
+    """
+    Owner of a refresh token that was just rotated, with the claims needed to mint
+    a new access token.
+    """
+
+    account_user_id: uuid.UUID
+    name: str
+    email: str
+    family_id: uuid.UUID
+
+
+class CRUDRefreshToken(
+    CRUDBase[RefreshToken, RefreshTokenCreate, RefreshTokenUpdate]  # type: ignore
+):
+
+    async def issue(self, db: AsyncSession, *, obj_in: RefreshTokenCreate) -> None:
+        """
+        Stores a new refresh token, starting a new family unless `family_id` is set.
+
+        Args:
+            db:
+            obj_in: Digest, owner and expiry of the token.
+        """
+        await db.execute(
+            insert(self.model).values(**obj_in.model_dump(exclude_none=True))
+        )
+        await self._commit(db)
+
+    async def rotate(
+        self,
+        db: AsyncSession,
+        *,
+        token_hash: str,
+        new_token_hash: str,
+        expires_on: datetime,
+    ) -> Optional[RotatedToken]:
+        """
+        Marks a live refresh token as used and issues its successor in the same
+        family, in a single statement.
+
+        The token is only claimed if it is unused, unrevoked, unexpired and owned by
+        an active user; of two concurrent rotations of the same token, one wins.
+
+        Args:
+            db:
+            token_hash: Digest of the presented token.
+            new_token_hash: Digest of the replacement token.
+            expires_on: Expiry of the replacement token.
+
+        Returns:
+            The owner of the token, or None if the token cannot be used.
+        """
+        claimed = (
+            update(self.model)
+            .where(
+                self.model.token_hash == token_hash,
+                self.model.used_on.is_(None),
+                self.model.revoked_on.is_(None),
+                self.model.expires_on > func.now(),
+                AccountUser.id == self.model.account_user_id,
+                AccountUser.is_active.is_(True),
+            )
+            .values(used_on=func.now())
+            .returning(
+                self.model.account_user_id,
+                AccountUser.name,
+                AccountUser.email,
+                self.model.family_id,
+            )
+            .cte("claimed")
+        )
+        issued = (
+            insert(self.model)
+            .from_select(
+                ["token_hash", "family_id", "account_user_id", "expires_on"],
+                select(
+                    literal(new_token_hash),
+                    claimed.c.family_id,
+                    claimed.c.account_user_id,
+                    literal(expires_on, TIMESTAMP(timezone=True)),
+                ),
+            )
+            .cte("issued")
+        )
+        stmt = select(
+            claimed.c.account_user_id,
+            claimed.c.name,
+            claimed.c.email,
+            claimed.c.family_id,
+        ).add_cte(issued)
+        row = (await db.execute(stmt)).one_or_none()
+        await self._commit(db)
+        return RotatedToken(*row) if row else None
+
+    async def revoke_family(self, db: AsyncSession, *, token_hash: str) -> int:
+        """
+        Revokes every live token of the family of an already used token.
+
+        A used token being presented again means it leaked: either the legitimate
+        client or an attacker holds its successor, so the whole chain is cut off.
+
+        Args:
+            db:
+            token_hash: Digest of the presented token.
+
+        Returns:
+            Number of tokens revoked; 0 if the token was never used (or unknown).
+        """
+        reused = select(self.model.family_id).where(
+            self.model.token_hash == token_hash, self.model.used_on.is_not(None)
+        )
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.family_id.in_(reused.scalar_subquery()),
+                self.model.revoked_on.is_(None),
+            )
+            .values(revoked_on=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        await self._commit(db)
+        return cast(CursorResult[Any], result).rowcount
+
+
+refresh_token = CRUDRefreshToken(RefreshToken)
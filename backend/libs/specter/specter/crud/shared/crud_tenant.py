@@ -0,0 +1,114 @@
+import uuid
+from typing import Dict, List, Optional
+
+from specter.crud.base import CRUDBase, Page
+from specter.models import Tenant
+from specter.schemas import TenantCreate, TenantUpdate
+from sqlalchemy import ColumnElement, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+
+class CRUDTenant(CRUDBase[Tenant, TenantCreate, TenantUpdate]):  # type: ignore
+
+    async def get_by_host(self, db: AsyncSession, *, host: str) -> Optional[Tenant]:
+        """
+
+        Args:
+            db:
+            host:
+
+        Returns:
+
+        """
+        stmt = select(self.model).where(self.model.host == host)
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def list_tenants_for_owner(
+        self, db: AsyncSession, *, owner_id: uuid.UUID, active_only: bool = True
+    ) -> List[Tenant]:
+        """
+        Lists the tenants owned by a user, oldest first, without loading the owner.
+        Served by `ix_tenant_owner_is_active`.
+
+        Args:
+            db:
+            owner_id: Primary key of the owning user.
+            active_only: Only list active tenants.
+
+        Returns:
+            The tenants.
+        """
+        stmt = (
+            select(self.model)
+            .where(*self._owned_by(owner_id, active_only))
+            .order_by(self.model.created_on, self.model.id)
+        )
+        result = await db.execute(stmt)
+        return list(result.scalars())
+
+    async def list_tenants_with_owners(
+        self,
+        db: AsyncSession,
+        *,
+        active_only: bool = True,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """
+        Pages through tenants with their owner loaded.
+
+        The owner is a many-to-one, loaded with an inner `joinedload`: one row per
+        tenant, in the same query.
+
+        Args:
+            db:
+            active_only: Only list active tenants.
+            limit: Maximum number of tenants of the page.
+            cursor: `next_cursor` of the previous page.
+
+        Returns:
+            Page: the tenants, with `owner` loaded, and the cursor of the next page.
+        """
+        return await self.page(
+            db,
+            limit=limit,
+            cursor=cursor,
+            filters=[self.model.is_active == true()] if active_only else [],
+            options=[joinedload(self.model.owner, innerjoin=True)],
+        )
+
+    async def list_schemas(
+        self, db: AsyncSession, *, active_only: bool = True
+    ) -> Dict[str, str]:
+        """
+        Lists the tenant schemas with their shard, e.g. the targets of a fan-out
+        query.
+
+        Args:
+            db:
+            active_only: Only list the schemas of active tenants.
+
+        Returns:
+            The shard of each schema, oldest tenant first.
+        """
+        stmt = select(self.model.schema, self.model.shard).order_by(
+            self.model.created_on, self.model.id
+        )
+        if active_only:
+            stmt = stmt.where(self.model.is_active == true())
+        result = await db.execute(stmt)
+        return {schema: shard for schema, shard in result}
+
+    def _owned_by(
+        self, owner_id: uuid.UUID, active_only: bool
+    ) -> List[ColumnElement[bool]]:
+        # `is_active = true` rather than `IS TRUE`, which the index cannot serve.
+        clauses = [self.model.owner_id == owner_id]
+        if active_only:
+            clauses.append(self.model.is_active == true())
+        return clauses
+
+
+tenant = CRUDTenant(Tenant)
@@ -1 +1,6 @@
-from specter.db.base_class import Base, shared_metadata, tenant_metadata  # noqa: F401
+from specter.db.base_class import (  # noqa: F401
+    Base,
+    TenantBase,
+    shared_metadata,
+    tenant_metadata,
+)
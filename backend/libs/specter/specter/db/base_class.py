@@ -1,7 +1,26 @@
+from sqlalchemy import MetaData
 from sqlalchemy.orm import DeclarativeBase, declared_attr
 
+# Tables of the shared (public) schema, managed by Liquibase.
+shared_metadata = MetaData()
+
+# Tables living in every tenant's schema. They are declared in the placeholder
+# schema "tenant", routed per statement with `schema_translate_map`, and created and
+# migrated by `specter.db.tenant_migrations`.
+tenant_metadata = MetaData(schema="tenant")
+
 
 class Base(DeclarativeBase):
+    metadata = shared_metadata
+
+    @declared_attr.directive
+    def __tablename__(cls) -> str:
+        return cls.__name__.lower()
+
+
+class TenantBase(DeclarativeBase):
+    metadata = tenant_metadata
+
     @declared_attr.directive
     def __tablename__(cls) -> str:
         return cls.__name__.lower()
@@ -0,0 +1,277 @@
+"""
+Runs one statement against many tenant schemas concurrently.
+
+The statement is compiled once: `schema_translate_map` is applied to the cached
+compiled form at execution time, so each tenant only costs a round trip. Tenants
+are queried at most `concurrency` at a time, each on its own connection, on a
+replica when one is healthy. A tenant failing or exceeding `timeout` once its turn
+came does not fail the others; its result carries the error.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Collection,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from core.config import settings
+from prometheus_client import Counter, Histogram
+from specter.db.session import route_shard_read, tenant_schema_map
+from specter.db.shards import PRIMARY_SHARD
+from sqlalchemy import Row, Select, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import Executable
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+FANOUT_TENANT_SECONDS = Histogram(
+    "specter_fanout_tenant_seconds",
+    "Time to query one tenant schema in a fan-out, connection wait included.",
+)
+FANOUT_TENANT_QUERIES = Counter(
+    "specter_fanout_tenant_queries_total",
+    "Tenant queries of fan-outs, by outcome (ok, timeout, error).",
+    ["outcome"],
+)
+
+
+class TenantResult(NamedTuple):
+    """
+    Result of the statement in one tenant schema; `error` is set instead of `rows`
+    when the tenant failed or timed out.
+    """
+
+    schema: str
+    rows: List[Row[Any]]
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class FanOut:
+    """
+    Executes a statement in a set of tenant schemas, streaming the per-tenant
+    results as they complete.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int,
+        timeout: float,
+        route: Callable[[str], AsyncEngine] = route_shard_read,
+    ):
+        """
+
+        Args:
+            concurrency: Maximum number of connections used at the same time.
+            timeout: Seconds allowed per tenant once it holds one of the
+                `concurrency` slots, connection wait included; also set as the
+                tenant query's `statement_timeout`.
+            route: Picks the engine of each tenant query from its shard (a
+                healthy replica, or the shard's primary, by default).
+        """
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.route = route
+
+    async def stream(
+        self,
+        stmt: Executable,
+        schemas: Collection[str],
+        params: Optional[Mapping[str, Any]] = None,
+    ) -> AsyncIterator[TenantResult]:
+        """
+        Yields the result of each tenant as soon as it is complete. Closing the
+        iterator early cancels the queries still running.
+
+        Args:
+            stmt: Statement on the `tenant` schema of the models.
+            schemas: Tenant schemas to query, or a mapping of the schemas to their
+                shard (see `crud.tenant.list_schemas`); primary by default.
+            params: Bound parameters of the statement.
+
+        Returns:
+            One TenantResult per schema, in completion order.
+
+        Raises:
+            ValueError: if a schema name is not a plain identifier.
+        """
+        shards = schemas if isinstance(schemas, Mapping) else {}
+        targets = [
+            (schema, tenant_schema_map(schema), shards.get(schema, PRIMARY_SHARD))
+            for schema in schemas
+        ]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [
+            asyncio.create_task(self._query(semaphore, stmt, params, *target))
+            for target in targets
+        ]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def gather(
+        self,
+        stmt: Executable,
+        schemas: Collection[str],
+        params: Optional[Mapping[str, Any]] = None,
+    ) -> List[TenantResult]:
+        """
+        Waits for the result of every tenant.
+
+        Returns:
+            One TenantResult per schema, in the order of `schemas`.
+        """
+        results = {r.schema: r async for r in self.stream(stmt, schemas, params)}
+        return [results[schema] for schema in schemas]
+
+    async def merge(
+        self,
+        stmt: Select[Any],
+        schemas: Collection[str],
+        *,
+        key: Callable[[Row[Any]], Any],
+        descending: bool = False,
+        limit: Optional[int] = None,
+        params: Optional[Mapping[str, Any]] = None,
+    ) -> Tuple[List[Tuple[str, Row[Any]]], List[TenantResult]]:
+        """
+        Merges the rows of every tenant into one ordered list (k-way merge).
+
+        `stmt` must order each tenant's rows by `key`. With a `limit` (top-N), each
+        tenant returns at most `limit` rows, and rows arriving from the tenants
+        already completed are kept in a heap of `limit` rows rather than buffered.
+
+        Args:
+            stmt: Select on the `tenant` schema, ordered by `key`.
+            schemas: Tenant schemas to query.
+            key: Sort key of a row; must be consistent with the statement's order.
+            descending: The statement orders by descending `key`.
+            limit: Number of rows to keep across tenants.
+            params: Bound parameters of the statement.
+
+        Returns:
+            The (schema, row) pairs in order, and the tenants that failed.
+        """
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        runs: List[List[Tuple[Any, int, str, Row[Any]]]] = []
+        top: List[Tuple[Any, int, str, Row[Any]]] = []
+        failed: List[TenantResult] = []
+        sequence = 0
+        async for result in self.stream(stmt, schemas, params):
+            if not result.ok:
+                failed.append(result)
+                continue
+            run = []
+            for row in result.rows:
+                run.append((key(row), sequence, result.schema, row))
+                sequence += 1
+            if limit is None:
+                runs.append(run)
+            else:
+                top = _keep_top(top + run, limit, descending)
+        merged = heapq.merge(*runs, reverse=descending) if limit is None else top
+        return [(schema, row) for _, _, schema, row in merged], failed
+
+    async def count(
+        self,
+        stmt: Select[Any],
+        schemas: Collection[str],
+        params: Optional[Mapping[str, Any]] = None,
+    ) -> Tuple[int, List[TenantResult]]:
+        """
+        Counts the rows of a select across tenants.
+
+        Returns:
+            The total, and the tenants that failed (not counted).
+        """
+        counted = select(func.count()).select_from(stmt.subquery())
+        total, failed = 0, []
+        async for result in self.stream(counted, schemas, params):
+            if result.ok:
+                total += result.rows[0][0]
+            else:
+                failed.append(result)
+        return total, failed
+
+    async def _query(
+        self,
+        semaphore: asyncio.Semaphore,
+        stmt: Executable,
+        params: Optional[Mapping[str, Any]],
+        schema: str,
+        schema_map: Optional[Mapping[str, str]],
+        shard: str,
+    ) -> TenantResult:
+        # The timeout starts with the tenant's turn: waiting behind the other
+        # tenants for a slot must not time it out.
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                rows = await asyncio.wait_for(
+                    self._execute(stmt, params, schema_map, shard), self.timeout
+                )
+            except Exception as e:
+                outcome = TIMEOUT if isinstance(e, asyncio.TimeoutError) else ERROR
+                FANOUT_TENANT_QUERIES.labels(outcome=outcome).inc()
+                logger.warning(f"Fan-out query on tenant schema {schema} failed: {e!r}")
+                return TenantResult(schema, [], e)
+            finally:
+                FANOUT_TENANT_SECONDS.observe(time.perf_counter() - start)
+        FANOUT_TENANT_QUERIES.labels(outcome=OK).inc()
+        return TenantResult(schema, rows)
+
+    async def _execute(
+        self,
+        stmt: Executable,
+        params: Optional[Mapping[str, Any]],
+        schema_map: Optional[Mapping[str, str]],
+        shard: str,
+    ) -> List[Row[Any]]:
+        async with self.route(shard).connect() as connection:
+            connection = await connection.execution_options(
+                schema_translate_map=schema_map
+            )
+            async with connection.begin():
+                # Server side as well, so that the backend stops on timeout.
+                await connection.exec_driver_sql(
+                    f"SET LOCAL statement_timeout = {int(self.timeout * 1000)}"
+                )
+                result = await connection.execute(stmt, params)
+                return list(result.all())
+
+
+def _keep_top(
+    rows: List[Tuple[Any, int, str, Row[Any]]], limit: int, descending: bool
+) -> List[Tuple[Any, int, str, Row[Any]]]:
+    if descending:
+        return heapq.nlargest(limit, rows, key=lambda row: (row[0], -row[1]))
+    return heapq.nsmallest(limit, rows)
+
+
+fanout = FanOut(
+    concurrency=settings.FANOUT_CONCURRENCY,
+    timeout=settings.FANOUT_TENANT_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,16 @@
+from typing import List
+
+from specter.db.shards import shard_names
+from specter.db.tenant_migrations import MigrationResult, migrate_shards
+
+
+async def init_db() -> List[MigrationResult]:
+    """
+    Brings the tenant schemas of every shard up to date. The shared schema is
+    managed by Liquibase.
+
+    Returns:
+        One result per tenant schema.
+    """
+    results: List[MigrationResult] = await migrate_shards(shard_names())
+    return results
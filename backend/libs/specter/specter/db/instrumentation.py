@@ -0,0 +1,206 @@
+import logging
+import re
+import time
+from collections import Counter as Occurrences
+from contextvars import ContextVar
+from typing import Any, MutableMapping, Optional, Sequence
+
+from core.config import settings
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("specter.sql.slow")
+
+# Key of the start times of the statements in flight in `Connection.info`.
+STARTED = "specter.statement_started"
+
+# Parameters logged as <redacted> even when DB_SLOW_QUERY_LOG_PARAMETERS is set.
+SENSITIVE_PARAMETER = re.compile(r"password|secret|token|hash|key", re.IGNORECASE)
+
+MAX_LOGGED_STATEMENT = 2000
+
+STATEMENT_SECONDS = Histogram(
+    "specter_db_statement_seconds",
+    "Duration of SQL statements, by route, schema kind (shared, tenant) and "
+    "operation.",
+    ["route", "schema", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+STATEMENTS_PER_REQUEST = Histogram(
+    "specter_db_statements_per_request",
+    "SQL statements issued per HTTP request, by route.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+SLOW_STATEMENTS = Counter(
+    "specter_db_slow_statements_total",
+    "Statements slower than DB_SLOW_QUERY_SECONDS, by route.",
+    ["route"],
+)
+REPEATED_STATEMENTS = Counter(
+    "specter_db_repeated_statements_total",
+    "Requests issuing one statement more than DB_N_PLUS_ONE_THRESHOLD times "
+    "(likely N+1 queries), by route.",
+    ["route"],
+)
+
+
+class RequestStats:
+    """
+    SQL statements issued while serving one HTTP request.
+    """
+
+    def __init__(self, scope: MutableMapping[str, Any]):
+        """
+
+        Args:
+            scope: ASGI scope of the request; the matched route is read from it.
+        """
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: "Occurrences[str]" = Occurrences()
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return str(getattr(route, "path", None) or "unmatched")
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+        if self.statements[statement] == settings.DB_N_PLUS_ONE_THRESHOLD + 1:
+            REPEATED_STATEMENTS.labels(route=self.route).inc()
+            logger.warning(
+                f"{self.scope.get('method')} {self.route} issued the same statement "
+                f"over {settings.DB_N_PLUS_ONE_THRESHOLD} times, consider "
+                f"batching it: {truncate(statement)}"
+            )
+
+    def finish(self) -> None:
+        STATEMENTS_PER_REQUEST.labels(route=self.route).observe(self.count)
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request", default=None
+)
+
+
+def truncate(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > MAX_LOGGED_STATEMENT:
+        return statement[:MAX_LOGGED_STATEMENT] + "..."
+    return statement
+
+
+def operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def redact(parameters: Any, names: Optional[Sequence[str]] = None) -> str:
+    """
+    Formats statement parameters for the slow-query log: values are only shown when
+    DB_SLOW_QUERY_LOG_PARAMETERS is set, and never for sensitive names.
+
+    Args:
+        parameters: The DBAPI parameters (a mapping, or a sequence for positional
+            drivers such as asyncpg).
+        names: Names of positional parameters, in order, when known.
+
+    Returns:
+        str: The parameters to log.
+    """
+    if not parameters:
+        return "{}"
+    if hasattr(parameters, "keys"):
+        named = dict(parameters)
+    elif names is not None and len(names) == len(parameters):
+        named = dict(zip(names, parameters))
+    else:
+        named = {f"${i}": value for i, value in enumerate(parameters, 1)}
+    if not settings.DB_SLOW_QUERY_LOG_PARAMETERS:
+        return "{" + ", ".join(f"{name}: <redacted>" for name in named) + "}"
+    return (
+        "{"
+        + ", ".join(
+            f"{name}: {'<redacted>' if SENSITIVE_PARAMETER.search(name) else repr(value)}"
+            for name, value in named.items()
+        )
+        + "}"
+    )
+
+
+def _schema(context: Optional[ExecutionContext]) -> Optional[str]:
+    if context is None:
+        return None
+    schema_map = context.execution_options.get("schema_translate_map") or {}
+    return schema_map.get("tenant")
+
+
+def _positional_names(context: Optional[ExecutionContext]) -> Optional[Sequence[str]]:
+    compiled = getattr(context, "compiled", None)
+    return getattr(compiled, "positiontup", None)
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Optional[ExecutionContext],
+    executemany: bool,
+) -> None:
+    conn.info.setdefault(STARTED, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Optional[ExecutionContext],
+    executemany: bool,
+) -> None:
+    seconds = time.perf_counter() - conn.info[STARTED].pop()
+    request = current_request.get()
+    route = request.route if request is not None else "background"
+    schema = _schema(context)
+    STATEMENT_SECONDS.labels(
+        route=route,
+        schema="tenant" if schema else "shared",
+        operation=operation(statement),
+    ).observe(seconds)
+    if request is not None:
+        request.record(statement, seconds)
+    if seconds >= settings.DB_SLOW_QUERY_SECONDS:
+        SLOW_STATEMENTS.labels(route=route).inc()
+        slow_query_logger.warning(
+            f"Slow statement ({seconds * 1000:.1f} ms, route: {route}, "
+            f"schema: {schema or 'public'}): {truncate(statement)} "
+            f"parameters: {redact(parameters, _positional_names(context))}"
+        )
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    connection = context.connection
+    if connection is not None and connection.info.get(STARTED):
+        connection.info[STARTED].pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Times every statement run by an engine: metrics by route, schema kind and
+    operation, the slow-query log, and per-request statement counts (gathered by
+    `SQLInstrumentationMiddleware`).
+
+    Args:
+        engine: The engine to instrument.
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
@@ -0,0 +1,187 @@
+import logging
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from core.config import settings
+from prometheus_client import Gauge, Histogram
+from specter.db.instrumentation import instrument_engine
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    ConnectionPoolEntry,
+    PoolProxiedConnection,
+)
+
+logger = logging.getLogger(__name__)
+
+PRE_PING_ALWAYS = "always"
+PRE_PING_IDLE = "idle"
+PRE_PING_ON_ERROR = "on_error"
+
+POOL_SIZE = Gauge(
+    "specter_db_pool_size",
+    "Configured number of persistent connections, per pool.",
+    ["pool"],
+)
+POOL_CHECKED_OUT = Gauge(
+    "specter_db_pool_checked_out",
+    "Connections currently checked out, per pool.",
+    ["pool"],
+)
+POOL_OVERFLOW = Gauge(
+    "specter_db_pool_overflow",
+    "Connections currently open beyond the pool size, per pool.",
+    ["pool"],
+)
+POOL_WAIT_SECONDS = Histogram(
+    "specter_db_pool_wait_seconds",
+    "Time spent obtaining a connection from the pool (including connecting), "
+    "per pool.",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool recording how long each checkout waited, labelled with the pool's
+    `logging_name` (the engine's `pool_logging_name`).
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT_SECONDS.labels(pool=self.logging_name or "default").observe(
+                time.perf_counter() - start
+            )
+
+
+def ping_if_idle(engine: AsyncEngine, idle_seconds: float) -> None:
+    """
+    Pings connections on checkout only when they sat in the pool for longer than
+    `idle_seconds`: busy connections skip the round trip, while those idle long
+    enough to have been dropped by a firewall or the server are checked first.
+    A failed ping discards the connection and the pool checks out another one.
+
+    Args:
+        engine: Engine whose pool is watched.
+        idle_seconds: Idle time beyond which a connection is pinged.
+    """
+    dialect = engine.dialect
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(
+        dbapi_connection: Any,
+        record: ConnectionPoolEntry,
+        proxy: PoolProxiedConnection,
+    ) -> None:
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            logger.info(f"Discarding a connection that failed its ping: {str(e)}")
+            raise exc.DisconnectionError()
+
+
+def register_pool_metrics(engine: AsyncEngine, name: str) -> None:
+    """
+    Publishes the live state of an engine's pool as gauges, read at scrape time.
+
+    Args:
+        engine: Engine whose pool is published.
+        name: Pool name used as the metrics label.
+    """
+    # Read through the engine: dispose() replaces the pool.
+    POOL_SIZE.labels(pool=name).set_function(lambda: engine.pool.size())  # type: ignore[attr-defined]
+    POOL_CHECKED_OUT.labels(pool=name).set_function(
+        lambda: engine.pool.checkedout()  # type: ignore[attr-defined]
+    )
+    POOL_OVERFLOW.labels(pool=name).set_function(
+        lambda: max(0, engine.pool.overflow())  # type: ignore[attr-defined]
+    )
+
+
+def prepared_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4().hex}__"
+
+
+def pooler_connect_args() -> Dict[str, Any]:
+    """
+    asyncpg arguments for servers behind a transaction-pooling PgBouncer, where
+    consecutive transactions of one client connection run on different server
+    connections: prepared statements must not outlive their transaction, so both
+    statement caches (asyncpg's and SQLAlchemy's) are disabled, and every statement
+    gets a unique name so that two clients sharing a server connection cannot
+    collide on `__asyncpg_stmt_1__`.
+    """
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": prepared_statement_name,
+    }
+
+
+def create_engine(
+    url: str,
+    *,
+    name: str = "primary",
+    pooler_mode: Optional[bool] = None,
+    **kwargs: Any,
+) -> AsyncEngine:
+    """
+    Creates an async engine with the pool configured from `DB_*` settings, and with
+    pool and statement instrumentation.
+
+    In pooler mode (`DB_POOLER_MODE`, for a PgBouncer in transaction pooling mode)
+    prepared statements are not cached, see `pooler_connect_args`. Tenant routing
+    stays correct since `schema_translate_map` renders schema names into each
+    statement rather than relying on a per-connection `search_path`.
+
+    Pre-ping strategies (`DB_PRE_PING`):
+        always: ping on every checkout (one extra round trip per checkout).
+        idle: ping only connections idle for over `DB_PRE_PING_IDLE_SECONDS`.
+        on_error: never ping; a statement failing with a disconnect error
+            invalidates the pool, so connections are replaced after the first
+            failure.
+
+    Args:
+        url: Database URL.
+        name: Pool name used as the metrics label.
+        pooler_mode: Overrides `DB_POOLER_MODE`.
+        **kwargs: Extra arguments for `create_async_engine`, overriding the
+            settings (e.g. `pool_size`).
+
+    Returns:
+        AsyncEngine: The engine.
+    """
+    if settings.DB_POOLER_MODE if pooler_mode is None else pooler_mode:
+        kwargs["connect_args"] = {
+            **pooler_connect_args(),
+            **kwargs.get("connect_args", {}),
+        }
+    options: Dict[str, Any] = dict(
+        poolclass=InstrumentedPool,
+        pool_logging_name=name,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_PRE_PING == PRE_PING_ALWAYS,
+        echo=settings.DB_ECHO,
+    )
+    engine = create_async_engine(url, **{**options, **kwargs})
+    if settings.DB_PRE_PING == PRE_PING_IDLE:
+        ping_if_idle(engine, settings.DB_PRE_PING_IDLE_SECONDS)
+    register_pool_metrics(engine, name)
+    instrument_engine(engine)
+    return engine
@@ -0,0 +1,127 @@
+import asyncio
+import itertools
+import logging
+import math
+from typing import Dict, List, Optional, Sequence
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+ROUND_ROBIN = "round_robin"
+LEAST_CONNECTIONS = "least_connections"
+
+# Seconds since the last replayed transaction; 0 when the replica has replayed
+# everything it received (an idle primary does not advance the replay timestamp).
+LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+    " END"
+)
+
+REPLICA_LAG_SECONDS = Gauge(
+    "specter_db_replica_lag_seconds",
+    "Replication lag last measured on each replica (+Inf when unreachable).",
+    ["pool"],
+)
+READ_ROUTES = Counter(
+    "specter_db_read_routes_total",
+    "Read sessions by target (replica, primary) and reason.",
+    ["target", "reason"],
+)
+
+
+class ReplicaSet:
+    """
+    Read replicas and their replication lag, measured in the background.
+
+    `choose()` picks a replica by round robin or by fewest checked out connections
+    among those lagging at most `max_lag` seconds; None means reads should go to the
+    primary (no replica configured, all lagging, or the monitor not started yet).
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[AsyncEngine],
+        *,
+        selection: str,
+        max_lag: float,
+        check_interval: float,
+    ):
+        """
+
+        Args:
+            engines: One engine per replica; their pool names label the metrics.
+            selection: round_robin or least_connections.
+            max_lag: Lag, in seconds, above which a replica is not used.
+            check_interval: Seconds between two lag measurements.
+        """
+        if selection not in (ROUND_ROBIN, LEAST_CONNECTIONS):
+            raise ValueError(f"Unknown replica selection: {selection}")
+        self.engines = list(engines)
+        self.selection = selection
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag: Dict[AsyncEngine, float] = {e: math.inf for e in self.engines}
+        self._turn = itertools.count()
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def eligible(self) -> List[AsyncEngine]:
+        return [e for e in self.engines if self.lag[e] <= self.max_lag]
+
+    def choose(self) -> Optional[AsyncEngine]:
+        eligible = self.eligible()
+        if not eligible:
+            return None
+        if self.selection == LEAST_CONNECTIONS:
+            return min(eligible, key=lambda e: e.pool.checkedout())  # type: ignore[attr-defined]
+        return eligible[next(self._turn) % len(eligible)]
+
+    async def start(self) -> None:
+        """
+        Measures the lag of every replica, then keeps measuring it in the
+        background. Called from the service lifespan.
+        """
+        if not self.engines or self._task is not None:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self._monitor())
+
+    async def close(self) -> None:
+        """
+        Stops the monitor and closes the replicas' connections.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for engine in self.engines:
+            await engine.dispose()
+
+    async def check(self) -> None:
+        await asyncio.gather(*(self._measure(engine) for engine in self.engines))
+
+    async def _measure(self, engine: AsyncEngine) -> None:
+        try:
+            async with engine.connect() as connection:
+                lag = float((await connection.execute(LAG_QUERY)).scalar() or 0)
+        except Exception as e:
+            logger.warning(f"Replica {engine.url.host} is unavailable: {str(e)}")
+            lag = math.inf
+        self.lag[engine] = lag
+        REPLICA_LAG_SECONDS.labels(pool=engine.pool.logging_name or "default").set(lag)
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
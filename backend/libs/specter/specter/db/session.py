@@ -1,34 +1,237 @@
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Optional
+import re
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, Iterator, Optional
 
 from core.config import settings
 from fastapi import Depends, Request
-from specter import crud, models, utils
-from sqlalchemy.ext.asyncio import (
-    AsyncEngine,
-    AsyncSession,
-    async_sessionmaker,
-    create_async_engine,
+from specter import crud, utils
+from specter.db.pool import create_engine
+from specter.db.replicas import READ_ROUTES, ReplicaSet
+from specter.db.shards import PRIMARY_SHARD, ShardRegistry
+from specter.db.tenant_cache import TenantCache, TenantSnapshot
+from specter.db.write_behind import WriteBehindBuffer
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+from starlette.types import Scope
+
+# Create the async engine, pooled as configured by the DB_* settings
+engine: AsyncEngine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+
+# Read replicas; their lag is monitored once the service lifespan calls
+# `replicas.start()`, until then reads go to the primary.
+replicas = ReplicaSet(
+    [
+        create_engine(uri, name=f"replica-{i}")
+        for i, uri in enumerate(settings.SQLALCHEMY_REPLICA_URIS)
+    ],
+    selection=settings.DB_REPLICA_SELECTION,
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS,
 )
 
-# Create the async engine
-engine: AsyncEngine = create_async_engine(
-    settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True, echo=True
+# Clusters holding tenant schemas, see `tenant.shard`; engines are created lazily.
+shards = ShardRegistry(
+    settings.SQLALCHEMY_SHARD_URIS, primary=engine, create_engine=create_engine
 )
 
+# Set once the current request committed on the primary: its later reads must see
+# its own writes, so they stay on the primary too.
+read_from_primary: ContextVar[bool] = ContextVar("read_from_primary", default=False)
+
+
+class PrimarySession(Session):
+    """
+    Session on the primary; committing routes the request's later reads to it.
+    """
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _after_primary_commit(session: Session) -> None:
+    read_from_primary.set(True)
+
+
+class ReadSession(Session):
+    """
+    Session routed to a read replica when it first needs a connection, or to the
+    primary when no replica is eligible or the request has written.
+    """
+
+    def get_bind(self, *args: Any, **kwargs: Any) -> Engine:
+        bind = self.info.get("bind")
+        if bind is None:
+            bind = route_read().sync_engine.execution_options(
+                schema_translate_map=self.info.get("schema_translate_map")
+            )
+            self.info["bind"] = bind
+        return bind
+
+
+def route_read() -> AsyncEngine:
+    """
+    Picks the engine of a read-only session.
+
+    Returns:
+        a replica lagging less than `DB_REPLICA_MAX_LAG_SECONDS`, else the primary
+    """
+    if read_from_primary.get():
+        READ_ROUTES.labels(target="primary", reason="read_your_writes").inc()
+        return engine
+    replica: Optional[AsyncEngine] = replicas.choose()
+    if replica is None:
+        reason = "lagging" if replicas else "no_replica"
+        READ_ROUTES.labels(target="primary", reason=reason).inc()
+        return engine
+    READ_ROUTES.labels(target="replica", reason="healthy").inc()
+    return replica
+
+
+def route_shard_read(shard: str) -> AsyncEngine:
+    """
+    Picks the engine of a read on a shard: see `route_read` for the primary shard;
+    the other shards are read from their own cluster.
+    """
+    return route_read() if shard == PRIMARY_SHARD else shards.engine(shard)
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """
+    Routes the read sessions opened within the block to the primary, e.g. to read
+    a write made by an earlier request of the same client.
+    """
+    token = read_from_primary.set(True)
+    try:
+        yield
+    finally:
+        read_from_primary.reset(token)
+
+
+# Unquoted Postgres identifiers. Schema names are rendered verbatim into every
+# statement by `schema_translate_map`, so anything else is refused.
+SCHEMA_NAME = re.compile(r"^[a-z_][a-z0-9_]{0,62}$")
+
+
+def tenant_schema_map(tenant_schema: Optional[str]) -> Optional[Dict[str, str]]:
+    """
+    Builds the schema_translate_map routing the `tenant` schema of the models to a
+    tenant's schema.
+
+    Routing is per statement, not per connection (no `SET search_path`), so it is
+    correct on connections shared through a transaction-pooling PgBouncer.
+
+    Args:
+        tenant_schema:
+
+    Returns:
+        the map, or None for the shared schema
+
+    Raises:
+        ValueError: if the schema name is not a plain identifier.
+    """
+    if not tenant_schema:
+        return None
+    if not SCHEMA_NAME.match(tenant_schema):
+        raise ValueError(f"Invalid tenant schema name: {tenant_schema!r}")
+    return dict(tenant=tenant_schema)
+
+
 # Create a sessionmaker for AsyncSession
 AsyncSessionLocal: async_sessionmaker[AsyncSession] = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
+    sync_session_class=PrimarySession,
+    expire_on_commit=False,
+    autoflush=False,
+    autocommit=False,
+)
+
+# Sessionmaker for read-only AsyncSessions, see `ReadSession`
+ReadSessionLocal: async_sessionmaker[AsyncSession] = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=ReadSession,
     expire_on_commit=False,
     autoflush=False,
     autocommit=False,
 )
 
 
-async def get_tenant(request: Request) -> models.Tenant:
+async def load_tenant(host: str) -> Optional[TenantSnapshot]:
+    """
+    Loads the tenant registered for a host from the shared schema.
+
+    Args:
+        host:
+
+    Returns:
+        tenant snapshot, or None if the host is unknown
+    """
+    async with with_db(None) as db:
+        tenant = await crud.tenant.get_by_host(db=db, host=host)
+    return TenantSnapshot.from_model(tenant) if tenant else None
+
+
+# Host -> tenant cache in front of `load_tenant`; invalidated via LISTEN/NOTIFY once
+# the service lifespan calls `tenant_cache.start_listener(...)`.
+tenant_cache = TenantCache(
+    load_tenant,
+    ttl=settings.TENANT_CACHE_TTL_SECONDS,
+    negative_ttl=settings.TENANT_CACHE_NEGATIVE_TTL_SECONDS,
+    max_size=settings.TENANT_CACHE_MAX_SIZE,
+    channel=settings.TENANT_CACHE_NOTIFY_CHANNEL,
+)
+
+
+async def flush_last_logins(logins: Dict[uuid.UUID, datetime]) -> None:
     """
-    Extracts the tenant based on the host header.
+    Persists a batch of coalesced login timestamps.
+
+    Args:
+        logins:
+
+    Returns:
+
+    """
+    async with with_db(None) as db:
+        await crud.account_user.touch_last_logged_in(db=db, logins=logins)
+
+
+# Write-behind buffer for `account_user.last_logged_in`; started and drained by the
+# service lifespan, so recording a login never waits on the database.
+last_login_writer: WriteBehindBuffer[uuid.UUID, datetime] = WriteBehindBuffer(
+    flush_last_logins,
+    interval=settings.LAST_LOGIN_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.LAST_LOGIN_FLUSH_MAX_PENDING,
+    name="last_logged_in",
+)
+
+
+# Key of the tenant resolved by `TenantMiddleware` in the request state.
+TENANT_STATE = "tenant"
+
+# Raw header name looked up before Host, see TENANT_HOST_HEADER.
+TENANT_HOST_HEADER = (settings.TENANT_HOST_HEADER or "").lower().encode("latin-1")
+
+
+def tenant_host(scope: Scope) -> str:
+    """
+    Returns the host a request is for, without port: from the TENANT_HOST_HEADER
+    header when set (its first value), else from the Host header.
+    """
+    headers: Dict[bytes, bytes] = dict(scope["headers"])
+    host = (TENANT_HOST_HEADER and headers.get(TENANT_HOST_HEADER)) or headers.get(
+        b"host", b""
+    )
+    return host.decode("latin-1").split(",", 1)[0].strip().split(":", 1)[0]
+
+
+async def get_tenant(request: Request) -> TenantSnapshot:
+    """
+    Extracts the tenant based on the host header: as resolved by `TenantMiddleware`
+    when the app has it, else from the tenant cache.
 
     Args:
         request:
@@ -37,29 +240,36 @@ async def get_tenant(request: Request) -> models.Tenant:
         tenant
 
     Raises:
-        TenantNotFoundError: if no tenant is found.
+        TenantNotFoundError: if no active tenant is found.
     """
-    host_wo_port = request.headers["host"].split(":", 1)[0]
-    async with with_db(None) as db:
-        tenant = crud.tenant.get_by_host(db=db, host=host_wo_port)
-    if not tenant:
+    state: Dict[str, Any] = request.scope.get("state", {})
+    resolved: Optional[TenantSnapshot] = state.get(TENANT_STATE)
+    if resolved is not None:
+        return resolved
+    host_wo_port = tenant_host(request.scope)
+    tenant = await tenant_cache.get(host_wo_port)
+    if not tenant or not tenant.is_active:
         raise utils.TenantNotFoundError(host=host_wo_port)
     return tenant
 
 
 @asynccontextmanager
-async def with_db(tenant_schema: Optional[str]) -> AsyncGenerator[AsyncSession, None]:
+async def with_db(
+    tenant_schema: Optional[str], *, shard: str = PRIMARY_SHARD
+) -> AsyncGenerator[AsyncSession, None]:
     """
     Async context manager for AsyncSession, optionally using a schema_translate_map.
 
     Args:
         tenant_schema:
+        shard: Cluster holding the tenant schema (`tenant.shard`).
 
     Returns:
 
     """
-    schema_translate_map = dict(tenant=tenant_schema) if tenant_schema else None
-    connectable = engine.execution_options(schema_translate_map=schema_translate_map)
+    connectable = shards.engine(shard).execution_options(
+        schema_translate_map=tenant_schema_map(tenant_schema)
+    )
     async with AsyncSessionLocal(bind=connectable) as session:
         try:
             yield session
@@ -68,7 +278,7 @@ async def with_db(tenant_schema: Optional[str]) -> AsyncGenerator[AsyncSession,
 
 
 async def get_db(
-    tenant: models.Tenant = Depends(get_tenant),
+    tenant: TenantSnapshot = Depends(get_tenant),
 ) -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency to provide an AsyncSession scoped to the tenant's schema.
@@ -79,7 +289,7 @@ async def get_db(
     Returns:
 
     """
-    async with with_db(tenant.schema) as db:
+    async with with_db(tenant.schema, shard=tenant.shard) as db:
         yield db
 
 
@@ -93,3 +303,65 @@ async def get_shared_db() -> AsyncGenerator[AsyncSession, None]:
     """
     async with with_db(None) as db:
         yield db
+
+
+@asynccontextmanager
+async def with_read_db(
+    tenant_schema: Optional[str], *, shard: str = PRIMARY_SHARD
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async context manager for a read-only AsyncSession, routed to a read replica
+    (see `route_read`), optionally using a schema_translate_map.
+
+    Reads may lag the primary by up to `DB_REPLICA_MAX_LAG_SECONDS`; use `with_db`
+    for reads that must be current, or that precede a write.
+
+    Replicas are those of the primary cluster: the schemas of other shards are
+    read from their shard.
+
+    Args:
+        tenant_schema:
+        shard: Cluster holding the tenant schema (`tenant.shard`).
+
+    Returns:
+
+    """
+    info: Dict[str, Any] = {"schema_translate_map": tenant_schema_map(tenant_schema)}
+    if shard != PRIMARY_SHARD:
+        info["bind"] = shards.engine(shard).sync_engine.execution_options(
+            schema_translate_map=info["schema_translate_map"]
+        )
+    async with ReadSessionLocal(info=info) as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def get_read_db(
+    tenant: TenantSnapshot = Depends(get_tenant),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to provide a read-only AsyncSession scoped to the tenant's schema,
+    served by a read replica when one is available.
+
+    Args:
+        tenant:
+
+    Returns:
+
+    """
+    async with with_read_db(tenant.schema, shard=tenant.shard) as db:
+        yield db
+
+
+async def get_shared_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to provide a read-only AsyncSession for the shared/public schema,
+    served by a read replica when one is available.
+
+    Returns:
+
+    """
+    async with with_read_db(None) as db:
+        yield db
@@ -0,0 +1,85 @@
+import logging
+from typing import Callable, Dict, List, Mapping
+
+from core.config import settings
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# The cluster of the shared schema, whose engine is `specter.db.session.engine`.
+PRIMARY_SHARD = "primary"
+
+
+class ShardRegistry:
+    """
+    Engines of the database clusters holding tenant schemas, created on first use:
+    a process only opens pools to the shards its requests actually reach.
+    """
+
+    def __init__(
+        self,
+        uris: Mapping[str, str],
+        *,
+        primary: AsyncEngine,
+        create_engine: Callable[..., AsyncEngine],
+    ):
+        """
+
+        Args:
+            uris: Database URL of each shard, by name.
+            primary: Engine of the primary shard.
+            create_engine: Creates the engine of a shard, see
+                `specter.db.pool.create_engine`.
+        """
+        self.uris = dict(uris)
+        self.primary = primary
+        self._create_engine = create_engine
+        self._engines: Dict[str, AsyncEngine] = {}
+
+    def engine(self, shard: str) -> AsyncEngine:
+        """
+        Returns the engine of a shard, creating it on first use.
+
+        Raises:
+            ValueError: if the shard is not configured.
+        """
+        if shard == PRIMARY_SHARD:
+            return self.primary
+        engine = self._engines.get(shard)
+        if engine is None:
+            if shard not in self.uris:
+                raise ValueError(f"Unknown shard: {shard!r}")
+            engine = self._create_engine(self.uris[shard], name=f"shard-{shard}")
+            self._engines[shard] = engine
+            logger.info(f"Created the engine of shard {shard}")
+        return engine
+
+    async def close(self) -> None:
+        """
+        Disposes the engines created so far.
+        """
+        engines, self._engines = self._engines, {}
+        for engine in engines.values():
+            await engine.dispose()
+
+
+def shard_names() -> List[str]:
+    shards: Dict[str, str] = settings.SQLALCHEMY_SHARD_URIS
+    return [PRIMARY_SHARD, *(name for name in shards if name != PRIMARY_SHARD)]
+
+
+def direct_uri(shard: str) -> str:
+    """
+    Returns the URL of a shard bypassing any pooler, for sessions needing their
+    own server connection (LISTEN, DDL runs, logical replication).
+
+    Raises:
+        ValueError: if the shard is not configured.
+    """
+    if shard == PRIMARY_SHARD:
+        return str(settings.SQLALCHEMY_DIRECT_URI or settings.SQLALCHEMY_DATABASE_URI)
+    uris: Dict[str, str] = settings.SQLALCHEMY_SHARD_URIS
+    if shard not in uris:
+        raise ValueError(f"Unknown shard: {shard!r}")
+    direct_uris: Dict[str, str] = settings.SQLALCHEMY_SHARD_DIRECT_URIS
+    return direct_uris.get(shard, uris[shard])
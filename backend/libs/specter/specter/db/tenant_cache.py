@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import asyncpg
+from prometheus_client import Counter, Histogram
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+TENANT_CACHE_LOOKUPS = Counter(
+    "specter_tenant_cache_lookups_total",
+    "Host to tenant resolutions, by outcome (hit, negative_hit, miss, coalesced).",
+    ["result"],
+)
+TENANT_CACHE_REFRESH_SECONDS = Histogram(
+    "specter_tenant_cache_refresh_seconds",
+    "Time spent loading a tenant from the database on a cache miss.",
+)
+TENANT_CACHE_INVALIDATIONS = Counter(
+    "specter_tenant_cache_invalidations_total",
+    "Tenant cache invalidations, by source (notify, reconnect, manual).",
+    ["source"],
+)
+
+
+@dataclass(frozen=True, slots=True)
+class TenantSnapshot:
+    """
+    Immutable, detached view of a `tenant` row, safe to share across requests.
+
+    Attributes:
+        id (UUID): Primary key of the tenant.
+        name (str): Name of the tenant.
+        host (str): Hostname/domain associated with the tenant.
+        schema (str): Database schema associated with the tenant.
+        owner_id (UUID): Identifier of the owning AccountUser.
+        is_active (bool): Indicates if the tenant is active.
+        shard (str): Database cluster holding the schema.
+    """
+
+    id: uuid.UUID
+    name: str
+    host: str
+    schema: str
+    owner_id: uuid.UUID
+    is_active: bool
+    shard: str = "primary"
+
+    @classmethod
+    def from_model(cls, tenant: Any) -> "TenantSnapshot":
+        return cls(
+            id=tenant.id,
+            name=tenant.name,
+            host=tenant.host,
+            schema=tenant.schema,
+            owner_id=tenant.owner_id,
+            is_active=tenant.is_active,
+            shard=tenant.shard,
+        )
+
+
+TenantLoader = Callable[[str], Awaitable[Optional[TenantSnapshot]]]
+
+
+class TenantCache:
+    """
+    Bounded host -> tenant cache with TTLs and LISTEN/NOTIFY based invalidation.
+
+    Unknown hosts are cached as well (with their own, usually shorter, TTL) so that
+    requests for them do not reach the database every time. Concurrent misses for a
+    host share one load. Entries are evicted in least-recently-used order once
+    `max_size` is reached.
+    """
+
+    def __init__(
+        self,
+        loader: TenantLoader,
+        *,
+        ttl: float,
+        negative_ttl: float,
+        max_size: int,
+        channel: str = "tenant_changed",
+    ):
+        """
+
+        Args:
+            loader: Coroutine loading a tenant snapshot for a host from the database.
+            ttl: Seconds a resolved tenant is served from the cache.
+            negative_ttl: Seconds an unknown host is served from the cache.
+            max_size: Maximum number of cached hosts.
+            channel: Postgres NOTIFY channel carrying the hosts of changed tenants.
+        """
+        self._loader = loader
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.channel = channel
+        self._entries: "OrderedDict[str, Tuple[float, Optional[TenantSnapshot]]]" = (
+            OrderedDict()
+        )
+        self._loads: Dict[str, "asyncio.Future[Optional[TenantSnapshot]]"] = {}
+        # Bumped on every invalidation; a load that started before an invalidation
+        # must not store its (possibly stale) result.
+        self._epoch = 0
+        self._listener: Optional["asyncio.Task[None]"] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, host: str) -> Optional[TenantSnapshot]:
+        """
+        Resolves a host to its tenant snapshot, loading it on a miss.
+
+        Args:
+            host: Hostname without port.
+
+        Returns:
+            The tenant snapshot, or None if no tenant is registered for the host.
+        """
+        entry = self._entries.get(host)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(host)
+            TENANT_CACHE_LOOKUPS.labels(
+                result="hit" if entry[1] is not None else "negative_hit"
+            ).inc()
+            return entry[1]
+
+        if host in self._loads:
+            TENANT_CACHE_LOOKUPS.labels(result="coalesced").inc()
+            return await asyncio.shield(self._loads[host])
+        TENANT_CACHE_LOOKUPS.labels(result="miss").inc()
+        future = asyncio.ensure_future(self._load(host))
+        self._loads[host] = future
+        future.add_done_callback(lambda f: self._loaded(host, f))
+        return await asyncio.shield(future)
+
+    def invalidate(self, host: str, *, source: str = "manual") -> None:
+        """
+        Drops a single host from the cache.
+        """
+        self._epoch += 1
+        self._entries.pop(host, None)
+        TENANT_CACHE_INVALIDATIONS.labels(source=source).inc()
+
+    def clear(self, *, source: str = "manual") -> None:
+        """
+        Drops every cached host.
+        """
+        self._epoch += 1
+        self._entries.clear()
+        TENANT_CACHE_INVALIDATIONS.labels(source=source).inc()
+
+    async def _load(self, host: str) -> Optional[TenantSnapshot]:
+        epoch = self._epoch
+        with TENANT_CACHE_REFRESH_SECONDS.time():
+            tenant = await self._loader(host)
+        if epoch == self._epoch:
+            self._store(host, tenant)
+        return tenant
+
+    def _loaded(self, host: str, future: "asyncio.Future[Any]") -> None:
+        self._loads.pop(host, None)
+        # Retrieved here too: the callers waiting for it may have been cancelled.
+        if not future.cancelled():
+            future.exception()
+
+    def _store(self, host: str, tenant: Optional[TenantSnapshot]) -> None:
+        ttl = self.ttl if tenant is not None else self.negative_ttl
+        self._entries[host] = (time.monotonic() + ttl, tenant)
+        self._entries.move_to_end(host)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _on_notify(self, _conn: Any, _pid: int, _channel: str, payload: str) -> None:
+        self.invalidate(payload, source="notify")
+
+    async def start_listener(self, database_uri: str, retry_delay: float = 5.0) -> None:
+        """
+        Starts a background task that LISTENs for tenant changes on a dedicated
+        connection. Called from the service lifespan.
+
+        Args:
+            database_uri: SQLAlchemy database URI of the shared database.
+            retry_delay: Seconds to wait before reconnecting after a lost connection.
+        """
+        if self._listener is None:
+            dsn = make_url(database_uri).set(drivername="postgresql")
+            self._listener = asyncio.create_task(
+                self._listen(dsn.render_as_string(hide_password=False), retry_delay)
+            )
+
+    async def stop_listener(self) -> None:
+        """
+        Cancels the listener task started by `start_listener`.
+        """
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self, dsn: str, retry_delay: float) -> None:
+        while True:
+            conn: Optional[asyncpg.Connection] = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _conn: lost.set())
+                await conn.add_listener(self.channel, self._on_notify)
+                # Anything cached before the LISTEN was in place may have missed
+                # its notification.
+                self.clear(source="reconnect")
+                await lost.wait()
+                logger.warning("Tenant cache listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Tenant cache listener failed: {str(e)}")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            self.clear(source="reconnect")
+            await asyncio.sleep(retry_delay)
@@ -0,0 +1,347 @@
+"""
+Creates and migrates the `tenant_metadata` tables in every tenant schema.
+
+Tenant schemas are discovered from the `tenant` table and migrated concurrently, at
+most `concurrency` at a time. Each migration runs in its own transaction, under a
+per-schema advisory lock, and records the schema's new version in
+`tenant_schema_version` in that same transaction: a failed or interrupted run
+leaves every schema at its last applied version, and is resumed by running again.
+
+Each shard tracks the versions of its own schemas in its `tenant_schema_version`.
+
+    python -m specter.db.tenant_migrations [--concurrency N] [--shard NAME ...]
+        [--schema NAME ...]
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, NamedTuple, Optional, Sequence
+
+from core.config import settings
+from prometheus_client import Counter, Histogram
+from specter.db.base_class import shared_metadata, tenant_metadata
+from specter.db.pool import create_engine
+from specter.db.session import tenant_schema_map
+from specter.db.shards import PRIMARY_SHARD, direct_uri, shard_names
+from specter.models import Tenant
+from sqlalchemy import (
+    TIMESTAMP,
+    Column,
+    Integer,
+    String,
+    Table,
+    Text,
+    func,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+MIGRATED = "migrated"
+CURRENT = "current"
+LOCKED = "locked"
+FAILED = "failed"
+
+# Transaction-scoped, so it is released on commit or rollback and is safe behind a
+# transaction-pooling PgBouncer. Taken with "try": a schema being migrated by
+# another runner is skipped rather than waited for.
+LOCK_QUERY = text(
+    "SELECT pg_try_advisory_xact_lock("
+    "hashtext('specter.tenant_migrations'), hashtext(:schema))"
+)
+
+TENANT_MIGRATIONS = Counter(
+    "specter_tenant_migrations_total",
+    "Tenant schemas processed by the migration runner, by outcome "
+    "(migrated, current, locked, failed).",
+    ["outcome"],
+)
+TENANT_MIGRATION_SECONDS = Histogram(
+    "specter_tenant_migration_seconds",
+    "Time spent migrating one tenant schema.",
+)
+
+# Created by the Liquibase changelog, see 006-create-tenant-schema-version-table.sql
+tenant_schema_version = Table(
+    "tenant_schema_version",
+    shared_metadata,
+    Column("schema", String(64), primary_key=True),
+    Column("version", Integer, nullable=False, server_default="0"),
+    Column("last_error", Text),
+    Column(
+        "updated_on",
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        server_default=func.current_timestamp(),
+    ),
+)
+
+
+class TenantMigration(NamedTuple):
+    """
+    A step of the tenant schema: `apply` is called with a connection, in an open
+    transaction, whose `tenant` schema is routed to the schema being migrated.
+    """
+
+    version: int
+    description: str
+    apply: Callable[[AsyncConnection], Awaitable[None]]
+
+
+class MigrationResult(NamedTuple):
+    schema: str
+    outcome: str
+    version: int
+    error: Optional[str] = None
+
+
+async def create_tenant_tables(connection: AsyncConnection) -> None:
+    await connection.run_sync(tenant_metadata.create_all)
+
+
+MIGRATIONS: List[TenantMigration] = [
+    TenantMigration(1, "Create the tenant_metadata tables", create_tenant_tables),
+]
+
+
+class TenantMigrator:
+    """
+    Brings tenant schemas up to the latest version of `migrations`.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        migrations: Sequence[TenantMigration] = MIGRATIONS,
+        *,
+        concurrency: int = 8,
+        shard: str = PRIMARY_SHARD,
+        directory: Optional[AsyncEngine] = None,
+    ):
+        """
+
+        Args:
+            engine: Engine on the shard's cluster, which tracks the versions of its
+                schemas; sized for `concurrency` connections.
+            migrations: Migrations, with distinct versions.
+            concurrency: Maximum number of schemas migrated at the same time.
+            shard: Shard whose tenants are migrated.
+            directory: Engine on the primary, holding the `tenant` table (`engine`
+                by default).
+        """
+        versions = [migration.version for migration in migrations]
+        if len(set(versions)) != len(versions):
+            raise ValueError(f"Duplicate tenant migration versions: {versions}")
+        self.engine = engine
+        self.shard = shard
+        self.directory = directory or engine
+        self.migrations = sorted(migrations, key=lambda migration: migration.version)
+        self.concurrency = concurrency
+
+    @property
+    def target(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    async def pending_schemas(self) -> List[str]:
+        """
+        Lists the schemas of the shard's tenants below the target version, oldest
+        tenant first.
+
+        Returns:
+            The schema names.
+        """
+        tenants = (
+            select(Tenant.schema)
+            .where(Tenant.shard == self.shard)
+            .order_by(Tenant.created_on, Tenant.id)
+        )
+        async with self.directory.connect() as connection:
+            schemas = list((await connection.execute(tenants)).scalars())
+        versions = select(
+            tenant_schema_version.c.schema, tenant_schema_version.c.version
+        ).where(tenant_schema_version.c.version >= self.target)
+        async with self.engine.connect() as connection:
+            current = {schema for schema, _ in await connection.execute(versions)}
+        return [schema for schema in schemas if schema not in current]
+
+    async def run(
+        self, schemas: Optional[Sequence[str]] = None
+    ) -> List[MigrationResult]:
+        """
+        Migrates schemas concurrently, at most `concurrency` at a time. A failure
+        is recorded for its schema and does not stop the others.
+
+        Args:
+            schemas: Schemas to migrate; the pending schemas by default.
+
+        Returns:
+            One result per schema.
+        """
+        if schemas is None:
+            schemas = await self.pending_schemas()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(schema: str) -> MigrationResult:
+            async with semaphore:
+                return await self.migrate_schema(schema)
+
+        results = await asyncio.gather(*(bounded(schema) for schema in schemas))
+        failed = [result.schema for result in results if result.outcome == FAILED]
+        logger.info(
+            f"Migrated {len(results)} tenant schemas to version {self.target}, "
+            f"{len(failed)} failed: {failed}"
+        )
+        return list(results)
+
+    async def migrate_schema(self, schema: str) -> MigrationResult:
+        """
+        Applies the migrations a schema is missing, creating the schema if needed.
+
+        Args:
+            schema: Tenant schema name.
+
+        Returns:
+            MigrationResult: The outcome, and the version the schema is at.
+        """
+        start = time.perf_counter()
+        outcome, version = CURRENT, 0
+        try:
+            for migration in self.migrations:
+                applied = await self._apply(schema, migration)
+                if applied is None:
+                    outcome = LOCKED
+                    break
+                if applied:
+                    outcome = MIGRATED
+                version = migration.version
+        except Exception as e:
+            logger.exception(f"Migrating tenant schema {schema} failed")
+            await self._record_error(schema, repr(e))
+            TENANT_MIGRATIONS.labels(outcome=FAILED).inc()
+            return MigrationResult(schema, FAILED, version, repr(e))
+        finally:
+            TENANT_MIGRATION_SECONDS.observe(time.perf_counter() - start)
+        TENANT_MIGRATIONS.labels(outcome=outcome).inc()
+        return MigrationResult(schema, outcome, version)
+
+    async def _apply(self, schema: str, migration: TenantMigration) -> Optional[bool]:
+        # True once applied, False if already applied, None if the schema is locked.
+        schema_map = tenant_schema_map(schema)
+        async with self.engine.begin() as connection:
+            if not (await connection.execute(LOCK_QUERY, dict(schema=schema))).scalar():
+                return None
+            current = (
+                await connection.execute(
+                    select(tenant_schema_version.c.version).where(
+                        tenant_schema_version.c.schema == schema
+                    )
+                )
+            ).scalar()
+            if (current or 0) >= migration.version:
+                return False
+            await connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+            tenant_connection = await connection.execution_options(
+                schema_translate_map=schema_map
+            )
+            await migration.apply(tenant_connection)
+            await connection.execute(
+                self._upsert(schema, version=migration.version, last_error=None)
+            )
+        return True
+
+    async def _record_error(self, schema: str, error: str) -> None:
+        stmt = self._upsert(schema, last_error=error)
+        try:
+            async with self.engine.begin() as connection:
+                await connection.execute(stmt)
+        except Exception:
+            logger.exception(f"Recording the failure of tenant schema {schema} failed")
+
+    @staticmethod
+    def _upsert(schema: str, **values: object) -> Insert:
+        stmt = insert(tenant_schema_version).values(schema=schema, **values)
+        return stmt.on_conflict_do_update(
+            index_elements=[tenant_schema_version.c.schema],
+            set_=dict(values, updated_on=func.current_timestamp()),
+        )
+
+
+async def migrate_tenants(
+    schemas: Optional[Sequence[str]] = None,
+    *,
+    concurrency: Optional[int] = None,
+    shard: str = PRIMARY_SHARD,
+) -> List[MigrationResult]:
+    """
+    Migrates the tenant schemas of a shard through dedicated engines, bypassing
+    PgBouncer when a direct URI is set (see `direct_uri`).
+
+    Args:
+        schemas: Schemas to migrate; the shard's pending schemas by default.
+        concurrency: Overrides `TENANT_MIGRATION_CONCURRENCY`.
+        shard: Shard holding the schemas.
+
+    Returns:
+        One result per schema.
+    """
+    concurrency = concurrency or settings.TENANT_MIGRATION_CONCURRENCY
+    engine = create_engine(
+        direct_uri(shard),
+        name=f"tenant-migrations-{shard}",
+        pool_size=concurrency,
+        max_overflow=0,
+    )
+    directory = None
+    if shard != PRIMARY_SHARD:
+        directory = create_engine(
+            direct_uri(PRIMARY_SHARD),
+            name="tenant-migrations-directory",
+            pool_size=1,
+            max_overflow=0,
+        )
+    migrator = TenantMigrator(
+        engine, concurrency=concurrency, shard=shard, directory=directory
+    )
+    try:
+        return await migrator.run(schemas)
+    finally:
+        await engine.dispose()
+        if directory is not None:
+            await directory.dispose()
+
+
+async def migrate_shards(
+    shards: Sequence[str], *, concurrency: Optional[int] = None
+) -> List[MigrationResult]:
+    results: List[MigrationResult] = []
+    for shard in shards:
+        results += await migrate_tenants(concurrency=concurrency, shard=shard)
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--shard", action="append", dest="shards", default=None)
+    parser.add_argument("--schema", action="append", dest="schemas", default=None)
+    args = parser.parse_args(argv)
+    if args.schemas and (not args.shards or len(args.shards) != 1):
+        parser.error("--schema needs the single --shard holding it")
+    logging.basicConfig(level=logging.INFO)
+    if args.schemas:
+        run = migrate_tenants(
+            args.schemas, concurrency=args.concurrency, shard=args.shards[0]
+        )
+    else:
+        run = migrate_shards(args.shards or shard_names(), concurrency=args.concurrency)
+    results = asyncio.run(run)
+    return 1 if any(result.outcome == FAILED for result in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
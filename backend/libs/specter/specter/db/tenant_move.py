@@ -0,0 +1,480 @@
+"""
+Moves a tenant schema to another shard, blocking its writes only for the cutover.
+
+1. The schema is provisioned on the target shard from the template, empty. The
+   source publishes the schema's tables through logical replication; the target
+   subscribes to them, copies their rows, then streams the changes made since.
+2. Cutover: the source tables are locked against writes (reads go on), the target
+   catches up with the source's WAL position, and the sequences are copied. The
+   source tables then refuse writes for good, the lock is released, and
+   `tenant.shard` is flipped: its notification refreshes the tenant caches, and
+   the following requests go to the target.
+3. The subscription, replication slot and publication are dropped, and the source
+   schema too with `--drop-source`.
+
+Both clusters need PostgreSQL 15 or later and `wal_level = logical`. The target
+connects to the source with the source's direct URI (see `direct_uri`), whose
+role must be allowed to replicate; the role of the target's URI must be allowed
+to create subscriptions.
+
+    python -m specter.db.tenant_move --schema NAME --to SHARD [--drop-source]
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, NamedTuple, Optional, Sequence
+
+from prometheus_client import Counter, Histogram
+from specter.db.pool import create_engine
+from specter.db.session import tenant_schema_map
+from specter.db.shards import PRIMARY_SHARD, direct_uri
+from specter.db.tenant_migrations import tenant_schema_version
+from specter.db.tenant_provisioning import TenantProvisioner, tenant_provisioner
+from specter.models import Tenant
+from sqlalchemy import func, select, text, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+MOVED = "moved"
+FAILED = "failed"
+
+# Trigger (and its function) refusing the writes on a moved schema.
+GUARD = "specter_tenant_moved"
+
+TENANT_MOVES = Counter(
+    "specter_tenant_moves_total",
+    "Tenant schemas moved to another shard, by outcome (moved, failed).",
+    ["outcome"],
+)
+TENANT_MOVE_CUTOVER_SECONDS = Histogram(
+    "specter_tenant_move_cutover_seconds",
+    "Time the writes of a tenant were blocked while moving it to another shard.",
+)
+
+
+class MoveResult(NamedTuple):
+    """
+    A completed move: `rows` were copied by the initial sync, and the tenant's
+    writes were blocked for `cutover_seconds`.
+    """
+
+    schema: str
+    source: str
+    target: str
+    rows: int
+    cutover_seconds: float
+
+
+class TenantMover:
+    """
+    Moves tenant schemas between shards through logical replication.
+    """
+
+    def __init__(
+        self,
+        directory: AsyncEngine,
+        source: AsyncEngine,
+        target: AsyncEngine,
+        *,
+        source_uri: str,
+        provisioner: TenantProvisioner = tenant_provisioner,
+        poll_interval: float = 0.2,
+    ):
+        """
+
+        Args:
+            directory: Engine on the primary, holding the `tenant` table.
+            source: Engine on the shard holding the schema; bypassing PgBouncer.
+            target: Engine on the shard the schema moves to; bypassing PgBouncer.
+            source_uri: URL the target's subscription connects to the source with.
+            provisioner: Creates the schema on the target.
+            poll_interval: Seconds between checks of the replication progress.
+        """
+        self.directory = directory
+        self.source = source
+        self.target = target
+        self.source_uri = source_uri
+        self.provisioner = provisioner
+        self.poll_interval = poll_interval
+
+    async def move(
+        self,
+        schema: str,
+        *,
+        source_shard: str,
+        target_shard: str,
+        drop_source: bool = False,
+        sync_timeout: Optional[float] = None,
+        cutover_timeout: float = 10.0,
+    ) -> MoveResult:
+        """
+        Moves a tenant schema; on failure before the cutover completed, the tenant
+        stays on its shard and the copy is dropped.
+
+        Args:
+            schema: Tenant schema name.
+            source_shard: Shard holding the schema (`tenant.shard`).
+            target_shard: Shard to move it to.
+            drop_source: Drop the source schema once moved.
+            sync_timeout: Seconds allowed for the initial copy (no limit by
+                default).
+            cutover_timeout: Seconds the writes may be blocked waiting for the
+                target to catch up; the move is aborted past it.
+
+        Returns:
+            MoveResult: The rows copied and the time writes were blocked.
+
+        Raises:
+            ValueError: if the schema name is not a plain identifier.
+            RuntimeError: if the source schema is not at the latest version.
+            asyncio.TimeoutError: if the copy or the catch-up took too long.
+        """
+        tenant_schema_map(schema)
+        name = f"specter_move_{uuid.uuid4().hex[:16]}"
+        tables = await self._check_source(schema)
+        try:
+            async with self.target.begin() as connection:
+                await self.provisioner.provision(connection, schema, standby=False)
+            await self._replicate(schema, name)
+            await asyncio.wait_for(self._wait_synced(name), sync_timeout)
+            rows = await self._count_rows(schema, tables)
+            cutover_seconds = await self._cutover(
+                schema, tables, name, target_shard, cutover_timeout
+            )
+        except BaseException:
+            TENANT_MOVES.labels(outcome=FAILED).inc()
+            await self._cleanup(name)
+            async with self.target.begin() as connection:
+                await self.provisioner.drop(connection, schema)
+            raise
+        await self._cleanup(name)
+        if drop_source:
+            async with self.source.begin() as connection:
+                await self.provisioner.drop(connection, schema)
+        TENANT_MOVES.labels(outcome=MOVED).inc()
+        logger.info(
+            f"Moved tenant schema {schema} from shard {source_shard} to "
+            f"{target_shard}: {rows} rows, writes blocked {cutover_seconds:.3f}s"
+        )
+        return MoveResult(schema, source_shard, target_shard, rows, cutover_seconds)
+
+    async def _check_source(self, schema: str) -> List[str]:
+        # The target is provisioned at the latest version: the source must match.
+        async with self.source.connect() as connection:
+            version = (
+                await connection.execute(
+                    select(tenant_schema_version.c.version).where(
+                        tenant_schema_version.c.schema == schema
+                    )
+                )
+            ).scalar()
+            tables = await connection.execute(
+                text(
+                    "SELECT tablename FROM pg_tables WHERE schemaname = :schema"
+                    " ORDER BY tablename"
+                ),
+                dict(schema=schema),
+            )
+        if version != self.provisioner.version:
+            raise RuntimeError(
+                f"Tenant schema {schema} is at version {version}, migrate it to "
+                f"{self.provisioner.version} before moving it"
+            )
+        return list(tables.scalars())
+
+    async def _replicate(self, schema: str, name: str) -> None:
+        async with _autocommit(self.source) as connection:
+            await connection.execute(
+                text(f'CREATE PUBLICATION {name} FOR TABLES IN SCHEMA "{schema}"')
+            )
+            # Created here rather than by CREATE SUBSCRIPTION, which would wait
+            # forever when both shards are databases of the same cluster.
+            await connection.execute(
+                text("SELECT pg_create_logical_replication_slot(:name, 'pgoutput')"),
+                dict(name=name),
+            )
+        conninfo = _conninfo(self.source_uri).replace("'", "''")
+        async with _autocommit(self.target) as connection:
+            await connection.execute(
+                text(
+                    f"CREATE SUBSCRIPTION {name} CONNECTION '{conninfo}'"
+                    f" PUBLICATION {name}"
+                    f" WITH (create_slot = false, slot_name = '{name}')"
+                )
+            )
+
+    async def _wait_synced(self, name: str) -> None:
+        while True:
+            async with self.target.connect() as connection:
+                copying = (
+                    await connection.execute(
+                        text(
+                            "SELECT count(*) FROM pg_subscription_rel r"
+                            " JOIN pg_subscription s ON s.oid = r.srsubid"
+                            " WHERE s.subname = :name"
+                            # Ready or synchronized: the initial copy is done.
+                            " AND r.srsubstate NOT IN ('r', 's')"
+                        ),
+                        dict(name=name),
+                    )
+                ).scalar()
+            if not copying:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    async def _wait_flushed(self, name: str, lsn: str) -> None:
+        while True:
+            async with self.source.connect() as connection:
+                flushed = (
+                    await connection.execute(
+                        text(
+                            "SELECT confirmed_flush_lsn >= CAST(CAST(:lsn AS text) AS pg_lsn)"
+                            " FROM pg_replication_slots WHERE slot_name = :name"
+                        ),
+                        dict(name=name, lsn=lsn),
+                    )
+                ).scalar()
+            if flushed:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    async def _count_rows(self, schema: str, tables: List[str]) -> int:
+        async with self.target.connect() as connection:
+            counts = [
+                (
+                    await connection.execute(
+                        text(f'SELECT count(*) FROM "{schema}"."{table}"')
+                    )
+                ).scalar()
+                or 0
+                for table in tables
+            ]
+        return sum(counts)
+
+    async def _cutover(
+        self,
+        schema: str,
+        tables: List[str],
+        name: str,
+        target_shard: str,
+        timeout: float,
+    ) -> float:
+        qualified = ", ".join(f'"{schema}"."{table}"' for table in tables)
+        async with self.source.begin() as connection:
+            await connection.execute(
+                text(f"SET LOCAL lock_timeout = {int(timeout * 1000)}")
+            )
+            start = time.perf_counter()
+            if tables:
+                await connection.execute(
+                    text(f"LOCK TABLE {qualified} IN EXCLUSIVE MODE")
+                )
+            lsn = (
+                await connection.execute(
+                    text("SELECT CAST(pg_current_wal_lsn() AS text)")
+                )
+            ).scalar()
+            await asyncio.wait_for(self._wait_flushed(name, str(lsn)), timeout)
+            await self._copy_sequences(connection, schema)
+            await self._refuse_writes(connection, schema, tables, target_shard)
+        # Writes fail on the source from here: the routing can be flipped safely.
+        try:
+            async with self.directory.begin() as connection:
+                await connection.execute(
+                    update(Tenant)
+                    .where(Tenant.schema == schema)
+                    .values(shard=target_shard, updated_on=func.current_timestamp())
+                )
+        except BaseException:
+            async with self.source.begin() as connection:
+                await connection.exec_driver_sql(
+                    f'DROP FUNCTION "{schema}".{GUARD}() CASCADE'
+                )
+            raise
+        cutover_seconds = time.perf_counter() - start
+        TENANT_MOVE_CUTOVER_SECONDS.observe(cutover_seconds)
+        return cutover_seconds
+
+    async def _copy_sequences(self, source: AsyncConnection, schema: str) -> None:
+        # Logical replication does not carry sequences.
+        sequences = await source.execute(
+            text(
+                "SELECT sequencename, last_value FROM pg_sequences"
+                " WHERE schemaname = :schema AND last_value IS NOT NULL"
+            ),
+            dict(schema=schema),
+        )
+        async with self.target.begin() as connection:
+            for sequence, last_value in sequences.all():
+                await connection.execute(
+                    text("SELECT setval(CAST(:sequence AS regclass), :value)"),
+                    dict(sequence=f'"{schema}"."{sequence}"', value=last_value),
+                )
+
+    @staticmethod
+    async def _refuse_writes(
+        connection: AsyncConnection,
+        schema: str,
+        tables: List[str],
+        target_shard: str,
+    ) -> None:
+        message = f"tenant schema {schema} moved to shard {target_shard}".replace(
+            "'", "''"
+        )
+        await connection.exec_driver_sql(
+            f'CREATE FUNCTION "{schema}".{GUARD}() RETURNS trigger'
+            " LANGUAGE plpgsql AS $$ BEGIN RAISE EXCEPTION"
+            f" '{message}'"
+            " USING ERRCODE = 'read_only_sql_transaction'; END $$"
+        )
+        for table in tables:
+            await connection.exec_driver_sql(
+                f"CREATE TRIGGER {GUARD} BEFORE INSERT OR UPDATE OR DELETE OR"
+                f' TRUNCATE ON "{schema}"."{table}" FOR EACH STATEMENT'
+                f' EXECUTE FUNCTION "{schema}".{GUARD}()'
+            )
+
+    async def _cleanup(self, name: str) -> None:
+        # Detached from its slot first, so that dropping the subscription does not
+        # connect to the source.
+        async with _autocommit(self.target) as connection:
+            exists = (
+                await connection.execute(
+                    text("SELECT 1 FROM pg_subscription WHERE subname = :name"),
+                    dict(name=name),
+                )
+            ).scalar()
+            if exists:
+                await connection.execute(text(f"ALTER SUBSCRIPTION {name} DISABLE"))
+                await connection.execute(
+                    text(f"ALTER SUBSCRIPTION {name} SET (slot_name = NONE)")
+                )
+                await connection.execute(text(f"DROP SUBSCRIPTION {name}"))
+        async with _autocommit(self.source) as connection:
+            await connection.execute(
+                text(
+                    "SELECT pg_drop_replication_slot(slot_name)"
+                    " FROM pg_replication_slots WHERE slot_name = :name"
+                ),
+                dict(name=name),
+            )
+            await connection.execute(text(f"DROP PUBLICATION IF EXISTS {name}"))
+
+
+@asynccontextmanager
+async def _autocommit(engine: AsyncEngine) -> AsyncIterator[AsyncConnection]:
+    # Outside of a transaction block, as replication DDL requires.
+    async with engine.connect() as connection:
+        yield await connection.execution_options(isolation_level="AUTOCOMMIT")
+
+
+def _conninfo(uri: str) -> str:
+    # libpq connection string of a SQLAlchemy URL.
+    url = make_url(uri)
+    parts = dict(
+        host=url.host,
+        port=url.port,
+        dbname=url.database,
+        user=url.username,
+        password=url.password,
+    )
+    return " ".join(
+        f"{key}='{_libpq_quote(str(value))}'"
+        for key, value in parts.items()
+        if value is not None
+    )
+
+
+def _libpq_quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("'", "\\'")
+
+
+async def move_tenant(
+    schema: str,
+    shard: str,
+    *,
+    drop_source: bool = False,
+    sync_timeout: Optional[float] = None,
+    cutover_timeout: float = 10.0,
+) -> MoveResult:
+    """
+    Moves a tenant schema to a shard, through dedicated engines bypassing
+    PgBouncer when direct URIs are set (see `direct_uri`).
+
+    Args:
+        schema: Tenant schema name.
+        shard: Shard to move it to.
+        drop_source: Drop the source schema once moved.
+        sync_timeout: Seconds allowed for the initial copy.
+        cutover_timeout: Seconds the writes may be blocked.
+
+    Returns:
+        MoveResult: The move.
+
+    Raises:
+        ValueError: if the tenant or the shard is unknown, or the tenant is on it.
+    """
+    directory = create_engine(
+        direct_uri(PRIMARY_SHARD), name="tenant-move-directory", pool_size=1
+    )
+    try:
+        async with directory.connect() as connection:
+            source_shard = (
+                await connection.execute(
+                    select(Tenant.shard).where(Tenant.schema == schema)
+                )
+            ).scalar()
+        if source_shard is None:
+            raise ValueError(f"Unknown tenant schema: {schema!r}")
+        if source_shard == shard:
+            raise ValueError(f"Tenant schema {schema} is already on shard {shard}")
+        engines = [
+            create_engine(direct_uri(name), name=f"tenant-move-{name}", pool_size=2)
+            for name in (source_shard, shard)
+        ]
+        mover = TenantMover(directory, *engines, source_uri=direct_uri(source_shard))
+        try:
+            return await mover.move(
+                schema,
+                source_shard=source_shard,
+                target_shard=shard,
+                drop_source=drop_source,
+                sync_timeout=sync_timeout,
+                cutover_timeout=cutover_timeout,
+            )
+        finally:
+            for engine in engines:
+                await engine.dispose()
+    finally:
+        await directory.dispose()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--schema", required=True)
+    parser.add_argument("--to", required=True, dest="shard")
+    parser.add_argument("--drop-source", action="store_true")
+    parser.add_argument("--sync-timeout", type=float, default=None)
+    parser.add_argument("--cutover-timeout", type=float, default=10.0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(
+        move_tenant(
+            args.schema,
+            args.shard,
+            drop_source=args.drop_source,
+            sync_timeout=args.sync_timeout,
+            cutover_timeout=args.cutover_timeout,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
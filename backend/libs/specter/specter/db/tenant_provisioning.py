@@ -0,0 +1,299 @@
+"""
+Creates tenant schemas at sign-up, from a template compiled once per process.
+
+The template is the DDL of `tenant_metadata` (which always describes the latest
+tenant migration), compiled once into a single `DO` block with a placeholder for
+the schema name. Provisioning a schema is one statement, in the caller's
+transaction: create the schema, its tables and indexes, and record it in
+`tenant_schema_version` at the latest version, so the migration runner skips it.
+
+Optionally, `standby` schemas are pre-provisioned under a `standby_` name; sign-up
+then only renames one of them, and a background task creates its replacement.
+"""
+
+import asyncio
+import logging
+import uuid
+from typing import Any, List, Optional, Sequence
+
+from core.config import settings
+from prometheus_client import Counter
+from specter import crud
+from specter.db.base_class import tenant_metadata
+from specter.db.session import engine as primary_engine
+from specter.db.session import shards, tenant_schema_map
+from specter.db.shards import PRIMARY_SHARD
+from specter.db.tenant_migrations import (
+    LOCK_QUERY,
+    MIGRATIONS,
+    TenantMigration,
+    tenant_schema_version,
+)
+from specter.db.uow import uow
+from specter.models import Tenant
+from specter.schemas import TenantCreate
+from sqlalchemy import MetaData, create_mock_engine, delete, func, select, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+logger = logging.getLogger(__name__)
+
+STANDBY_PREFIX = "standby_"
+
+# Stands for the schema name in the compiled template. Schema names are validated by
+# `tenant_schema_map` before being substituted for it.
+SCHEMA_PLACEHOLDER = "specter_tenant_schema_placeholder"
+
+STANDBY = "standby"
+TEMPLATE = "template"
+
+# The dialect compiling the template and quoting schema names.
+dialect = postgresql.dialect()  # type: ignore[no-untyped-call]
+
+TENANT_PROVISIONS = Counter(
+    "specter_tenant_provisions_total",
+    "Tenant schemas provisioned, by source (standby, template).",
+    ["source"],
+)
+
+
+def compile_template(metadata: MetaData, version: int) -> str:
+    """
+    Compiles the DDL creating `metadata` (types, tables and indexes, in dependency
+    order) into a single statement, with `SCHEMA_PLACEHOLDER` as the schema.
+
+    Args:
+        metadata: Tables of the tenant schema.
+        version: Version recorded in `tenant_schema_version`.
+
+    Returns:
+        The `DO` block.
+    """
+    statements: List[str] = [f"CREATE SCHEMA {SCHEMA_PLACEHOLDER}"]
+
+    def collect(ddl: Any, *args: Any, **kwargs: Any) -> None:
+        compiled = ddl.compile(
+            dialect=dialect,
+            schema_translate_map={metadata.schema: SCHEMA_PLACEHOLDER},
+            render_schema_translate=True,
+        )
+        statements.append(str(compiled).strip())
+
+    metadata.create_all(
+        create_mock_engine("postgresql+asyncpg://", collect), checkfirst=False
+    )
+    statements.append(
+        f"INSERT INTO {tenant_schema_version.name} (schema, version)"
+        f" VALUES ('{SCHEMA_PLACEHOLDER}', {int(version)})"
+    )
+    body = ";\n".join(statements)
+    return f"DO $specter_ddl$\nBEGIN\n{body};\nEND\n$specter_ddl$"
+
+
+class TenantProvisioner:
+    """
+    Provisions tenant schemas from the compiled template, or from a standby schema.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        migrations: Sequence[TenantMigration] = MIGRATIONS,
+        *,
+        standby: int = 0,
+    ):
+        """
+
+        Args:
+            engine: Engine on the primary, used to replenish the standby schemas.
+            migrations: Tenant migrations; provisioned schemas are recorded at the
+                latest version.
+            standby: Number of standby schemas to keep ready (0 disables them).
+        """
+        self.engine = engine
+        self.version = max((migration.version for migration in migrations), default=0)
+        self.standby = standby
+        self._template: Optional[str] = None
+        self._replenish_task: Optional["asyncio.Task[int]"] = None
+
+    def template(self) -> str:
+        if self._template is None:
+            self._template = compile_template(tenant_metadata, self.version)
+        return self._template
+
+    async def start(self) -> None:
+        """
+        Compiles the template and starts creating the standby schemas. Called from
+        the service lifespan.
+        """
+        self.template()
+        self.schedule_replenish()
+
+    async def close(self) -> None:
+        """
+        Waits for the standby schemas being created.
+        """
+        if self._replenish_task is not None:
+            await asyncio.gather(self._replenish_task, return_exceptions=True)
+
+    async def provision(
+        self, connection: AsyncConnection, schema: str, *, standby: bool = True
+    ) -> str:
+        """
+        Creates a tenant schema, in the transaction of `connection`.
+
+        Args:
+            connection: Connection in the transaction creating the tenant.
+            schema: Tenant schema name.
+            standby: Claim a standby schema if one is ready; they live on the
+                primary shard only.
+
+        Returns:
+            Where the schema came from: standby or template.
+
+        Raises:
+            ValueError: if the schema name is not a plain identifier.
+        """
+        tenant_schema_map(schema)
+        source = TEMPLATE
+        if standby and self.standby and await self._claim_standby(connection, schema):
+            source = STANDBY
+            self.schedule_replenish()
+        else:
+            await connection.exec_driver_sql(self._render(schema))
+        TENANT_PROVISIONS.labels(source=source).inc()
+        return source
+
+    async def drop(self, connection: AsyncConnection, schema: str) -> None:
+        """
+        Drops a tenant schema and its version, in the transaction of `connection`.
+        """
+        tenant_schema_map(schema)
+        await connection.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+        await connection.execute(
+            delete(tenant_schema_version).where(
+                tenant_schema_version.c.schema == schema
+            )
+        )
+
+    def schedule_replenish(self) -> None:
+        """
+        Starts creating the missing standby schemas, unless already in progress.
+        """
+        if not self.standby:
+            return
+        if self._replenish_task is None or self._replenish_task.done():
+            self._replenish_task = asyncio.create_task(self._replenish())
+
+    async def replenish(self) -> int:
+        """
+        Drops the standby schemas behind the latest version, and creates the missing
+        ones. Skipped if another process is replenishing.
+
+        Returns:
+            Number of standby schemas created.
+        """
+        async with self.engine.begin() as connection:
+            lock = await connection.execute(LOCK_QUERY, dict(schema=STANDBY_PREFIX))
+            if not lock.scalar():
+                return 0
+            rows = await connection.execute(
+                select(tenant_schema_version.c.schema, tenant_schema_version.c.version)
+                .where(self._is_standby())
+                .with_for_update(skip_locked=True)
+            )
+            ready = 0
+            for schema, version in rows.all():
+                if version == self.version:
+                    ready += 1
+                    continue
+                await self.drop(connection, schema)
+            created = max(self.standby - ready, 0)
+            for _ in range(created):
+                schema = f"{STANDBY_PREFIX}{uuid.uuid4().hex}"
+                await connection.exec_driver_sql(self._render(schema))
+        return created
+
+    async def _replenish(self) -> int:
+        try:
+            return await self.replenish()
+        except Exception:
+            logger.exception("Replenishing the standby tenant schemas failed")
+            return 0
+
+    async def _claim_standby(self, connection: AsyncConnection, schema: str) -> bool:
+        # Row locks with SKIP LOCKED: concurrent sign-ups claim distinct schemas.
+        standby = (
+            await connection.execute(
+                select(tenant_schema_version.c.schema)
+                .where(
+                    self._is_standby(), tenant_schema_version.c.version == self.version
+                )
+                .order_by(tenant_schema_version.c.updated_on)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+        ).scalar()
+        if standby is None:
+            return False
+        await connection.execute(text(f'ALTER SCHEMA "{standby}" RENAME TO "{schema}"'))
+        await connection.execute(
+            update(tenant_schema_version)
+            .where(tenant_schema_version.c.schema == standby)
+            .values(schema=schema, updated_on=func.current_timestamp())
+        )
+        return True
+
+    def _render(self, schema: str) -> str:
+        identifier = dialect.identifier_preparer.quote_schema(schema)
+        return (
+            self.template()
+            .replace(f"'{SCHEMA_PLACEHOLDER}'", f"'{schema}'")
+            .replace(SCHEMA_PLACEHOLDER, identifier)
+        )
+
+    @staticmethod
+    def _is_standby() -> Any:
+        return tenant_schema_version.c.schema.startswith(
+            STANDBY_PREFIX, autoescape=True
+        )
+
+
+tenant_provisioner = TenantProvisioner(
+    primary_engine, standby=settings.TENANT_STANDBY_SCHEMAS
+)
+
+
+async def create_tenant(db: AsyncSession, *, obj_in: TenantCreate) -> Tenant:
+    """
+    Creates a tenant and its schema, in one transaction when the tenant's shard is
+    the primary.
+
+    On another shard, the schema is created first, in a transaction of its own,
+    and dropped again if the tenant cannot be registered.
+
+    Args:
+        db: Session on the primary.
+        obj_in: The tenant.
+
+    Returns:
+        Tenant: The created tenant, ready to serve requests.
+    """
+    if obj_in.shard == PRIMARY_SHARD:
+        async with uow(db):
+            await tenant_provisioner.provision(
+                await db.connection(), obj_in.schema_name
+            )
+            return await crud.tenant.create(db, obj_in=obj_in)
+
+    shard_engine = shards.engine(obj_in.shard)
+    async with shard_engine.begin() as connection:
+        await tenant_provisioner.provision(
+            connection, obj_in.schema_name, standby=False
+        )
+    try:
+        return await crud.tenant.create(db, obj_in=obj_in)
+    except Exception:
+        async with shard_engine.begin() as connection:
+            await tenant_provisioner.drop(connection, obj_in.schema_name)
+        raise
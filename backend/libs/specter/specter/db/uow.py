@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import random
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from prometheus_client import Counter
+from sqlalchemy.engine.interfaces import IsolationLevel
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Key of the unit-of-work flag in `AsyncSession.info`.
+UNIT_OF_WORK = "specter.unit_of_work"
+
+# serialization_failure and deadlock_detected: the transaction did nothing wrong and
+# succeeds when run again.
+RETRYABLE_SQLSTATES = frozenset({"40001", "40P01"})
+
+UOW_RETRIES = Counter(
+    "specter_uow_retries_total",
+    "Units of work rolled back and retried, by SQLSTATE.",
+    ["sqlstate"],
+)
+
+
+def in_unit_of_work(db: AsyncSession) -> bool:
+    return bool(db.info.get(UNIT_OF_WORK))
+
+
+async def commit(db: AsyncSession) -> None:
+    """
+    Ends a CRUD write: commits, or only flushes inside a unit of work, leaving the
+    commit to the end of the unit.
+    """
+    if in_unit_of_work(db):
+        await db.flush()
+    else:
+        await db.commit()
+
+
+@asynccontextmanager
+async def uow(
+    db: AsyncSession,
+    *,
+    savepoint: bool = False,
+    isolation_level: Optional[IsolationLevel] = None,
+) -> AsyncIterator[AsyncSession]:
+    """
+    Groups CRUD operations into one transaction: inside the block they only flush,
+    and the transaction is committed once on exit, or rolled back on error.
+
+    Nested blocks join the outer unit; with `savepoint=True` they run in a
+    SAVEPOINT instead, so that their failure can be caught without aborting the
+    outer unit.
+
+    Args:
+        db: The session.
+        savepoint: Run a nested block in a savepoint.
+        isolation_level: Isolation level of the transaction (e.g. SERIALIZABLE);
+            only honoured by the outermost block, before any statement ran.
+
+    Returns:
+        The session.
+    """
+    if in_unit_of_work(db):
+        if savepoint:
+            async with db.begin_nested():
+                yield db
+        else:
+            yield db
+        return
+
+    if isolation_level is not None:
+        await db.connection(execution_options={"isolation_level": isolation_level})
+    db.info[UNIT_OF_WORK] = True
+    try:
+        yield db
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        db.info.pop(UNIT_OF_WORK, None)
+
+
+def sqlstate(error: DBAPIError) -> Optional[str]:
+    return getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+
+
+async def run_in_uow(
+    db: AsyncSession,
+    work: Callable[[AsyncSession], Awaitable[T]],
+    *,
+    attempts: int = 3,
+    backoff: float = 0.05,
+    isolation_level: Optional[IsolationLevel] = None,
+) -> T:
+    """
+    Runs `work` in a unit of work, running it again from scratch when the
+    transaction fails with a serialization failure or a deadlock.
+
+    `work` may run several times, so it must not have side effects outside the
+    database (send emails after this returns).
+
+    Args:
+        db: The session.
+        work: Coroutine function performing the CRUD operations.
+        attempts: Maximum number of runs.
+        backoff: Base delay before a retry, doubled on each attempt and jittered.
+        isolation_level: Isolation level of the transaction (e.g. SERIALIZABLE).
+
+    Returns:
+        What `work` returned.
+    """
+    for attempt in range(1, attempts):
+        try:
+            async with uow(db, isolation_level=isolation_level):
+                return await work(db)
+        except DBAPIError as e:
+            code = sqlstate(e)
+            if code not in RETRYABLE_SQLSTATES:
+                raise
+            UOW_RETRIES.labels(sqlstate=code).inc()
+            logger.info(f"Retrying unit of work after SQLSTATE {code} ({attempt})")
+            await asyncio.sleep(
+                backoff * 2 ** (attempt - 1) * random.random()
+            )  # nosec B311
+    async with uow(db, isolation_level=isolation_level):
+        return await work(db)
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+WRITE_BEHIND_PENDING = Gauge(
+    "specter_write_behind_pending",
+    "Coalesced entries waiting to be flushed, per write-behind buffer.",
+    ["buffer"],
+)
+WRITE_BEHIND_FLUSHED = Counter(
+    "specter_write_behind_flushed_total",
+    "Entries written by write-behind flushes, per buffer and outcome.",
+    ["buffer", "outcome"],
+)
+WRITE_BEHIND_DROPPED = Counter(
+    "specter_write_behind_dropped_total",
+    "Updates dropped because the buffer was full, per buffer.",
+    ["buffer"],
+)
+WRITE_BEHIND_FLUSH_SECONDS = Histogram(
+    "specter_write_behind_flush_seconds",
+    "Duration of write-behind flushes, per buffer.",
+    ["buffer"],
+)
+
+
+class WriteBehindBuffer(Generic[K, V]):
+    """
+    Collects keyed updates in memory and writes them in batches off the request path.
+
+    Updates for the same key are coalesced with `merge` (by default the greater value
+    wins, which suits timestamps), and the batch is handed to `flush` every `interval`
+    seconds, as soon as `max_pending` distinct keys are waiting, and on `close()`.
+
+    After a failed flush, early flushes are suspended until a flush succeeds: the
+    batch is retried every `interval` seconds, and updates of new keys are dropped
+    once `max_size` keys are waiting, so an unavailable database costs neither a
+    retry per update nor unbounded memory.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[Dict[K, V]], Awaitable[Any]],
+        *,
+        interval: float,
+        max_pending: int,
+        name: str,
+        max_size: Optional[int] = None,
+        merge: Callable[[V, V], V] = max,  # type: ignore[assignment]
+    ):
+        """
+
+        Args:
+            flush: Coroutine persisting a batch of coalesced updates.
+            interval: Seconds between periodic flushes.
+            max_pending: Number of distinct pending keys that triggers an early flush.
+            name: Buffer name used as the metrics label.
+            max_size: Number of distinct pending keys past which updates of new keys
+                are dropped; defaults to 10 times `max_pending`.
+            merge: Combines a pending value with a newer one for the same key.
+        """
+        self._flush = flush
+        self.interval = interval
+        self.max_pending = max_pending
+        self.name = name
+        self.max_size = max_pending * 10 if max_size is None else max_size
+        self._merge = merge
+        self._pending: Dict[K, V] = {}
+        # Set by a failed flush: retry on the periodic schedule only.
+        self._failing = False
+        self._wakeup = asyncio.Event()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._flush_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(self, key: K, value: V) -> None:
+        """
+        Queues an update. Never blocks and never touches the database.
+        """
+        current = self._pending.get(key)
+        if current is None and len(self._pending) >= self.max_size:
+            WRITE_BEHIND_DROPPED.labels(buffer=self.name).inc()
+            return
+        self._pending[key] = value if current is None else self._merge(current, value)
+        WRITE_BEHIND_PENDING.labels(buffer=self.name).set(len(self._pending))
+        if len(self._pending) >= self.max_pending and not self._failing:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """
+        Starts the background flush loop. Called from the service lifespan.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """
+        Stops the flush loop and writes whatever is still pending.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Writes all pending updates as one batch.
+
+        On failure the batch is merged back into the pending updates, up to
+        `max_size` keys, so it is retried with the next periodic flush.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            WRITE_BEHIND_PENDING.labels(buffer=self.name).set(0)
+            try:
+                with WRITE_BEHIND_FLUSH_SECONDS.labels(buffer=self.name).time():
+                    await self._flush(batch)
+            except Exception as e:
+                logger.warning(f"Write-behind flush of {self.name} failed: {str(e)}")
+                WRITE_BEHIND_FLUSHED.labels(buffer=self.name, outcome="error").inc(
+                    len(batch)
+                )
+                self._failing = True
+                self._wakeup.clear()
+                for key, value in batch.items():
+                    current = self._pending.get(key)
+                    if current is None and len(self._pending) >= self.max_size:
+                        WRITE_BEHIND_DROPPED.labels(buffer=self.name).inc()
+                        continue
+                    self._pending[key] = (
+                        value if current is None else self._merge(value, current)
+                    )
+                WRITE_BEHIND_PENDING.labels(buffer=self.name).set(len(self._pending))
+            else:
+                self._failing = False
+                WRITE_BEHIND_FLUSHED.labels(buffer=self.name, outcome="ok").inc(
+                    len(batch)
+                )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
@@ -0,0 +1,25 @@
+from specter.db.instrumentation import RequestStats, current_request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Counts the SQL statements issued while serving each HTTP request, and warns
+    about requests repeating one statement (likely N+1 queries). Pure ASGI, so the
+    response body is not buffered.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request.reset(token)
+            stats.finish()
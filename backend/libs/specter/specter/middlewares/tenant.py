@@ -0,0 +1,79 @@
+import functools
+import json
+from typing import Optional, Sequence, Tuple
+
+from specter.db.session import TENANT_STATE
+from specter.db.session import tenant_cache as default_tenant_cache
+from specter.db.session import tenant_host
+from specter.db.tenant_cache import TenantCache
+from specter.utils import TenantNotFoundError
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class TenantMiddleware:
+    """
+    Resolves the tenant of each HTTP request once, before routing, and stores it in
+    the request state, where `get_tenant` reads it.
+
+    Hosts are resolved through the tenant cache, unknown hosts included: a
+    request's overhead is a dictionary lookup. A request for an unknown or
+    inactive tenant is answered 404 without reaching the app. Pure ASGI, so the
+    response body is not buffered.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        exclude: Sequence[str] = ("/health",),
+        tenant_cache: Optional[TenantCache] = None,
+    ):
+        """
+
+        Args:
+            app: The application.
+            exclude: Paths served without a tenant, with the paths below them.
+            tenant_cache: Resolves the hosts (`specter.db.session.tenant_cache` by
+                default).
+        """
+        self.app = app
+        self.tenant_cache = (
+            default_tenant_cache if tenant_cache is None else tenant_cache
+        )
+        self._excluded = frozenset(exclude)
+        self._excluded_prefixes = tuple(f"{path.rstrip('/')}/" for path in exclude)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._is_excluded(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        host = tenant_host(scope)
+        tenant = await self.tenant_cache.get(host)
+        if tenant is None or not tenant.is_active:
+            await _not_found(host, send)
+            return
+        scope.setdefault("state", {})[TENANT_STATE] = tenant
+        await self.app(scope, receive, send)
+
+    def _is_excluded(self, path: str) -> bool:
+        return path in self._excluded or path.startswith(self._excluded_prefixes)
+
+
+async def _not_found(host: str, send: Send) -> None:
+    headers, body = _not_found_response(host)
+    await send({"type": "http.response.start", "status": 404, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+@functools.lru_cache(maxsize=1024)
+def _not_found_response(host: str) -> Tuple[Tuple[Tuple[bytes, bytes], ...], bytes]:
+    # The response of the TenantNotFoundError handler (`apiutil.exception_handler`).
+    detail = TenantNotFoundError(host=host).message
+    body = json.dumps(
+        {"detail": detail}, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    headers = (
+        (b"content-length", str(len(body)).encode("latin-1")),
+        (b"content-type", b"application/json"),
+    )
+    return headers, body
@@ -1 +1 @@
-from .shared import AccountUser, Tenant
+from .shared import AccountUser, RefreshToken, Tenant
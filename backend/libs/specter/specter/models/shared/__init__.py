@@ -1,2 +1,3 @@
 from .account_user import AccountUser
+from .refresh_token import RefreshToken
 from .tenant import Tenant
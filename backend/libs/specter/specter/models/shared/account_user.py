@@ -87,11 +87,18 @@ class AccountUser(Base):  # type: ignore
     )
 
     # Relationships
+    # lazy="raise": load explicitly (e.g. crud.account_user.get_with_tenants), an
+    # implicit lazy load would be a hidden query per row and fails under AsyncSession.
     tenants = relationship(
         "Tenant",
         back_populates="owner",
         cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
         doc="Tenants owned by this user.",
     )
 
-    __table_args__ = (Index("ix_accountuser_is_active", "is_active"),)
+    __table_args__ = (
+        Index("ix_accountuser_is_active", "is_active"),
+        Index("ix_account_user_created_on_id", "created_on", "id"),
+    )
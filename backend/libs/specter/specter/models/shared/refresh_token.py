@@ -0,0 +1,69 @@
+from specter.db.base_class import Base
+from sqlalchemy import TIMESTAMP, Column, ForeignKey, String, func
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class RefreshToken(Base):  # type: ignore
+    """
+    SQLAlchemy model representing an opaque refresh token issued to a user.
+
+    Only the SHA-256 digest of the token is stored. Tokens that replace one another
+    on rotation share a `family_id`, so that replaying an already rotated token can
+    revoke the whole chain.
+
+    Attributes:
+        id (UUID): Primary key, generated by the database.
+        created_on (datetime): Timestamp when the token was issued.
+        token_hash (str): Hex SHA-256 digest of the token.
+        family_id (UUID): Identifier shared by a chain of rotated tokens.
+        account_user_id (UUID): Foreign key referencing the AccountUser.
+        expires_on (datetime): Timestamp after which the token is rejected.
+        used_on (datetime): Timestamp when the token was rotated, if it was.
+        revoked_on (datetime): Timestamp when the token was revoked, if it was.
+    """
+
+    __tablename__ = "refresh_token"
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        server_default=func.gen_random_uuid(),
+        doc="Primary key, generated as a random UUID by the database.",
+    )
+    created_on = Column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        server_default=func.current_timestamp(),
+        doc="Timestamp when the token was issued.",
+    )
+    token_hash = Column(
+        String(64),
+        unique=True,
+        nullable=False,
+        doc="Hex SHA-256 digest of the token.",
+    )
+    family_id = Column(
+        UUID(as_uuid=True),
+        nullable=False,
+        index=True,
+        server_default=func.gen_random_uuid(),
+        doc="Identifier shared by a chain of rotated tokens.",
+    )
+    account_user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("account_user.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        doc="Foreign key referencing the AccountUser.",
+    )
+    expires_on = Column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        doc="Timestamp after which the token is rejected.",
+    )
+    used_on = Column(
+        TIMESTAMP(timezone=True), doc="Timestamp when the token was rotated."
+    )
+    revoked_on = Column(
+        TIMESTAMP(timezone=True), doc="Timestamp when the token was revoked."
+    )
@@ -19,6 +19,7 @@ class Tenant(Base):  # type: ignore
         name (str): Name of the tenant.
         host (str): Hostname/domain associated with the tenant.
         schema (str): Database schema associated with the tenant.
+        shard (str): Database cluster holding the schema (see specter.db.shards).
         owner_id (UUID): Foreign key referencing the owning AccountUser.
         is_active (bool): Indicates if the tenant is active.
         updated_on (datetime): Timestamp when the tenant was last updated.
@@ -53,6 +54,13 @@ class Tenant(Base):  # type: ignore
         nullable=False,
         doc="Database schema for the tenant.",
     )
+    shard = Column(
+        String(64),
+        nullable=False,
+        server_default="primary",
+        index=True,
+        doc="Database cluster holding the tenant's schema.",
+    )
     owner_id = Column(
         UUID(as_uuid=True),
         ForeignKey("account_user.id", ondelete="CASCADE"),
@@ -76,8 +84,15 @@ class Tenant(Base):  # type: ignore
     )
 
     # Relationships
+    # lazy="raise": load explicitly (e.g. crud.tenant.list_tenants_with_owners).
     owner = relationship(
-        "AccountUser", back_populates="tenants", doc="The user who owns this tenant."
+        "AccountUser",
+        back_populates="tenants",
+        lazy="raise",
+        doc="The user who owns this tenant.",
     )
 
-    __table_args__ = (Index("ix_tenant_owner_is_active", "owner_id", "is_active"),)
+    __table_args__ = (
+        Index("ix_tenant_owner_is_active", "owner_id", "is_active"),
+        Index("ix_tenant_created_on_id", "created_on", "id"),
+    )
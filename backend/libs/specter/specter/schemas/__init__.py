@@ -11,6 +11,9 @@ from .shared import (
     AccountUser,
     AccountUserCreate,
     AccountUserUpdate,
+    RefreshToken,
+    RefreshTokenCreate,
+    RefreshTokenUpdate,
     Tenant,
     TenantCreate,
     TenantUpdate,
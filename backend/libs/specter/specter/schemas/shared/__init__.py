@@ -1,2 +1,3 @@
 from .account_user import AccountUser, AccountUserCreate, AccountUserUpdate
+from .refresh_token import RefreshToken, RefreshTokenCreate, RefreshTokenUpdate
 from .tenant import Tenant, TenantCreate, TenantUpdate
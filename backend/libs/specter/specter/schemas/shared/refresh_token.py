@@ -0,0 +1,36 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class RefreshTokenBase(BaseModel):
+    token_hash: Optional[str] = None
+    family_id: Optional[uuid.UUID] = None
+    account_user_id: Optional[uuid.UUID] = None
+    expires_on: Optional[datetime] = None
+
+
+class RefreshTokenCreate(RefreshTokenBase):
+    token_hash: str
+    account_user_id: uuid.UUID
+    expires_on: datetime
+
+
+class RefreshTokenUpdate(RefreshTokenBase):
+    pass
+
+
+class RefreshTokenInDBBase(RefreshTokenBase):
+    id: uuid.UUID
+    created_on: datetime
+    used_on: Optional[datetime] = None
+    revoked_on: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class RefreshToken(RefreshTokenInDBBase):
+    pass
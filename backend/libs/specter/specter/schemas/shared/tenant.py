@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class TenantBase(BaseModel):
@@ -9,7 +9,14 @@ class TenantBase(BaseModel):
 
 
 class TenantCreate(TenantBase):
-    pass
+    # `schema` would shadow BaseModel.schema; serialized by alias to the column.
+    model_config = ConfigDict(populate_by_name=True)
+
+    name: str
+    host: str
+    schema_name: str = Field(alias="schema")
+    owner_id: uuid.UUID
+    shard: str = "primary"
 
 
 class TenantUpdate(TenantBase):
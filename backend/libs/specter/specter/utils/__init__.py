@@ -1,2 +1,7 @@
 from .description import describe_service
-from .exceptions import TenantNotFoundError
+from .exceptions import (
+    ConcurrentUpdateError,
+    InvalidCursorError,
+    InvalidTokenError,
+    TenantNotFoundError,
+)
@@ -1,3 +1,6 @@
+from typing import Any
+
+
 class TenantNotFoundError(Exception):
     def __init__(self, host: str):
         """
@@ -7,3 +10,37 @@ class TenantNotFoundError(Exception):
         """
         self.message = f"Tenant not found for host: {host}"
         super().__init__(self.message)
+
+
+class InvalidTokenError(Exception):
+    def __init__(self, reason: str):
+        """
+
+        Args:
+            reason:
+        """
+        self.message = f"Invalid access token: {reason}"
+        super().__init__(self.message)
+
+
+class InvalidCursorError(Exception):
+    def __init__(self, cursor: str):
+        """
+
+        Args:
+            cursor:
+        """
+        self.message = f"Invalid pagination cursor: {cursor}"
+        super().__init__(self.message)
+
+
+class ConcurrentUpdateError(Exception):
+    def __init__(self, model: str, id: Any):
+        """
+
+        Args:
+            model: Table name of the row.
+            id: Primary key of the row.
+        """
+        self.message = f"{model} {id} was modified concurrently, reload and retry"
+        super().__init__(self.message)
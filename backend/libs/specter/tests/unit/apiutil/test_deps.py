@@ -0,0 +1,140 @@
+import time
+import uuid
+from typing import Any, Dict, Iterator, Optional
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from specter.apiutil import deps
+from specter.apiutil.security import ExpiringLRU, Principal, token_cache
+from specter.crud.shared.crud_account_user import AccountStatus
+from specter.utils import InvalidTokenError
+
+
+@pytest.fixture(autouse=True)
+def clear_caches() -> Iterator[None]:
+    token_cache.clear()
+    deps.status_cache.clear()
+    yield
+    token_cache.clear()
+    deps.status_cache.clear()
+
+
+def bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def claims(user_id: uuid.UUID, expires_in: float = 60) -> Dict[str, Any]:
+    return {
+        "sub": str(user_id),
+        "exp": time.time() + expires_in,
+        "claims": {"name": "Jane Doe", "email": "jane@example.com"},
+    }
+
+
+def principal(user_id: uuid.UUID) -> Principal:
+    return Principal(
+        id=user_id, name="Jane Doe", email=None, expires_at=time.time() + 60
+    )
+
+
+@pytest.mark.asyncio
+@patch("specter.apiutil.security.jwks_client.verify", new_callable=AsyncMock)
+async def test_token_is_verified_once(mock_verify: AsyncMock) -> None:
+    """
+    Test that repeated requests with the same token are served from the cache.
+    """
+    user_id = uuid.uuid4()
+    mock_verify.return_value = claims(user_id)
+
+    for _ in range(3):
+        result = await deps.get_current_principal(bearer("token-a"))
+
+    assert result.id == user_id
+    assert result.email == "jane@example.com"
+    mock_verify.assert_awaited_once_with("token-a")
+
+
+@pytest.mark.asyncio
+@patch("specter.apiutil.security.jwks_client.verify", new_callable=AsyncMock)
+async def test_cached_token_expires_with_the_token(mock_verify: AsyncMock) -> None:
+    """
+    Test that a cached principal is not served past the token's expiry.
+    """
+    mock_verify.return_value = claims(uuid.uuid4(), expires_in=-1)
+
+    await deps.get_current_principal(bearer("token-a"))
+    await deps.get_current_principal(bearer("token-a"))
+
+    assert mock_verify.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_token_is_rejected() -> None:
+    """
+    Test that a request without a bearer token is rejected.
+    """
+    with pytest.raises(InvalidTokenError):
+        await deps.get_current_principal(None)
+
+
+@pytest.mark.asyncio
+@patch("specter.apiutil.deps.with_read_db")
+@patch("specter.crud.account_user.get_status", new_callable=AsyncMock)
+async def test_status_is_loaded_once_per_ttl(
+    mock_get_status: AsyncMock, mock_with_db: MagicMock
+) -> None:
+    """
+    Test that the active flag and tenants are resolved through the status cache.
+    """
+    user_id, tenant_id = uuid.uuid4(), uuid.uuid4()
+    mock_get_status.return_value = AccountStatus(
+        is_active=True, tenant_ids=frozenset({tenant_id})
+    )
+
+    for _ in range(3):
+        result = await deps.get_active_principal(principal(user_id))
+
+    assert result.tenant_ids == frozenset({tenant_id})
+    mock_get_status.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch("specter.apiutil.deps.with_read_db")
+@patch(
+    "specter.crud.account_user.get_status", new_callable=AsyncMock, return_value=None
+)
+@pytest.mark.parametrize(
+    "status", [AccountStatus(is_active=False, tenant_ids=frozenset()), None]
+)
+async def test_inactive_or_deleted_account_is_forbidden(
+    mock_get_status: AsyncMock,
+    mock_with_db: MagicMock,
+    status: Optional[AccountStatus],
+) -> None:
+    """
+    Test that inactive and deleted accounts are rejected with 403.
+    """
+    mock_get_status.return_value = status
+
+    with pytest.raises(HTTPException) as exc_info:
+        await deps.get_active_principal(principal(uuid.uuid4()))
+
+    assert exc_info.value.status_code == 403
+
+
+def test_expiring_lru_evicts_least_recently_used() -> None:
+    """
+    Test that the cache is bounded, keeping recently read entries.
+    """
+    cache: ExpiringLRU[str, int] = ExpiringLRU(2, name="test")
+    expires_at = time.time() + 60
+    cache.set("a", 1, expires_at=expires_at)
+    cache.set("b", 2, expires_at=expires_at)
+    cache.get("a")
+    cache.set("c", 3, expires_at=expires_at)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert len(cache) == 2
@@ -0,0 +1,137 @@
+import time
+from typing import Any, Dict, List, Tuple
+
+import pytest
+import rsa
+from jose import jwk, jwt
+from specter.apiutil.security import JWKSClient
+from specter.utils import InvalidTokenError
+
+
+@pytest.fixture(scope="module")
+def signing_key() -> Tuple[str, Dict[str, Any]]:
+    """
+    Provides a private key (PEM) and its public JWK. A small key keeps the test fast.
+    """
+    _public, private = rsa.newkeys(1024)
+    pem = private.save_pkcs1().decode("ascii")
+    public = jwk.construct(pem, algorithm="RS256").public_key().to_dict()
+    return pem, {**public, "kid": "key-1", "use": "sig"}
+
+
+def make_client(
+    document: Dict[str, Any], min_refresh_interval: float = 30
+) -> Tuple[JWKSClient, List[str]]:
+    fetched: List[str] = []
+
+    def fetch(url: str, timeout: float) -> Dict[str, Any]:
+        fetched.append(url)
+        return document
+
+    client = JWKSClient(
+        "http://identity/jwks.json",
+        ttl=300,
+        min_refresh_interval=min_refresh_interval,
+        timeout=1,
+        fetch=fetch,
+    )
+    return client, fetched
+
+
+def make_token(pem: str, kid: str, **claims: Any) -> str:
+    payload = {"sub": "user-1", "aud": "account", "exp": int(time.time()) + 60}
+    payload.update(claims)
+    return str(jwt.encode(payload, pem, algorithm="RS256", headers={"kid": kid}))
+
+
+@pytest.mark.asyncio
+async def test_verify_fetches_key_set_once(
+    signing_key: Tuple[str, Dict[str, Any]],
+) -> None:
+    """
+    Test that tokens are verified locally after a single key set fetch.
+    """
+    pem, public = signing_key
+    client, fetched = make_client({"keys": [public]})
+
+    for _ in range(3):
+        claims = await client.verify(make_token(pem, "key-1"))
+
+    assert claims["sub"] == "user-1"
+    assert len(fetched) == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_refreshes_at_most_once_per_interval(
+    signing_key: Tuple[str, Dict[str, Any]],
+) -> None:
+    """
+    Test that unknown key IDs trigger a refresh, but cannot trigger a fetch storm.
+    """
+    pem, public = signing_key
+    client, fetched = make_client({"keys": [public]})
+    await client.start()
+
+    for _ in range(3):
+        with pytest.raises(InvalidTokenError):
+            await client.verify(make_token(pem, "forged-kid"))
+
+    assert len(fetched) == 1
+
+
+@pytest.mark.asyncio
+async def test_rotated_key_is_picked_up_on_demand(
+    signing_key: Tuple[str, Dict[str, Any]],
+) -> None:
+    """
+    Test that a token signed with a newly published key triggers a refresh.
+    """
+    pem, public = signing_key
+    document: Dict[str, Any] = {"keys": []}
+    client, fetched = make_client(document, min_refresh_interval=0)
+    await client.start()
+    document["keys"] = [public]
+
+    claims = await client.verify(make_token(pem, "key-1"))
+
+    assert claims["sub"] == "user-1"
+    assert len(fetched) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "claims, reason",
+    [
+        ({"exp": int(time.time()) - 60}, "token expired"),
+        ({"aud": "other"}, "Invalid audience"),
+    ],
+)
+async def test_rejects_expired_and_foreign_tokens(
+    signing_key: Tuple[str, Dict[str, Any]], claims: Dict[str, Any], reason: str
+) -> None:
+    """
+    Test that expiry and audience are enforced.
+    """
+    pem, public = signing_key
+    client, _fetched = make_client({"keys": [public]})
+
+    with pytest.raises(InvalidTokenError) as exc_info:
+        await client.verify(make_token(pem, "key-1", **claims))
+
+    assert reason in exc_info.value.message
+
+
+@pytest.mark.asyncio
+async def test_rejects_tampered_token(
+    signing_key: Tuple[str, Dict[str, Any]],
+) -> None:
+    """
+    Test that a token whose signature does not match is rejected.
+    """
+    pem, public = signing_key
+    client, _fetched = make_client({"keys": [public]})
+    header, payload, signature = make_token(pem, "key-1").split(".")
+    forged = make_token(pem, "key-1", sub="admin").split(".")[1]
+
+    with pytest.raises(InvalidTokenError):
+        await client.verify(".".join([header, forged, signature]))
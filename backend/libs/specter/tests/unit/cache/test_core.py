@@ -0,0 +1,204 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import pytest
+from specter.cache.core import Cache
+from specter.cache.tiers import Entry, MemoryTier, RedisTier
+
+
+def memory_cache(**kwargs: Any) -> Cache:
+    return Cache([MemoryTier(100, max_ttl=60)], namespace="test", **kwargs)
+
+
+class Loader:
+    def __init__(self, value: Any = "value", delay: float = 0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self) -> Any:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_are_coalesced_into_one_load() -> None:
+    """
+    Test that concurrent lookups of a missing key share a single load.
+    """
+    cache = memory_cache(ttl=60)
+    loader = Loader(delay=0.01)
+
+    values = await asyncio.gather(
+        *(cache.get_or_load("t_a", "k", loader) for _ in range(10))
+    )
+
+    assert values == ["value"] * 10
+    assert loader.calls == 1
+    assert await cache.get_or_load("t_a", "k", loader) == "value"
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_keys_and_tags_are_namespaced_by_tenant() -> None:
+    """
+    Test that tenants never see, nor invalidate, each other's entries.
+    """
+    cache = memory_cache(ttl=60)
+    await cache.set("t_a", "k", "a", tags=["docs"])
+    await cache.set("t_b", "k", "b", tags=["docs"])
+    await cache.set(None, "k", "shared")
+
+    assert await cache.get("t_a", "k") == "a"
+    assert await cache.get("t_b", "k") == "b"
+    assert await cache.get(None, "k") == "shared"
+
+    await cache.invalidate_tags("t_a", "docs")
+
+    assert await cache.get("t_a", "k") is None
+    assert await cache.get("t_b", "k") == "b"
+
+
+@pytest.mark.asyncio
+async def test_stale_value_is_served_while_refreshed_once() -> None:
+    """
+    Test that an expired value within its stale period is returned immediately,
+    and refreshed by a single background load.
+    """
+    cache = memory_cache(ttl=0.01, stale_ttl=60)
+    await cache.set("t_a", "k", "old")
+    await asyncio.sleep(0.02)
+    loader = Loader("new", delay=0.01)
+
+    assert await cache.get_or_load("t_a", "k", loader) == "old"
+    assert await cache.get_or_load("t_a", "k", loader) == "old"
+    await asyncio.sleep(0.03)
+
+    assert loader.calls == 1
+    assert await cache.get("t_a", "k") == "new"
+
+
+@pytest.mark.asyncio
+async def test_load_racing_an_invalidation_is_not_stored() -> None:
+    """
+    Test that a value loaded before an invalidation is returned but not cached.
+    """
+    cache = memory_cache(ttl=60)
+    loader = Loader(delay=0.02)
+
+    pending = asyncio.create_task(cache.get_or_load("t_a", "k", loader))
+    await asyncio.sleep(0.01)
+    await cache.delete("t_a", "k")
+
+    assert await pending == "value"
+    assert await cache.get("t_a", "k") is None
+
+
+@pytest.mark.asyncio
+async def test_failed_load_is_raised_and_not_cached() -> None:
+    """
+    Test that a loader error reaches the caller and the next lookup loads again.
+    """
+    cache = memory_cache(ttl=60)
+
+    async def failing() -> Any:
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("t_a", "k", failing)
+
+    assert await cache.get_or_load("t_a", "k", Loader()) == "value"
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_evicts_least_recently_used_and_expired() -> None:
+    """
+    Test the LRU bound, the cap on entry lifetime, and the tag index cleanup.
+    """
+    tier = MemoryTier(2, max_ttl=60)
+    far = time.time() + 3600
+    await tier.set("a", Entry(1, far, far, ("tag",)))
+    await tier.set("b", Entry(2, far, far))
+    await tier.get("a")
+    await tier.set("c", Entry(3, far, far))
+
+    assert await tier.get("b") is None
+    entry = await tier.get("a")
+    assert entry is not None and entry.stale_until <= time.time() + 60
+
+    await tier.set("d", Entry(4, time.time() - 1, time.time() - 1))
+
+    assert await tier.get("d") is None
+    await tier.invalidate_tags(["tag"])
+    assert len(tier) == 0 and not tier._tagged
+
+
+class FakePipeline:
+    def __init__(self, client: "FakeRedis"):
+        self.client = client
+        self.calls: List[Any] = []
+
+    def __getattr__(self, name: str) -> Any:
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self) -> List[Any]:
+        return [await getattr(self.client, n)(*a, **k) for n, a, k in self.calls]
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: Dict[str, Any] = {}
+        self.sets: Dict[str, Set[str]] = {}
+        self.down = False
+
+    def pipeline(self, transaction: bool) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if self.down:
+            raise ConnectionError("down")
+        return self.values.get(key)
+
+    async def set(self, key: str, value: str, px: int) -> None:
+        self.values[key] = value.encode()
+
+    async def sadd(self, key: str, member: str) -> None:
+        self.sets.setdefault(key, set()).add(member)
+
+    async def pexpire(self, key: str, ms: int) -> None:
+        pass
+
+    async def smembers(self, key: str) -> Set[str]:
+        return self.sets.get(key, set())
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.values.pop(key, None)
+            self.sets.pop(key, None)
+
+    async def aclose(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_backfills_memory_and_fails_open() -> None:
+    """
+    Test that a hit in Redis is copied to memory, that tags invalidate Redis
+    entries, and that an unreachable server is a miss.
+    """
+    redis = FakeRedis()
+    memory = MemoryTier(100, max_ttl=60)
+    cache = Cache([memory, RedisTier(redis, max_ttl=600)], namespace="n", ttl=60)
+    await cache.set("t_a", "k", {"id": 1}, tags=["docs"])
+    await memory.close()
+
+    assert await cache.get("t_a", "k") == {"id": 1}
+    assert len(memory) == 1
+
+    await cache.invalidate_tags("t_a", "docs")
+    assert redis.values == {} and redis.sets == {}
+
+    redis.down = True
+    assert await cache.get_or_load("t_a", "k", Loader()) == "value"
@@ -0,0 +1,142 @@
+import uuid
+from typing import Any, List, Optional
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic import BaseModel
+from specter.cache.core import Cache
+from specter.cache.decorator import cached, session_schema
+from specter.cache.tiers import MemoryTier
+from specter.db.tenant_cache import TenantSnapshot
+from sqlalchemy import Connection
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine
+
+cache = Cache([MemoryTier(100, max_ttl=60)], namespace="test", ttl=60)
+
+
+class Document(BaseModel):
+    id: int
+    title: str
+
+
+class Row:
+    def __init__(self, id: int, title: str):
+        self.id = id
+        self.title = title
+
+
+def session(schema: Optional[str]) -> AsyncSession:
+    return AsyncSession(
+        info={"schema_translate_map": {"tenant": schema} if schema else None}
+    )
+
+
+class CRUDDocument:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.sessions: List[AsyncSession] = []
+
+    @cached(cache=cache, tags=["document:{id}"], model=Document)  # type: ignore[misc]
+    async def get(self, db: AsyncSession, *, id: int) -> Any:
+        self.calls += 1
+        self.sessions.append(db)
+        return Row(id, f"title {id} of {session_schema(db)}")
+
+
+def test_session_schema_follows_the_schema_translate_map() -> None:
+    """
+    Test that the namespace of a session is the tenant schema it queries.
+    """
+    assert session_schema(session("t_a")) == "t_a"
+    assert session_schema(session(None)) is None
+
+
+def test_session_schema_reads_the_map_of_the_bind() -> None:
+    """
+    Test that a session bound to an engine or a connection with a
+    `schema_translate_map` is namespaced by its tenant schema.
+    """
+    engine = create_async_engine("postgresql+asyncpg://test@localhost/test")
+    db = session(None)
+    db.bind = engine.execution_options(schema_translate_map={"tenant": "t_a"})
+    assert session_schema(db) == "t_a"
+
+    connection = MagicMock(spec=AsyncConnection)
+    connection.sync_connection = MagicMock(spec=Connection)
+    connection.sync_connection.get_execution_options.return_value = {
+        "schema_translate_map": {"tenant": "t_b"}
+    }
+    db.bind = connection
+    assert session_schema(db) == "t_b"
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_per_tenant_and_validated_as_the_model() -> None:
+    """
+    Test that ORM-like results are returned as `model`, cached per tenant, and
+    invalidated by their formatted tags.
+    """
+    crud = CRUDDocument()
+
+    first = await crud.get(session("t_a"), id=1)
+    again = await crud.get(session("t_a"), id=1)
+    other = await crud.get(session("t_b"), id=1)
+
+    assert first == again == Document(id=1, title="title 1 of t_a")
+    assert other.title == "title 1 of t_b"
+    assert crud.calls == 2
+
+    await cache.invalidate_tags("t_a", "document:1")
+    await crud.get(session("t_a"), id=1)
+
+    assert crud.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_loads_run_on_a_session_of_their_own() -> None:
+    """
+    Test that the function is not called with the caller's session, which loads
+    shared with other callers or refreshed in the background would outlive, but
+    with one of the same schema.
+    """
+    crud = CRUDDocument()
+    db = session("t_c")
+
+    document = await crud.get(db, id=7)
+
+    [used] = crud.sessions
+    assert used is not db
+    assert used.info["schema_translate_map"] == {"tenant": "t_c"}
+    assert document.title == "title 7 of t_c"
+
+
+@pytest.mark.asyncio
+async def test_functions_without_a_tenant_are_refused() -> None:
+    """
+    Test that caching is refused when the tenant cannot be told from the arguments.
+    """
+
+    @cached(cache=cache)  # type: ignore[misc]
+    async def count(schema: str) -> int:
+        return 1
+
+    with pytest.raises(TypeError):
+        await count("t_a")
+
+
+@pytest.mark.asyncio
+async def test_tenant_snapshot_argument_namespaces_endpoints() -> None:
+    """
+    Test that an endpoint's tenant dependency namespaces its results.
+    """
+
+    @cached(cache=cache)  # type: ignore[misc]
+    async def endpoint(tenant: TenantSnapshot, q: str) -> str:
+        return f"{tenant.schema}:{q}"
+
+    def tenant(schema: str) -> TenantSnapshot:
+        return TenantSnapshot(uuid.uuid4(), schema, schema, schema, uuid.uuid4(), True)
+
+    assert await endpoint(tenant("t_a"), "x") == "t_a:x"
+    assert await endpoint(tenant("t_b"), "x") == "t_b:x"
+    assert await endpoint(tenant("t_a"), q="x") == "t_a:x"
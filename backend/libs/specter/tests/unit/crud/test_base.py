@@ -0,0 +1,264 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Any, List, cast
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from specter import crud
+from specter.models import AccountUser
+from specter.schemas import AccountUserCreate
+from specter.utils import ConcurrentUpdateError, InvalidCursorError
+from sqlalchemy.dialects import postgresql
+
+
+def users(count: int) -> List[AccountUser]:
+    return [
+        AccountUser(
+            id=uuid.uuid4(),
+            created_on=datetime(
+                2024, 1, 1, second=i, microsecond=7, tzinfo=timezone.utc
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+def session(rows: List[Any]) -> AsyncMock:
+    db = AsyncMock()
+    db.info = {}
+    result = MagicMock()
+    result.scalars.return_value = iter(rows)
+    db.execute.return_value = result
+    return db
+
+
+def compiled(db: AsyncMock) -> str:
+    stmt = db.execute.await_args.args[0]
+    dialect = postgresql.dialect()  # type: ignore[no-untyped-call]
+    return str(stmt.compile(dialect=dialect))
+
+
+def test_cursor_round_trips_keyset_values() -> None:
+    """
+    Test that a cursor decodes to the typed keyset values of the row it was made from.
+    """
+    user = users(1)[0]
+
+    cursor = crud.account_user._encode_cursor(user)
+
+    assert crud.account_user._decode_cursor(cursor) == [user.created_on, user.id]
+
+
+@pytest.mark.parametrize("cursor", ["garbage!", "WzFd", "WyJ4IiwieSJd"])
+def test_tampered_cursor_is_rejected(cursor: str) -> None:
+    """
+    Test that undecodable cursors, and cursors with wrong values, are rejected.
+    """
+    with pytest.raises(InvalidCursorError):
+        crud.account_user._decode_cursor(cursor)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_share_one_query() -> None:
+    """
+    Test that concurrent lookups by id, or by email, within a session issue one
+    query, and that repeated lookups are served from the session's loader.
+    """
+    rows = users(2)
+    db = session(rows)
+
+    found = list(
+        await asyncio.gather(
+            crud.account_user.get(db, rows[0].id),
+            crud.account_user.get(db, rows[1].id),
+            crud.account_user.get(db, rows[0].id),
+        )
+    )
+
+    assert found == [rows[0], rows[1], rows[0]]
+    assert await crud.account_user.get(db, rows[1].id) is rows[1]
+    db.execute.assert_awaited_once()
+    assert "account_user.id = ANY" in compiled(db)
+
+    user = AccountUser(id=uuid.uuid4(), email="x@example.com")
+    db = session([user])
+
+    emails = ["x@example.com", "y@example.com", "x@example.com"]
+    by_email = list(
+        await asyncio.gather(
+            *(crud.account_user.get_by_email(db, email=email) for email in emails)
+        )
+    )
+
+    assert by_email == [user, None, user]
+    db.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_page_fetches_one_extra_row_to_detect_the_end() -> None:
+    """
+    Test that a full page carries the cursor of its last row, and the last page none.
+    """
+    rows = users(3)
+    db = session(rows)
+
+    page = await crud.account_user.page(db, limit=2)
+
+    assert page.items == rows[:2]
+    assert page.next_cursor == crud.account_user._encode_cursor(rows[1])
+    assert "LIMIT" in compiled(db)
+
+    db = session(rows[:2])
+    last = await crud.account_user.page(db, limit=2, cursor=page.next_cursor)
+
+    assert last.next_cursor is None
+    assert "(account_user.created_on, account_user.id) >" in compiled(db)
+    assert "OFFSET" not in compiled(db)
+
+
+def single_row(row: Any) -> AsyncMock:
+    db = AsyncMock()
+    db.info = {}
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = row
+    result.scalar.return_value = True
+    db.execute.return_value = result
+    return db
+
+
+@pytest.mark.asyncio
+async def test_update_by_id_is_a_single_returning_statement() -> None:
+    """
+    Test that an update by id compiles to one UPDATE ... RETURNING bumping updated_on,
+    guarded by the expected updated_on when given.
+    """
+    user = users(1)[0]
+    db = single_row(user)
+
+    result = await crud.account_user.update_by_id(
+        db,
+        id=user.id,
+        obj_in={"phone": "123"},
+        expected_updated_on=cast(datetime, user.created_on),
+    )
+
+    assert result is user
+    sql = compiled(db)
+    assert sql.startswith("UPDATE account_user SET phone=")
+    assert "updated_on=clock_timestamp()" in sql
+    assert "account_user.updated_on = " in sql
+    assert "RETURNING" in sql
+    db.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_stale_update_raises_concurrent_update_error() -> None:
+    """
+    Test that an update matching no row, while the row exists, reports a conflict.
+    """
+    user = users(1)[0]
+    db = single_row(None)
+
+    with pytest.raises(ConcurrentUpdateError):
+        await crud.account_user.update_by_id(
+            db,
+            id=user.id,
+            obj_in={"phone": "1"},
+            expected_updated_on=cast(datetime, user.created_on),
+        )
+
+
+@pytest.mark.asyncio
+async def test_bulk_mutations_require_a_filter() -> None:
+    """
+    Test that update_many and remove_many refuse to touch a whole table.
+    """
+    db = single_row(None)
+
+    with pytest.raises(ValueError):
+        await crud.account_user.update_many(db, filters=[], values={"phone": "1"})
+    with pytest.raises(ValueError):
+        await crud.account_user.remove_many(db, filters=[])
+    db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_single_statement_mutations_evict_loaded_rows() -> None:
+    """
+    Test that rows changed by update_by_id, update_many and remove_many are not
+    served from the session's loaders afterwards.
+    """
+    user = AccountUser(id=uuid.uuid4(), email="old@example.com")
+    db = single_row(user)
+    db.execute.return_value.scalars.side_effect = lambda: iter([user])
+    crud.account_user.loader(db).prime(user.id, user)
+    crud.account_user.loader(db, "email").prime("old@example.com", user)
+
+    async def queries_of_lookups() -> int:
+        before: int = db.execute.await_count
+        await crud.account_user.get(db, user.id)
+        await crud.account_user.get_by_email(db, email="old@example.com")
+        after: int = db.execute.await_count
+        return after - before
+
+    assert await queries_of_lookups() == 0
+
+    await crud.account_user.update_by_id(
+        db, id=user.id, obj_in={"email": "new@example.com"}
+    )
+    assert await queries_of_lookups() == 2
+
+    await crud.account_user.update_many(
+        db, filters=[AccountUser.id == user.id], values={"phone": "1"}
+    )
+    assert await queries_of_lookups() == 2
+
+    await crud.account_user.remove_many(db, filters=[AccountUser.id == user.id])
+    assert await queries_of_lookups() == 2
+
+
+@pytest.mark.asyncio
+async def test_tenants_with_owners_load_the_owner_in_the_same_query() -> None:
+    """
+    Test that tenants are paged with their owner joined, rather than lazy loaded.
+    """
+    db = session([])
+
+    await crud.tenant.list_tenants_with_owners(db, limit=10)
+
+    sql = compiled(db)
+    assert "JOIN account_user" in sql
+    assert "tenant.is_active = true" in sql
+
+
+def account(email: str, username: str) -> AccountUserCreate:
+    return AccountUserCreate.model_construct(
+        name=username,
+        email=email,
+        username=username,
+        password_hash="hash",
+        country_code="US",
+        phone="1",
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_many_matches_inserted_rows_on_every_conflict_key() -> None:
+    """
+    Test that a row skipped on its username is not reported as created when a later
+    row with the same email is inserted.
+    """
+    objs_in = [
+        account("x@example.com", "taken"),
+        account("x@example.com", "new"),
+        account("y@example.com", "other"),
+    ]
+    created = AccountUser(id=uuid.uuid4(), email="x@example.com", username="new")
+    other = AccountUser(id=uuid.uuid4(), email="y@example.com", username="other")
+    db = session([other, created])
+
+    result = await crud.account_user.create_many(db, objs_in=objs_in)
+
+    assert result == [None, created, other]
+    assert "ON CONFLICT DO NOTHING" in compiled(db)
@@ -0,0 +1,98 @@
+import asyncio
+from typing import Dict, List, Mapping
+
+import pytest
+from specter.crud.loader import BatchLoader
+
+
+class FakeTable:
+    """
+    Squares its keys; records every batch it is asked for.
+    """
+
+    def __init__(self) -> None:
+        self.batches: List[List[int]] = []
+        self.fail_next = False
+
+    async def __call__(self, keys: List[int]) -> Mapping[int, int]:
+        self.batches.append(keys)
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("database unavailable")
+        return {key: key * key for key in keys if key >= 0}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_are_batched() -> None:
+    """
+    Test that keys requested in the same loop iteration are fetched in one batch.
+    """
+    table = FakeTable()
+    loader: BatchLoader[int, int] = BatchLoader(table, name="test")
+
+    values = await asyncio.gather(*(loader.load(key) for key in [1, 2, 3, 2, -1]))
+
+    assert values == [1, 4, 9, 4, None]
+    assert table.batches == [[1, 2, 3, -1]]
+
+
+@pytest.mark.asyncio
+async def test_results_are_memoized() -> None:
+    """
+    Test that a key is fetched once per loader, until it is cleared.
+    """
+    table = FakeTable()
+    loader: BatchLoader[int, int] = BatchLoader(table, name="test")
+
+    await loader.load_many([1, 2])
+    assert await loader.load_many([2, 1]) == [4, 1]
+    loader.clear(2)
+    await loader.load(2)
+
+    assert table.batches == [[1, 2], [2]]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_split_by_max_size() -> None:
+    """
+    Test that large batches are split into several calls.
+    """
+    table = FakeTable()
+    loader: BatchLoader[int, int] = BatchLoader(table, name="test", max_batch_size=2)
+
+    await loader.load_many([1, 2, 3])
+
+    assert table.batches == [[1, 2], [3]]
+
+
+@pytest.mark.asyncio
+async def test_failures_reach_every_caller_and_are_not_memoized() -> None:
+    """
+    Test that a failed batch fails all its callers, and the keys are retried later.
+    """
+    table = FakeTable()
+    table.fail_next = True
+    loader: BatchLoader[int, int] = BatchLoader(table, name="test")
+
+    results = await asyncio.gather(
+        loader.load(1), loader.load(2), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    assert await loader.load(1) == 1
+    assert len(table.batches) == 2
+
+
+@pytest.mark.asyncio
+async def test_primed_values_skip_the_query() -> None:
+    """
+    Test that primed values are served without a fetch.
+    """
+    table = FakeTable()
+    loader: BatchLoader[int, int] = BatchLoader(table, name="test")
+    values: Dict[int, int] = {7: 49}
+
+    loader.prime(7, values[7])
+
+    assert await loader.load(7) == 49
+    assert table.batches == []
@@ -0,0 +1,172 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Mapping, Tuple
+from unittest.mock import MagicMock
+
+import pytest
+from specter.db.fanout import FanOut
+from sqlalchemy import Column, Integer, MetaData, Table, select
+from sqlalchemy.sql import Executable
+
+doc = Table("doc", MetaData(schema="tenant"), Column("id", Integer))
+
+
+class FakeShards:
+    """
+    Engines of the shards, whose tenants answer from memory after a per-tenant
+    delay.
+    """
+
+    def __init__(self, rows: Dict[str, List[int]], delays: Dict[str, float]):
+        self.rows = rows
+        self.delays = delays
+        self.running = 0
+        self.max_running = 0
+        self.shards: Dict[str, str] = {}
+
+    def route(self, shard: str) -> Any:
+        return MagicMock(connect=lambda: self.connect(shard))
+
+    @asynccontextmanager
+    async def connect(self, shard: str) -> AsyncIterator["FakeConnection"]:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            yield FakeConnection(self, shard)
+        finally:
+            self.running -= 1
+
+
+class FakeConnection:
+    def __init__(self, shards: FakeShards, shard: str, schema: str = "tenant"):
+        self.shards = shards
+        self.shard = shard
+        self.schema = schema
+
+    async def execution_options(
+        self, schema_translate_map: Mapping[str, str]
+    ) -> "FakeConnection":
+        return FakeConnection(self.shards, self.shard, schema_translate_map["tenant"])
+
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator[None]:
+        yield
+
+    async def exec_driver_sql(self, sql: str) -> None:
+        pass
+
+    async def execute(self, stmt: Executable, params: Any) -> MagicMock:
+        self.shards.shards[self.schema] = self.shard
+        await asyncio.sleep(self.shards.delays.get(self.schema, 0))
+        if self.schema not in self.shards.rows:
+            raise RuntimeError(f"no such schema {self.schema}")
+        limit = getattr(stmt, "_limit", None)
+        rows = self.shards.rows[self.schema][:limit]
+        return MagicMock(all=MagicMock(return_value=[(value,) for value in rows]))
+
+
+def stub_fanout(
+    rows: Dict[str, List[int]], delays: Dict[str, float], **kw: Any
+) -> Tuple[FanOut, FakeShards]:
+    shards = FakeShards(rows, delays)
+    return FanOut(route=shards.route, **kw), shards
+
+
+@pytest.mark.asyncio
+async def test_results_stream_in_completion_order() -> None:
+    """
+    Test that each tenant's result is yielded as soon as it completes, with at
+    most `concurrency` tenants queried at a time.
+    """
+    fanout, shards = stub_fanout(
+        {"t_a": [1], "t_b": [2], "t_c": [3]},
+        {"t_a": 0.08, "t_b": 0.01, "t_c": 0.02},
+        concurrency=2,
+        timeout=1.0,
+    )
+
+    order = [r.schema async for r in fanout.stream(select(doc), ["t_a", "t_b", "t_c"])]
+
+    assert order == ["t_b", "t_c", "t_a"]
+    assert shards.max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_or_failing_tenants_do_not_fail_the_others() -> None:
+    """
+    Test that a tenant exceeding the timeout, or failing, is reported with its
+    error while the other tenants' rows are returned.
+    """
+    fanout, _ = stub_fanout(
+        {"t_a": [1], "t_slow": [2]}, {"t_slow": 1.0}, concurrency=4, timeout=0.05
+    )
+
+    results = await fanout.gather(select(doc), ["t_a", "t_slow", "t_missing"])
+
+    assert [r.schema for r in results] == ["t_a", "t_slow", "t_missing"]
+    assert results[0].ok and results[0].rows == [(1,)]
+    assert isinstance(results[1].error, asyncio.TimeoutError)
+    assert isinstance(results[2].error, RuntimeError)
+
+
+@pytest.mark.asyncio
+async def test_waiting_for_a_slot_does_not_count_against_the_timeout() -> None:
+    """
+    Test that tenants queued behind the others get the whole timeout once their
+    turn comes, however many tenants are ahead of them.
+    """
+    schemas = [f"t_{i}" for i in range(10)]
+    fanout, shards = stub_fanout(
+        {schema: [1] for schema in schemas},
+        {schema: 0.02 for schema in schemas},
+        concurrency=2,
+        timeout=0.05,
+    )
+
+    results = await fanout.gather(select(doc), schemas)
+
+    assert all(result.ok for result in results)
+    assert shards.max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_tenants_are_queried_on_their_shard() -> None:
+    """
+    Test that a mapping of schemas to shards routes each tenant to its shard, and a
+    plain list of schemas to the primary.
+    """
+    fanout, shards = stub_fanout(
+        {"t_a": [1], "t_b": [2]}, {}, concurrency=4, timeout=1.0
+    )
+
+    results = await fanout.gather(select(doc), {"t_a": "primary", "t_b": "eu"})
+
+    assert [r.rows for r in results] == [[(1,)], [(2,)]]
+    assert shards.shards == {"t_a": "primary", "t_b": "eu"}
+
+    await fanout.gather(select(doc), ["t_b"])
+
+    assert shards.shards["t_b"] == "primary"
+
+
+@pytest.mark.asyncio
+async def test_merge_orders_rows_across_tenants() -> None:
+    """
+    Test the k-way merge of ordered tenant results, and the top-N across tenants.
+    """
+    rows = {"t_a": [1, 4, 7], "t_b": [2, 3, 9], "t_c": [5]}
+    fanout, shards = stub_fanout(rows, {}, concurrency=4, timeout=1.0)
+
+    merged, failed = await fanout.merge(select(doc), list(rows), key=lambda r: r[0])
+
+    assert [row[0] for _, row in merged] == [1, 2, 3, 4, 5, 7, 9]
+    assert merged[0][0] == "t_a"
+    assert failed == []
+
+    descending = {schema: values[::-1] for schema, values in rows.items()}
+    shards.rows = descending
+    top, _ = await fanout.merge(
+        select(doc), list(rows), key=lambda r: r[0], descending=True, limit=2
+    )
+
+    assert [(schema, row[0]) for schema, row in top] == [("t_b", 9), ("t_a", 7)]
@@ -0,0 +1,54 @@
+from unittest.mock import patch
+
+import pytest
+from core.config import settings
+from specter.db.instrumentation import RequestStats, operation, redact
+
+
+def test_parameters_are_redacted_by_default() -> None:
+    """
+    Test that the slow-query log shows parameter names only.
+    """
+    assert redact(("jane", "s3cret"), ["email", "password"]) == (
+        "{email: <redacted>, password: <redacted>}"
+    )
+
+
+def test_sensitive_parameters_stay_redacted() -> None:
+    """
+    Test that sensitive parameters are redacted even when values are logged.
+    """
+    with patch.object(settings, "DB_SLOW_QUERY_LOG_PARAMETERS", True):
+        logged = redact({"email": "jane", "password_hash": "x"})
+
+    assert logged == "{email: 'jane', password_hash: <redacted>}"
+
+
+@pytest.mark.parametrize(
+    "statement, expected",
+    [("SELECT 1", "SELECT"), ("\n update t set a = 1", "UPDATE"), ("BEGIN", "OTHER")],
+)
+def test_operation(statement: str, expected: str) -> None:
+    """
+    Test that statements are labelled by their operation.
+    """
+    assert operation(statement) == expected
+
+
+def test_repeated_statements_are_reported_once(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """
+    Test that a request repeating one statement beyond the threshold warns once.
+    """
+    stats = RequestStats({"method": "GET"})
+
+    with patch.object(settings, "DB_N_PLUS_ONE_THRESHOLD", 3):
+        for _ in range(10):
+            stats.record("SELECT * FROM tenant WHERE id = $1", 0.001)
+        stats.record("SELECT 1", 0.001)
+
+    assert stats.count == 11
+    warnings = [r for r in caplog.records if "same statement" in r.getMessage()]
+    assert len(warnings) == 1
+    assert "GET unmatched" in warnings[0].getMessage()
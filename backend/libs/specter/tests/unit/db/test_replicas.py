@@ -0,0 +1,66 @@
+import math
+from typing import List
+from unittest.mock import MagicMock
+
+import pytest
+from specter.db import session
+from specter.db.replicas import LEAST_CONNECTIONS, ROUND_ROBIN, ReplicaSet
+
+
+def fake_engines(checked_out: List[int]) -> List[MagicMock]:
+    engines = []
+    for count in checked_out:
+        engine = MagicMock()
+        engine.pool.checkedout.return_value = count
+        engines.append(engine)
+    return engines
+
+
+def replica_set(engines: List[MagicMock], selection: str) -> ReplicaSet:
+    replicas = ReplicaSet(engines, selection=selection, max_lag=5, check_interval=1)
+    replicas.lag = {engine: 0.0 for engine in engines}
+    return replicas
+
+
+def test_round_robin_skips_lagging_replicas() -> None:
+    """
+    Test that replicas take turns, except those lagging beyond the threshold.
+    """
+    a, b, c = fake_engines([0, 0, 0])
+    replicas = replica_set([a, b, c], ROUND_ROBIN)
+    replicas.lag[b] = 30.0
+
+    assert [replicas.choose() for _ in range(4)] == [a, c, a, c]
+
+
+def test_least_connections_picks_the_idlest_replica() -> None:
+    """
+    Test that the replica with the fewest checked out connections is chosen.
+    """
+    a, b = fake_engines([4, 1])
+
+    assert replica_set([a, b], LEAST_CONNECTIONS).choose() is b
+
+
+def test_no_eligible_replica_means_primary() -> None:
+    """
+    Test that replicas never measured, or unreachable, are not used.
+    """
+    (a,) = fake_engines([0])
+    replicas = replica_set([a], ROUND_ROBIN)
+    replicas.lag[a] = math.inf
+
+    assert replicas.choose() is None
+
+
+def test_reads_follow_the_requests_writes(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that reads go to a replica, unless the request asked for the primary.
+    """
+    (a,) = fake_engines([0])
+    monkeypatch.setattr(session, "replicas", replica_set([a], ROUND_ROBIN))
+
+    assert session.route_read() is a
+    with session.use_primary():
+        assert session.route_read() is session.engine
+    assert session.route_read() is a
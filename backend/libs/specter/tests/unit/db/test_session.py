@@ -0,0 +1,22 @@
+import pytest
+from specter.db.session import tenant_schema_map
+
+
+def test_tenant_schema_is_routed_per_statement() -> None:
+    """
+    Test that tenant schemas map the models' `tenant` schema, and the shared schema
+    needs no map.
+    """
+    assert tenant_schema_map("acme_corp") == {"tenant": "acme_corp"}
+    assert tenant_schema_map(None) is None
+
+
+@pytest.mark.parametrize(
+    "schema", ['acme"; DROP TABLE account_user; --', "Acme", "1acme", "a" * 64]
+)
+def test_schema_names_are_validated(schema: str) -> None:
+    """
+    Test that only plain identifiers are rendered into statements.
+    """
+    with pytest.raises(ValueError):
+        tenant_schema_map(schema)
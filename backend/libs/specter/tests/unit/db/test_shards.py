@@ -0,0 +1,42 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from specter.db.shards import PRIMARY_SHARD, ShardRegistry
+
+
+@pytest.mark.asyncio
+async def test_shard_engines_are_created_on_first_use() -> None:
+    """
+    Test that the primary shard uses the primary engine, and other shards get one
+    engine each, created on first use and disposed on close.
+    """
+    primary = MagicMock()
+    created = MagicMock(dispose=AsyncMock())
+    create_engine = MagicMock(return_value=created)
+    registry = ShardRegistry(
+        {"eu": "postgresql+asyncpg://eu/db"},
+        primary=primary,
+        create_engine=create_engine,
+    )
+
+    assert registry.engine(PRIMARY_SHARD) is primary
+    create_engine.assert_not_called()
+
+    assert registry.engine("eu") is created
+    assert registry.engine("eu") is created
+    create_engine.assert_called_once_with("postgresql+asyncpg://eu/db", name="shard-eu")
+
+    await registry.close()
+
+    created.dispose.assert_awaited_once()
+    primary.dispose.assert_not_called()
+
+
+def test_unknown_shards_are_refused() -> None:
+    """
+    Test that a shard missing from the routing map raises instead of falling back.
+    """
+    registry = ShardRegistry({}, primary=MagicMock(), create_engine=MagicMock())
+
+    with pytest.raises(ValueError):
+        registry.engine("eu")
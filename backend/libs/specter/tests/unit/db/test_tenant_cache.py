@@ -0,0 +1,152 @@
+import asyncio
+import uuid
+from typing import Dict, List, Optional
+
+import pytest
+from specter.db.tenant_cache import TenantCache, TenantSnapshot
+
+
+def make_snapshot(host: str) -> TenantSnapshot:
+    return TenantSnapshot(
+        id=uuid.uuid4(),
+        name=f"Firm at {host}",
+        host=host,
+        schema=f"tenant_{host.split('.')[0]}",
+        owner_id=uuid.uuid4(),
+        is_active=True,
+    )
+
+
+class FakeLoader:
+    """
+    Stand-in for the database loader that records every host it was asked for.
+    """
+
+    def __init__(self, tenants: Dict[str, TenantSnapshot]):
+        self.tenants = tenants
+        self.calls: List[str] = []
+
+    async def __call__(self, host: str) -> Optional[TenantSnapshot]:
+        self.calls.append(host)
+        return self.tenants.get(host)
+
+
+@pytest.mark.asyncio
+async def test_hit_is_served_without_reloading() -> None:
+    """
+    Test that a resolved host is loaded once and then served from the cache.
+    """
+    loader = FakeLoader({"acme.example.com": make_snapshot("acme.example.com")})
+    cache = TenantCache(loader, ttl=60, negative_ttl=60, max_size=10)
+
+    first = await cache.get("acme.example.com")
+    second = await cache.get("acme.example.com")
+
+    assert first is second
+    assert first is not None and first.schema == "tenant_acme"
+    assert loader.calls == ["acme.example.com"]
+
+
+@pytest.mark.asyncio
+async def test_unknown_host_is_negatively_cached() -> None:
+    """
+    Test that unknown hosts are cached so repeated lookups do not hit the loader.
+    """
+    loader = FakeLoader({})
+    cache = TenantCache(loader, ttl=60, negative_ttl=60, max_size=10)
+
+    assert await cache.get("unknown.example.com") is None
+    assert await cache.get("unknown.example.com") is None
+    assert loader.calls == ["unknown.example.com"]
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_reloaded() -> None:
+    """
+    Test that entries past their TTL are loaded again.
+    """
+    loader = FakeLoader({})
+    cache = TenantCache(loader, ttl=60, negative_ttl=0, max_size=10)
+
+    await cache.get("unknown.example.com")
+    await cache.get("unknown.example.com")
+
+    assert loader.calls == ["unknown.example.com", "unknown.example.com"]
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_host_is_evicted() -> None:
+    """
+    Test that the cache never grows beyond max_size and evicts in LRU order.
+    """
+    hosts = ["a.example.com", "b.example.com", "c.example.com"]
+    loader = FakeLoader({host: make_snapshot(host) for host in hosts})
+    cache = TenantCache(loader, ttl=60, negative_ttl=60, max_size=2)
+
+    await cache.get("a.example.com")
+    await cache.get("b.example.com")
+    await cache.get("a.example.com")
+    await cache.get("c.example.com")
+
+    assert len(cache) == 2
+    await cache.get("a.example.com")
+    await cache.get("b.example.com")
+    assert loader.calls == hosts + ["b.example.com"]
+
+
+@pytest.mark.asyncio
+async def test_notification_invalidates_host() -> None:
+    """
+    Test that a NOTIFY payload naming a host drops it from the cache.
+    """
+    loader = FakeLoader({"acme.example.com": make_snapshot("acme.example.com")})
+    cache = TenantCache(loader, ttl=60, negative_ttl=60, max_size=10)
+
+    await cache.get("acme.example.com")
+    cache._on_notify(None, 0, cache.channel, "acme.example.com")
+    await cache.get("acme.example.com")
+
+    assert loader.calls == ["acme.example.com", "acme.example.com"]
+
+
+@pytest.mark.asyncio
+async def test_load_racing_an_invalidation_is_not_stored() -> None:
+    """
+    Test that a result loaded while an invalidation happened is not cached.
+    """
+    cache: TenantCache
+
+    async def loader(host: str) -> Optional[TenantSnapshot]:
+        cache.invalidate(host, source="notify")
+        return make_snapshot(host)
+
+    cache = TenantCache(loader, ttl=60, negative_ttl=60, max_size=10)
+
+    assert await cache.get("acme.example.com") is not None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load() -> None:
+    """
+    Test that requests missing the same host at once wait for a single load, and
+    that a caller giving up does not cancel it for the others.
+    """
+    release = asyncio.Event()
+    loader = FakeLoader({"acme.example.com": make_snapshot("acme.example.com")})
+
+    async def slow_loader(host: str) -> Optional[TenantSnapshot]:
+        await release.wait()
+        return await loader(host)
+
+    cache = TenantCache(slow_loader, ttl=60, negative_ttl=60, max_size=10)
+    gets = [asyncio.ensure_future(cache.get("acme.example.com")) for _ in range(5)]
+    await asyncio.sleep(0)
+    gets[0].cancel()
+    release.set()
+
+    tenants = await asyncio.gather(*gets[1:])
+
+    assert loader.calls == ["acme.example.com"]
+    assert all(tenant is tenants[0] is not None for tenant in tenants)
+    assert await cache.get("acme.example.com") is tenants[0]
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Dict, List, Optional
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from specter.db.tenant_migrations import (
+    CURRENT,
+    FAILED,
+    LOCKED,
+    MIGRATED,
+    TenantMigration,
+    TenantMigrator,
+)
+
+
+class StubMigrator(TenantMigrator):  # type: ignore[misc]
+    """
+    Migrator whose schemas' versions are kept in memory instead of the database.
+    """
+
+    def __init__(self, versions: Dict[str, int], *, concurrency: int):
+        migrations = [
+            TenantMigration(2, "second", AsyncMock()),
+            TenantMigration(1, "first", AsyncMock()),
+        ]
+        super().__init__(MagicMock(), migrations, concurrency=concurrency)
+        self.versions = versions
+        self.locked: List[str] = []
+        self.broken: Dict[str, int] = {}
+        self.errors: Dict[str, str] = {}
+        self.running = 0
+        self.max_running = 0
+
+    async def _apply(self, schema: str, migration: TenantMigration) -> Optional[bool]:
+        if schema in self.locked:
+            return None
+        if self.versions.get(schema, 0) >= migration.version:
+            return False
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0)
+        self.running -= 1
+        if self.broken.get(schema) == migration.version:
+            raise RuntimeError("boom")
+        self.versions[schema] = migration.version
+        return True
+
+    async def _record_error(self, schema: str, error: str) -> None:
+        self.errors[schema] = error
+
+
+def test_duplicate_versions_are_refused() -> None:
+    """
+    Test that two migrations with the same version cannot be registered.
+    """
+    migrations = [TenantMigration(1, "a", AsyncMock())] * 2
+
+    with pytest.raises(ValueError):
+        TenantMigrator(MagicMock(), migrations)
+
+
+@pytest.mark.asyncio
+async def test_run_migrates_each_schema_to_the_target_version() -> None:
+    """
+    Test that missing migrations are applied in version order, at most
+    `concurrency` schemas at a time, and that up-to-date or locked schemas are
+    skipped.
+    """
+    migrator = StubMigrator({"t_current": 2, "t_half": 1}, concurrency=2)
+    migrator.locked = ["t_locked"]
+    schemas = ["t_new", "t_half", "t_current", "t_locked", "t_other"]
+
+    results = {result.schema: result for result in await migrator.run(schemas)}
+
+    assert migrator.target == 2
+    assert migrator.max_running == 2
+    assert results["t_new"].outcome == MIGRATED
+    assert results["t_half"].outcome == MIGRATED
+    assert results["t_current"].outcome == CURRENT
+    assert results["t_locked"].outcome == LOCKED
+    assert migrator.versions == {
+        "t_new": 2,
+        "t_half": 2,
+        "t_current": 2,
+        "t_other": 2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_failed_schema_is_recorded_and_resumed_on_the_next_run() -> None:
+    """
+    Test that a failure stops only its schema, at its last applied version, and
+    that running again resumes from there.
+    """
+    migrator = StubMigrator({}, concurrency=4)
+    migrator.broken = {"t_broken": 2}
+
+    results = {r.schema: r for r in await migrator.run(["t_broken", "t_ok"])}
+
+    assert results["t_broken"].outcome == FAILED
+    assert results["t_broken"].version == 1
+    assert "boom" in migrator.errors["t_broken"]
+    assert results["t_ok"].outcome == MIGRATED
+
+    migrator.broken = {}
+    (result,) = await migrator.run(["t_broken"])
+
+    assert (result.outcome, result.version) == (MIGRATED, 2)
@@ -0,0 +1,94 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from specter.db import tenant_provisioning
+from specter.db.tenant_provisioning import (
+    SCHEMA_PLACEHOLDER,
+    STANDBY,
+    TEMPLATE,
+    TenantProvisioner,
+    compile_template,
+)
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, Table
+
+
+def tenant_tables() -> MetaData:
+    metadata = MetaData(schema="tenant")
+    Table("doc", metadata, Column("id", Integer, primary_key=True))
+    Table(
+        "page",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("doc_id", ForeignKey("tenant.doc.id"), index=True),
+    )
+    return metadata
+
+
+def test_template_is_a_single_statement_creating_the_whole_schema() -> None:
+    """
+    Test that the template creates the schema, its tables in dependency order and
+    their indexes, and records the schema's version, in one DO block.
+    """
+    template = compile_template(tenant_tables(), version=3)
+
+    assert template.startswith("DO $specter_ddl$")
+    assert template.count("$specter_ddl$") == 2
+    assert f"CREATE SCHEMA {SCHEMA_PLACEHOLDER};" in template
+    assert template.index(".doc (") < template.index(".page (")
+    assert f"ON {SCHEMA_PLACEHOLDER}.page (doc_id)" in template
+    assert f"VALUES ('{SCHEMA_PLACEHOLDER}', 3)" in template
+    assert "tenant." not in template
+
+
+def test_rendering_quotes_the_schema_name_where_needed() -> None:
+    """
+    Test that the schema name is substituted as an identifier and as a literal.
+    """
+    provisioner = TenantProvisioner(MagicMock())
+    provisioner._template = compile_template(tenant_tables(), version=1)
+
+    rendered = provisioner._render("user")
+
+    assert 'CREATE TABLE "user".doc' in rendered
+    assert "VALUES ('user', 1)" in rendered
+    assert SCHEMA_PLACEHOLDER not in rendered
+
+
+@pytest.mark.asyncio
+async def test_provision_claims_a_standby_schema_when_one_is_ready() -> None:
+    """
+    Test that sign-up renames a standby schema and schedules its replacement,
+    and falls back to the template when none is ready.
+    """
+    provisioner = TenantProvisioner(MagicMock(), standby=1)
+    provisioner._template = compile_template(tenant_tables(), version=1)
+    connection = AsyncMock()
+    claimed = MagicMock()
+    claimed.scalar.return_value = "standby_0123"
+    connection.execute.return_value = claimed
+
+    with patch.object(provisioner, "schedule_replenish") as replenish:
+        assert await provisioner.provision(connection, "t_acme") == STANDBY
+        rename = str(connection.execute.await_args_list[1].args[0])
+        assert rename == 'ALTER SCHEMA "standby_0123" RENAME TO "t_acme"'
+        replenish.assert_called_once()
+        connection.exec_driver_sql.assert_not_awaited()
+
+        claimed.scalar.return_value = None
+
+        assert await provisioner.provision(connection, "t_other") == TEMPLATE
+        connection.exec_driver_sql.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_invalid_schema_names_are_refused() -> None:
+    """
+    Test that a schema name that is not a plain identifier is never rendered.
+    """
+    connection = AsyncMock()
+
+    with pytest.raises(ValueError):
+        await tenant_provisioning.tenant_provisioner.provision(
+            connection, 'x"; DROP SCHEMA public; --'
+        )
+    connection.exec_driver_sql.assert_not_awaited()
@@ -0,0 +1,84 @@
+from typing import Any, Dict
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from specter.db import uow
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def session() -> AsyncMock:
+    db = AsyncMock()
+    db.info = {}
+    return db
+
+
+def db_error(sqlstate: str) -> DBAPIError:
+    return DBAPIError("COMMIT", {}, MagicMock(sqlstate=sqlstate))
+
+
+@pytest.mark.asyncio
+async def test_writes_inside_a_unit_of_work_only_flush() -> None:
+    """
+    Test that CRUD commits become flushes, with one commit at the end of the unit.
+    """
+    db = session()
+
+    async with uow.uow(db):
+        await uow.commit(db)
+        async with uow.uow(db):
+            await uow.commit(db)
+        db.commit.assert_not_awaited()
+
+    assert db.flush.await_count == 2
+    db.commit.assert_awaited_once()
+    assert not uow.in_unit_of_work(db)
+
+
+@pytest.mark.asyncio
+async def test_failed_unit_of_work_rolls_back() -> None:
+    """
+    Test that an error inside the unit rolls the transaction back instead of
+    committing it.
+    """
+    db = session()
+
+    with pytest.raises(RuntimeError):
+        async with uow.uow(db):
+            raise RuntimeError("boom")
+
+    db.rollback.assert_awaited_once()
+    db.commit.assert_not_awaited()
+    assert not uow.in_unit_of_work(db)
+
+
+@pytest.mark.asyncio
+async def test_serialization_failures_are_retried() -> None:
+    """
+    Test that work failing with SQLSTATE 40001 runs again from scratch.
+    """
+    db = session()
+    db.commit.side_effect = [db_error("40001"), None]
+    runs: Dict[str, Any] = {"count": 0}
+
+    async def work(db: AsyncSession) -> int:
+        runs["count"] += 1
+        return int(runs["count"])
+
+    assert await uow.run_in_uow(db, work, backoff=0) == 2
+    db.rollback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_retried() -> None:
+    """
+    Test that errors which would fail again, like unique violations, are raised.
+    """
+    db = session()
+    db.commit.side_effect = db_error("23505")
+    work = AsyncMock()
+
+    with pytest.raises(DBAPIError):
+        await uow.run_in_uow(db, work, backoff=0)
+
+    work.assert_awaited_once()
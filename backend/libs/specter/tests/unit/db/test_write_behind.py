@@ -0,0 +1,136 @@
+import asyncio
+from typing import Dict, List
+
+import pytest
+from specter.db.write_behind import WriteBehindBuffer
+
+
+class FakeSink:
+    """
+    Records flushed batches; optionally fails the next flush, or every flush while
+    down.
+    """
+
+    def __init__(self) -> None:
+        self.batches: List[Dict[str, int]] = []
+        self.attempts = 0
+        self.fail_next = False
+        self.down = False
+
+    async def __call__(self, batch: Dict[str, int]) -> None:
+        self.attempts += 1
+        if self.down:
+            raise RuntimeError("database unavailable")
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("database unavailable")
+        self.batches.append(batch)
+
+
+@pytest.mark.asyncio
+async def test_updates_are_coalesced_per_key() -> None:
+    """
+    Test that repeated updates for a key collapse into the greatest value.
+    """
+    sink = FakeSink()
+    buffer: WriteBehindBuffer[str, int] = WriteBehindBuffer(
+        sink, interval=60, max_pending=100, name="test"
+    )
+
+    buffer.record("alice", 3)
+    buffer.record("alice", 1)
+    buffer.record("bob", 2)
+    assert len(buffer) == 2
+
+    await buffer.flush()
+
+    assert sink.batches == [{"alice": 3, "bob": 2}]
+    assert len(buffer) == 0
+
+
+@pytest.mark.asyncio
+async def test_reaching_max_pending_triggers_flush() -> None:
+    """
+    Test that the background loop flushes early once max_pending keys are waiting.
+    """
+    sink = FakeSink()
+    buffer: WriteBehindBuffer[str, int] = WriteBehindBuffer(
+        sink, interval=60, max_pending=2, name="test"
+    )
+    buffer.start()
+    try:
+        buffer.record("alice", 1)
+        buffer.record("bob", 1)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert sink.batches == [{"alice": 1, "bob": 1}]
+    finally:
+        await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_close_drains_pending_updates() -> None:
+    """
+    Test that closing the buffer writes everything still pending.
+    """
+    sink = FakeSink()
+    buffer: WriteBehindBuffer[str, int] = WriteBehindBuffer(
+        sink, interval=60, max_pending=100, name="test"
+    )
+    buffer.start()
+    buffer.record("alice", 1)
+
+    await buffer.close()
+
+    assert sink.batches == [{"alice": 1}]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried_with_newer_values() -> None:
+    """
+    Test that a failed batch is re-queued and merged with updates recorded since.
+    """
+    sink = FakeSink()
+    sink.fail_next = True
+    buffer: WriteBehindBuffer[str, int] = WriteBehindBuffer(
+        sink, interval=60, max_pending=100, name="test"
+    )
+
+    buffer.record("alice", 1)
+    buffer.record("bob", 5)
+    await buffer.flush()
+    buffer.record("alice", 2)
+    await buffer.flush()
+
+    assert sink.batches == [{"alice": 2, "bob": 5}]
+
+
+@pytest.mark.asyncio
+async def test_repeated_failures_back_off_and_bound_the_buffer() -> None:
+    """
+    Test that after a failed flush, updates no longer trigger early retries, that
+    updates of new keys past max_size are dropped, and that the batch is retried
+    after `interval`.
+    """
+    sink = FakeSink()
+    sink.down = True
+    buffer: WriteBehindBuffer[str, int] = WriteBehindBuffer(
+        sink, interval=0.05, max_pending=2, max_size=4, name="test"
+    )
+    buffer.start()
+    try:
+        for i in range(10):
+            buffer.record(f"user{i}", i)
+            for _ in range(10):
+                await asyncio.sleep(0)
+
+        assert sink.attempts == 1
+        assert len(buffer) == 4
+
+        sink.down = False
+        await asyncio.sleep(0.15)
+
+        assert sink.batches == [{f"user{i}": i for i in range(4)}]
+        assert len(buffer) == 0
+    finally:
+        await buffer.close()
@@ -0,0 +1,29 @@
+from typing import Dict
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from specter.db.instrumentation import current_request
+from specter.middlewares.sql_instrumentation import SQLInstrumentationMiddleware
+
+
+@pytest.mark.asyncio
+async def test_statements_are_attributed_to_the_route() -> None:
+    """
+    Test that statements issued by an endpoint are counted for its route template.
+    """
+    app = FastAPI()
+    app.add_middleware(SQLInstrumentationMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int) -> Dict[str, object]:
+        stats = current_request.get()
+        assert stats is not None
+        stats.record("SELECT 1", 0.001)
+        return {"route": stats.route, "count": stats.count}
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/items/42")
+
+    assert response.json() == {"route": "/items/{item_id}", "count": 1}
+    assert current_request.get() is None
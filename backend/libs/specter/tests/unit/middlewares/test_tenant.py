@@ -0,0 +1,94 @@
+import uuid
+from typing import Dict, List, Optional
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import AsyncClient
+from specter.db.session import get_tenant
+from specter.db.tenant_cache import TenantCache, TenantSnapshot
+from specter.middlewares.tenant import TenantMiddleware
+
+
+class FakeLoader:
+    """
+    Stand-in for the database loader that records every host it was asked for.
+    """
+
+    def __init__(self, tenants: Dict[str, TenantSnapshot]):
+        self.tenants = tenants
+        self.calls: List[str] = []
+
+    async def __call__(self, host: str) -> Optional[TenantSnapshot]:
+        self.calls.append(host)
+        return self.tenants.get(host)
+
+
+def make_app(loader: FakeLoader) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        TenantMiddleware,
+        tenant_cache=TenantCache(loader, ttl=60, negative_ttl=60, max_size=10),
+    )
+
+    @app.get("/docs/{doc_id}")
+    async def read_doc(
+        doc_id: int, tenant: TenantSnapshot = Depends(get_tenant)
+    ) -> Dict[str, str]:
+        return {"schema": tenant.schema}
+
+    @app.get("/health/live")
+    async def live() -> Dict[str, str]:
+        return {"status": "ok"}
+
+    return app
+
+
+def make_snapshot(host: str, is_active: bool = True) -> TenantSnapshot:
+    return TenantSnapshot(
+        id=uuid.uuid4(),
+        name=f"Firm at {host}",
+        host=host,
+        schema=f"tenant_{host.split('.')[0]}",
+        owner_id=uuid.uuid4(),
+        is_active=is_active,
+    )
+
+
+@pytest.mark.asyncio
+async def test_tenant_is_resolved_once_per_host() -> None:
+    """
+    Test that the tenant is resolved before routing, served to `get_tenant` from the
+    request state, and loaded once per host.
+    """
+    loader = FakeLoader({"acme.example.com": make_snapshot("acme.example.com")})
+    app = make_app(loader)
+
+    async with AsyncClient(app=app, base_url="http://acme.example.com:8000") as client:
+        first = await client.get("/docs/1")
+        second = await client.get("/docs/2")
+
+    assert first.json() == second.json() == {"schema": "tenant_acme"}
+    assert loader.calls == ["acme.example.com"]
+
+
+@pytest.mark.asyncio
+async def test_unknown_hosts_are_refused_before_routing() -> None:
+    """
+    Test that unknown and inactive tenants get the TenantNotFoundError 404, cached,
+    while excluded paths are served without a tenant.
+    """
+    loader = FakeLoader({"old.example.com": make_snapshot("old.example.com", False)})
+    app = make_app(loader)
+
+    async with AsyncClient(app=app, base_url="http://nope.example.com") as client:
+        missing = [await client.get("/docs/1") for _ in range(2)]
+        inactive = await client.get("/docs/1", headers={"host": "old.example.com"})
+        health = await client.get("/health/live")
+
+    assert [r.status_code for r in missing] == [404, 404]
+    assert missing[0].json() == {
+        "detail": "Tenant not found for host: nope.example.com"
+    }
+    assert inactive.status_code == 404
+    assert health.json() == {"status": "ok"}
+    assert loader.calls == ["nope.example.com", "old.example.com"]
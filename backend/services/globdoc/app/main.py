@@ -6,6 +6,11 @@ from core.config import settings
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from specter.apiutil.exception_handler import register_handlers
+from specter.apiutil.security import jwks_client
+from specter.cache import cache
+from specter.db.session import replicas, shards, tenant_cache
+from specter.middlewares.sql_instrumentation import SQLInstrumentationMiddleware
+from specter.middlewares.tenant import TenantMiddleware
 
 
 @asynccontextmanager
@@ -20,12 +25,22 @@ async def lifespan(fastapi: FastAPI) -> AsyncGenerator[None, None]:
         None
     """
     try:
+        # LISTEN holds a server connection: bypass the pooler when there is one.
+        await tenant_cache.start_listener(
+            settings.SQLALCHEMY_DIRECT_URI or settings.SQLALCHEMY_DATABASE_URI
+        )
+        await jwks_client.start()
+        await replicas.start()
         yield
     except Exception as e:
         print(f"Unexpected exception encountered: {str(e)}")
         pass
     finally:
-        pass
+        await cache.close()
+        await replicas.close()
+        await shards.close()
+        await jwks_client.close()
+        await tenant_cache.stop_listener()
 
 
 app = FastAPI(
@@ -42,6 +57,22 @@ app = FastAPI(
 # Register Custom Exception/Error Handlers
 register_handlers(app)
 
+# Added first, so that CORS headers are set on its 404 responses as well.
+app.add_middleware(
+    TenantMiddleware,
+    exclude=[
+        path
+        for path in (
+            "/health",
+            app.docs_url,
+            app.redoc_url,
+            app.openapi_url,
+            app.swagger_ui_oauth2_redirect_url,
+        )
+        if path is not None
+    ],
+)
+
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
@@ -51,6 +82,8 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+app.add_middleware(SQLInstrumentationMiddleware)
+
 # MOUNTING ENDPOINTS
 if settings.API_VERSION == "v1":
     from api.v1.api import apiv1_router
@@ -0,0 +1,30 @@
+import secrets
+from typing import Optional
+
+from core.config import settings
+from fastapi import Header, HTTPException, status
+
+
+async def require_admin_key(
+    x_admin_key: Optional[str] = Header(default=None),
+) -> None:
+    """
+    Guards administrative endpoints with the `X-Admin-Key` header.
+
+    Administrative endpoints are disabled altogether unless `ADMIN_API_KEY` is set.
+
+    Args:
+        x_admin_key (Optional[str]): Value of the `X-Admin-Key` request header.
+
+    Raises:
+        HTTPException: 403 if the key is missing, wrong or not configured.
+    """
+    if (
+        not settings.ADMIN_API_KEY
+        or not x_admin_key
+        or not secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrative access denied",
+        )
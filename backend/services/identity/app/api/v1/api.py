@@ -1,4 +1,4 @@
-from api.v1.endpoints import login, register
+from api.v1.endpoints import account_import, jwks, login, refresh_token, register
 from fastapi import APIRouter
 
 apiv1_router = APIRouter()
@@ -6,3 +6,13 @@ apiv1_router = APIRouter()
 apiv1_router.include_router(register.router, prefix="", tags=["Registration (Sign-Up)"])
 
 apiv1_router.include_router(login.router, prefix="", tags=["Authentication (Sign-In)"])
+
+apiv1_router.include_router(
+    refresh_token.router, prefix="", tags=["Authentication (Sign-In)"]
+)
+
+apiv1_router.include_router(jwks.router, prefix="", tags=["Authentication (Keys)"])
+
+apiv1_router.include_router(
+    account_import.router, prefix="", tags=["Administration (Bulk Import)"]
+)
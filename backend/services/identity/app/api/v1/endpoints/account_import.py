@@ -0,0 +1,254 @@
+import asyncio
+import uuid
+from typing import AsyncGenerator, AsyncIterator, List, Tuple, Union, cast
+
+import schemas
+from api.utils.deps import require_admin_key
+from core import security
+from core.config import settings
+from core.hashing import HashingQueueFullError, HashingTimeoutError
+from fastapi import APIRouter, Depends, Request, status
+from pydantic import ValidationError
+from specter import crud
+from specter.apiutil.responses import DuplexStreamingResponse
+from specter.db.session import with_db
+
+router = APIRouter()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+    """
+    Splits a stream of byte chunks into lines, without reading the whole body.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Raw request body chunks.
+
+    Returns:
+        AsyncGenerator[bytes, None]: Lines without their trailing newline.
+    """
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def to_ndjson(result: schemas.AccountImportResult) -> bytes:
+    line: str = result.model_dump_json(exclude_none=True)
+    return (line + "\n").encode("utf-8")
+
+
+async def hash_passwords(
+    passwords: List[str],
+) -> List[Union[str, HashingTimeoutError]]:
+    """
+    Hashes a batch of passwords concurrently on the worker pool.
+
+    Leaves one of the pool's workers to interactive logins (when there is more than
+    one), so they never queue behind a whole batch of import work. A password whose
+    hashing timed out gets the error in place of its hash, failing only its row.
+
+    Args:
+        passwords (List[str]): Plain passwords of the batch.
+
+    Returns:
+        List[Union[str, HashingTimeoutError]]: The hash of each password, in order.
+    """
+    slots = asyncio.Semaphore(max(1, security.password_hasher.max_workers - 1))
+
+    async def hash_password(password: str) -> Union[str, HashingTimeoutError]:
+        async with slots:
+            while True:
+                try:
+                    hashed: str = await security.password_hasher.hash(password=password)
+                    return hashed
+                except HashingQueueFullError:
+                    # Interactive traffic holds the remaining capacity; back off.
+                    await asyncio.sleep(0.05)
+                except HashingTimeoutError as e:
+                    return e
+
+    return list(await asyncio.gather(*(hash_password(p) for p in passwords)))
+
+
+async def import_batch(
+    batch: List[Tuple[int, schemas.RegisterUser]],
+) -> AsyncGenerator[schemas.AccountImportResult, None]:
+    """
+    Validates, hashes and inserts a batch of rows, yielding one result per row.
+
+    Only the passwords of rows passing validation are hashed.
+
+    Args:
+        batch (List[Tuple[int, schemas.RegisterUser]]): Parsed rows and their line numbers.
+
+    Returns:
+        AsyncGenerator[schemas.AccountImportResult, None]: One result per row.
+    """
+    valid: List[Tuple[int, str, schemas.AccountUserCreate]] = []
+    for line, row in batch:
+        try:
+            obj_in = schemas.AccountUserCreate(
+                name=row.name,
+                email=row.email,
+                username=row.username,
+                # Set once the row is known to be valid.
+                password_hash="",
+                country_code=row.country_code,
+                phone=row.phone,
+            )
+        except ValidationError as e:
+            yield schemas.AccountImportResult(
+                line=line,
+                status=schemas.ImportStatus.INVALID,
+                email=row.email,
+                detail=str(e),
+            )
+            continue
+        valid.append((line, row.password, obj_in))
+
+    hashes = await hash_passwords([password for _, password, _ in valid])
+    accepted: List[Tuple[int, schemas.AccountUserCreate]] = []
+    for (line, _, obj_in), password_hash in zip(valid, hashes):
+        if isinstance(password_hash, HashingTimeoutError):
+            yield schemas.AccountImportResult(
+                line=line,
+                status=schemas.ImportStatus.ERROR,
+                email=obj_in.email,
+                detail=password_hash.message,
+            )
+            continue
+        accepted.append(
+            (line, obj_in.model_copy(update={"password_hash": password_hash}))
+        )
+
+    if not accepted:
+        return
+    async with with_db(None) as db:
+        created = await crud.account_user.create_many(
+            db=db, objs_in=[obj_in for _, obj_in in accepted]
+        )
+    for (line, obj_in), account in zip(accepted, created):
+        yield schemas.AccountImportResult(
+            line=line,
+            status=(
+                schemas.ImportStatus.CREATED
+                if account
+                else schemas.ImportStatus.CONFLICT
+            ),
+            email=obj_in.email,
+            id=cast(uuid.UUID, account.id) if account else None,
+            detail=None if account else "Email or username already exists",
+        )
+
+
+async def read_batches(
+    request: Request, batch_size: int
+) -> AsyncGenerator[
+    Union[List[Tuple[int, schemas.RegisterUser]], schemas.AccountImportResult], None
+]:
+    """
+    Parses the NDJSON body into batches of rows, yielding a result right away for
+    every line that is not a valid registration.
+    """
+    batch: List[Tuple[int, schemas.RegisterUser]] = []
+    line = 0
+    async for raw in iter_lines(request.stream()):
+        line += 1
+        if not raw.strip():
+            continue
+        try:
+            batch.append((line, schemas.RegisterUser.model_validate_json(raw)))
+        except ValidationError as e:
+            yield schemas.AccountImportResult(
+                line=line, status=schemas.ImportStatus.INVALID, detail=str(e)
+            )
+            continue
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def stream_import_results(
+    request: Request, batch_size: int
+) -> AsyncGenerator[bytes, None]:
+    """
+    Reads NDJSON registrations from the request body and yields NDJSON results.
+
+    Args:
+        request (Request): FastAPI request whose body is streamed.
+        batch_size (int): Number of rows hashed and inserted together.
+
+    Returns:
+        AsyncGenerator[bytes, None]: One NDJSON result line per input line.
+    """
+    try:
+        async for item in read_batches(request, batch_size):
+            if isinstance(item, schemas.AccountImportResult):
+                yield to_ndjson(item)
+                continue
+            async for result in import_batch(item):
+                yield to_ndjson(result)
+    except Exception as e:
+        # The status line has already been sent; report the failure in-band.
+        yield to_ndjson(
+            schemas.AccountImportResult(
+                status=schemas.ImportStatus.ERROR,
+                detail=f"Import aborted: {str(e)}",
+            )
+        )
+
+
+@router.post(
+    "/admin/accounts/import",
+    summary="Bulk import users from NDJSON",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(require_admin_key)],
+    response_class=DuplexStreamingResponse,
+    responses={
+        200: {
+            "description": "One NDJSON result per input line, streamed as rows are processed",
+            "content": {
+                "application/x-ndjson": {
+                    "example": '{"line":1,"status":"created","email":"jane@example.com",'
+                    '"id":"3f0c..."}\n'
+                    '{"line":2,"status":"conflict","email":"john@example.com",'
+                    '"detail":"Email or username already exists"}\n'
+                }
+            },
+        },
+        403: {
+            "description": "Missing or invalid X-Admin-Key header",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Administrative access denied"}
+                }
+            },
+        },
+    },
+)
+async def import_accounts(request: Request) -> DuplexStreamingResponse:
+    """
+    Bulk-create users (AccountUser) from a newline-delimited JSON body.
+
+    Each input line has the shape of the `/register` payload. The body is consumed as a
+    stream: rows are validated, their passwords hashed across the worker pool, and
+    inserted in batches of `ACCOUNT_IMPORT_BATCH_SIZE` with a multi-row
+    `INSERT ... ON CONFLICT DO NOTHING`. A result line (created, conflict, invalid or
+    error) is streamed back for every input line; duplicates and password hashing
+    timeouts fail their own row only, never the batch.
+
+    Args:
+        request (Request): FastAPI request context; its body is the NDJSON input.
+
+    Returns:
+        DuplexStreamingResponse: NDJSON stream of per-row results.
+    """
+    return DuplexStreamingResponse(
+        stream_import_results(request, batch_size=settings.ACCOUNT_IMPORT_BATCH_SIZE)
+    )
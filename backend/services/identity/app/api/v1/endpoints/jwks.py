@@ -0,0 +1,66 @@
+import hashlib
+import json
+
+from core import security
+from core.config import settings
+from fastapi import APIRouter, Request, Response, status
+
+router = APIRouter()
+
+# The key set only changes with a deployment, so the body and its validator are
+# computed once.
+JWKS_BODY = json.dumps(security.token_signer.jwks, separators=(",", ":")).encode(
+    "utf-8"
+)
+JWKS_ETAG = f'"{hashlib.sha256(JWKS_BODY).hexdigest()[:32]}"'
+
+
+@router.get(
+    "/.well-known/jwks.json",
+    summary="Publish the Token Verification Keys",
+    status_code=status.HTTP_200_OK,
+    response_class=Response,
+    responses={
+        200: {
+            "description": "JSON Web Key Set of the keys signing access tokens",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "keys": [
+                            {
+                                "alg": "RS256",
+                                "kty": "RSA",
+                                "n": "0vx7agoebGcQSuuPiLJXZptN9nndrQmbXEps2aiAFbWhM78L...",
+                                "e": "AQAB",
+                                "kid": "NzbLsXh8uDCcd-6MNwXF4W_7noWXFZAfHkxZsRGC9Xs",
+                                "use": "sig",
+                            }
+                        ]
+                    }
+                }
+            },
+        },
+        304: {"description": "Key set unchanged since the presented ETag"},
+    },
+)
+async def jwks(request: Request) -> Response:
+    """
+    Publish the public keys that verify access tokens, as a JSON Web Key Set.
+
+    Services verify tokens locally by matching the token's `kid` against this key set, so
+    it is fetched rarely: responses are cacheable for `JWKS_MAX_AGE_SECONDS` and carry an
+    ETag, answering conditional requests with 304.
+
+    Args:
+        request (Request): FastAPI request context.
+
+    Returns:
+        Response: The key set, or an empty 304 response.
+    """
+    headers = {
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}",
+        "ETag": JWKS_ETAG,
+    }
+    if request.headers.get("if-none-match") == JWKS_ETAG:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=JWKS_BODY, media_type="application/json", headers=headers)
@@ -1,14 +1,87 @@
+import logging
+import uuid
+from datetime import datetime, timezone
+
 import schemas
 from core import security
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from core.admission import AdmissionRejectedError
+from core.hashing import HashingQueueFullError, HashingTimeoutError
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from specter import crud
-from specter.db.session import get_shared_db
+from specter.crud.shared.crud_account_user import AccountCredentials
+from specter.db.session import get_shared_db, last_login_writer, with_db
 from sqlalchemy.ext.asyncio import AsyncSession
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
+async def rehash_password(account_id: uuid.UUID, password: str, old_hash: str) -> None:
+    """
+    Replaces an outdated password hash with one made with the current parameters.
+
+    Runs as a background task after the login response has been sent. Best effort:
+    if the hashing pool is busy or anything fails, the upgrade is retried on the
+    next login.
+
+    Args:
+        account_id (uuid.UUID): Primary key of the user.
+        password (str): The plaintext password that was just verified.
+        old_hash (str): The stored hash it was verified against.
+    """
+    try:
+        new_hash = await security.password_hasher.hash(password=password)
+        async with with_db(None) as db:
+            await crud.account_user.replace_password_hash(
+                db=db, id=account_id, current_hash=old_hash, new_hash=new_hash
+            )
+    except Exception as e:
+        logger.warning(f"Password rehash for {account_id} failed: {str(e)}")
+
+
+async def authenticate(
+    db: AsyncSession, *, login: str, password: str
+) -> AccountCredentials:
+    """
+    Resolves a login to an active account whose password matches.
+
+    Args:
+        db (AsyncSession): Shared asynchronous database session.
+        login (str): Email or username.
+        password (str): The plaintext password to verify.
+
+    Returns:
+        AccountCredentials: The authenticated account.
+
+    Raises:
+        HTTPException: 404 for an unknown login, 401 for a wrong password and 403
+            for an inactive account.
+    """
+    account = await crud.account_user.get_credentials(db=db, login=login)
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invalid emailId. Reason - Does not exist!",
+        )
+
+    if not await security.password_hasher.verify(
+        plain_password=password, hashed_password=account.password_hash
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect password provided",
+        )
+
+    if not account.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account is inactive",
+        )
+    return account
+
+
 @router.post(
     "/login",
     summary="Generate Access Token to support User Login",
@@ -16,12 +89,13 @@ router = APIRouter()
     status_code=status.HTTP_200_OK,
     responses={
         200: {
-            "description": "User authenticated successfully. Returns access token.",
+            "description": "User authenticated successfully. Returns access and refresh tokens.",
             "content": {
                 "application/json": {
                     "example": {
                         "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6...",
                         "token_type": "bearer",
+                        "refresh_token": "qD3y0ZxJ8b1WzL2m...",
                     }
                 }
             },
@@ -34,6 +108,12 @@ router = APIRouter()
                 }
             },
         },
+        403: {
+            "description": "Authentication succeeded but the account is inactive",
+            "content": {
+                "application/json": {"example": {"detail": "Account is inactive"}}
+            },
+        },
         404: {
             "description": "User not found",
             "content": {
@@ -42,6 +122,26 @@ router = APIRouter()
                 }
             },
         },
+        429: {
+            "description": "Too many attempts for this client or account, retry later",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "Request failed: Too many requests (account limit), retry in 6s"
+                    }
+                }
+            },
+        },
+        503: {
+            "description": "Password verification capacity exhausted, retry later",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "Request failed: Password hashing queue is full (capacity: 64)"
+                    }
+                }
+            },
+        },
         500: {
             "description": "Internal server error",
             "content": {
@@ -54,6 +154,7 @@ router = APIRouter()
 )
 async def login(
     request: Request,
+    background_tasks: BackgroundTasks,
     *,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_shared_db),
@@ -62,42 +163,79 @@ async def login(
     Authenticate a user and generate an access token.
 
     This endpoint validates the user's credentials (email/username and password), and if valid,
-    returns a JWT access token that can be used for authenticated requests. The credentials
-    are checked against the records in the `public.account_user` table.
+    returns a JWT access token that can be used for authenticated requests, along with an
+    opaque refresh token that renews it through `/token/refresh` without the password. The credentials
+    are checked against the records in the `public.account_user` table, matching the
+    submitted username against either the email or the username column.
+
+    Attempts are rate limited per client address and per login, and bounded in
+    concurrency, before any lookup or bcrypt work is done (429 with Retry-After).
+
+    Passwords hashed with outdated parameters (e.g. a lower bcrypt cost) are rehashed
+    after the response has been sent, so the upgrade never delays the login.
 
     Args:
         request (Request): FastAPI request context.
+        background_tasks (BackgroundTasks): Tasks run after the response is sent.
         form_data (OAuth2PasswordRequestForm): Form data containing username and password.
         db (AsyncSession): Shared asynchronous database session.
 
     Returns:
-        JSONResponse: A response containing the access token and token type with HTTP 200 status.
+        JSONResponse: A response containing the access token, token type and refresh token with HTTP 200 status.
     """
     try:
-        account = await crud.account_user.get_by_email(db=db, email=form_data.username)
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Invalid emailId. Reason - Does not exist!",
+        async with security.admission.admit(
+            "login",
+            client=security.admission.client_address(request),
+            account=form_data.username,
+        ):
+            account = await authenticate(
+                db=db, login=form_data.username, password=form_data.password
             )
 
-        if not security.verify_password(
-            plain_password=form_data.password, hashed_password=account.password_hash
-        ):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect password provided",
+            if security.password_hasher.needs_update(account.password_hash):
+                background_tasks.add_task(
+                    rehash_password,
+                    account.id,
+                    form_data.password,
+                    account.password_hash,
+                )
+
+            # Buffered in memory and flushed in batches by the write-behind writer.
+            last_login_writer.record(account.id, datetime.now(timezone.utc))
+
+            refresh_token, token_hash, expires_on = security.create_refresh_token()
+            await crud.refresh_token.issue(
+                db=db,
+                obj_in=schemas.RefreshTokenCreate(
+                    token_hash=token_hash,
+                    account_user_id=account.id,
+                    expires_on=expires_on,
+                ),
             )
 
-        return schemas.Token(
-            access_token=security.create_access_token(
-                subject=account.id,
-                claims={"name": account.name, "email": account.email},
-            ),
-            token_type=schemas.TokenType.BEARER,
-        )
+            return schemas.Token(
+                access_token=security.create_access_token(
+                    subject=account.id,
+                    claims={"name": account.name, "email": account.email},
+                ),
+                token_type=schemas.TokenType.BEARER,
+                refresh_token=refresh_token,
+            )
     except HTTPException as http_exc:
         raise http_exc
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Request failed: {e.message}",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except (HashingQueueFullError, HashingTimeoutError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Request failed: {e.message}",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,102 @@
+import logging
+
+import schemas
+from core import security
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from specter import crud
+from specter.db.session import get_shared_db
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post(
+    "/token/refresh",
+    summary="Renew an Access Token with a Refresh Token",
+    response_model=schemas.Token,
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {
+            "description": "Refresh token accepted. Returns a new access and refresh token.",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6...",
+                        "token_type": "bearer",
+                        "refresh_token": "qD3y0ZxJ8b1WzL2m...",
+                    }
+                }
+            },
+        },
+        401: {
+            "description": "Refresh token unknown, expired, revoked or already used",
+            "content": {
+                "application/json": {"example": {"detail": "Invalid refresh token"}}
+            },
+        },
+        500: {
+            "description": "Internal server error",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Request failed: Unknown error"}
+                }
+            },
+        },
+    },
+)
+async def refresh_access_token(
+    request: Request,
+    *,
+    refresh_in: schemas.TokenRefresh,
+    db: AsyncSession = Depends(get_shared_db),
+) -> schemas.Token:
+    """
+    Exchange a refresh token for a new access token.
+
+    The refresh token is rotated: it is consumed and a new one is returned with the access
+    token, in a single statement against the `public.refresh_token` table. No password is
+    verified. Presenting a token that was already rotated revokes every token descended
+    from the same login, since one of its holders must be an attacker.
+
+    Args:
+        request (Request): FastAPI request context.
+        refresh_in (schemas.TokenRefresh): The refresh token issued at login or last refresh.
+        db (AsyncSession): Shared asynchronous database session.
+
+    Returns:
+        JSONResponse: A response containing the new access and refresh tokens with HTTP 200 status.
+    """
+    try:
+        token_hash = security.hash_refresh_token(refresh_in.refresh_token)
+        refresh_token, new_token_hash, expires_on = security.create_refresh_token()
+        rotated = await crud.refresh_token.rotate(
+            db=db,
+            token_hash=token_hash,
+            new_token_hash=new_token_hash,
+            expires_on=expires_on,
+        )
+        if rotated is None:
+            if await crud.refresh_token.revoke_family(db=db, token_hash=token_hash):
+                logger.warning("Refresh token reuse detected, token family revoked")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token",
+            )
+
+        return schemas.Token(
+            access_token=security.create_access_token(
+                subject=rotated.account_user_id,
+                claims={"name": rotated.name, "email": rotated.email},
+            ),
+            token_type=schemas.TokenType.BEARER,
+            refresh_token=refresh_token,
+        )
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Request failed: {str(e)}",
+        )
@@ -1,5 +1,7 @@
 import schemas
 from core import security
+from core.admission import AdmissionRejectedError
+from core.hashing import HashingQueueFullError, HashingTimeoutError
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
@@ -23,13 +25,33 @@ router = APIRouter()
             },
         },
         400: {
-            "description": "Invalid request (e.g., emailId already exists)",
+            "description": "Invalid request (e.g., emailId or username already exists)",
             "content": {
                 "application/json": {
                     "example": {"detail": "Invalid emailId. Reason - Already exists!"}
                 }
             },
         },
+        429: {
+            "description": "Too many attempts for this client or account, retry later",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "Request failed: Too many requests (account limit), retry in 6s"
+                    }
+                }
+            },
+        },
+        503: {
+            "description": "Password hashing capacity exhausted, retry later",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "Request failed: Password hashing queue is full (capacity: 64)"
+                    }
+                }
+            },
+        },
         500: {
             "description": "Internal server error",
             "content": {
@@ -49,8 +71,10 @@ async def register(
     """
     Register a new user (AccountUser) into the system.
 
-    This endpoint checks for email uniqueness, hashes the password, generates the default username if not provided,
-    and creates the user in the database (public.account_user).
+    This endpoint hashes the password, generates the default username if not provided, and creates the user
+    in the database (public.account_user) with a single `INSERT ... ON CONFLICT DO NOTHING`, so a duplicate
+    email or username (including one from a concurrent sign-up) is reported as 400 without a pre-check query.
+    Attempts are rate limited per client address and per email before the password is hashed (429).
 
     Args:
         request (Request): FastAPI request context.
@@ -61,29 +85,54 @@ async def register(
         JSONResponse: Confirmation message with status code 201.
     """
     try:
-        account = await crud.account_user.get_by_email(db=db, email=register_in.email)
-        if account:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid emailId. Reason - Already exists!",
+        async with security.admission.admit(
+            "register",
+            client=security.admission.client_address(request),
+            account=register_in.email,
+        ):
+            account, conflicts = await crud.account_user.create_or_conflict(
+                db=db,
+                obj_in=schemas.AccountUserCreate(
+                    name=register_in.name,
+                    email=register_in.email,
+                    username=register_in.username,
+                    password_hash=await security.password_hasher.hash(
+                        password=register_in.password
+                    ),
+                    country_code=register_in.country_code,
+                    phone=register_in.phone,
+                ),
+            )
+            if account is None:
+                if conflicts == ["username"]:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Invalid username. Reason - Already exists!",
+                    )
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid emailId. Reason - Already exists!",
+                )
+            return JSONResponse(
+                status_code=status.HTTP_201_CREATED,
+                content=jsonable_encoder(
+                    schemas.Msg(message="Registration successful!")
+                ),
             )
-        await crud.account_user.create(
-            db=db,
-            obj_in=schemas.AccountUserCreate(
-                name=register_in.name,
-                email=register_in.email,
-                username=register_in.username,
-                password_hash=security.get_password_hash(password=register_in.password),
-                country_code=register_in.country_code,
-                phone=register_in.phone,
-            ),
-        )
-        return JSONResponse(
-            status_code=status.HTTP_201_CREATED,
-            content=jsonable_encoder(schemas.Msg(message="Registration successful!")),
-        )
     except HTTPException as http_exc:
         raise http_exc
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Request failed: {e.message}",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except (HashingQueueFullError, HashingTimeoutError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Request failed: {e.message}",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
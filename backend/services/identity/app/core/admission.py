@@ -0,0 +1,263 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, NamedTuple, Optional, Protocol, Tuple
+
+from fastapi import Request
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_REJECTIONS = Counter(
+    "identity_admission_rejections_total",
+    "Credential requests rejected before reaching bcrypt, by scope and reason.",
+    ["scope", "reason"],
+)
+
+
+class AdmissionRejectedError(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        """
+
+        Args:
+            reason: Which limit rejected the request (concurrency, client, account).
+            retry_after: Seconds until the request may be retried.
+        """
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.message = (
+            f"Too many requests ({reason} limit), retry in {self.retry_after}s"
+        )
+        super().__init__(self.message)
+
+
+class TokenBucket(NamedTuple):
+    """
+    Token bucket parameters: up to `burst` requests at once, refilled at
+    `per_minute` requests per minute.
+    """
+
+    burst: int
+    per_minute: float
+
+    @property
+    def per_second(self) -> float:
+        return self.per_minute / 60
+
+
+class RateLimitStore(Protocol):
+    async def take(self, key: str, bucket: TokenBucket) -> float:
+        """
+        Takes one token from the bucket stored under `key`.
+
+        Returns:
+            float: 0 if a token was taken, else seconds until one is available.
+        """
+        ...
+
+
+class MemoryRateLimitStore:
+    """
+    Per-process token buckets. Buckets are evicted in least-recently-used order
+    beyond `max_keys`, so a spray of client addresses cannot exhaust memory.
+    """
+
+    def __init__(self, max_keys: int):
+        """
+
+        Args:
+            max_keys: Maximum number of buckets kept.
+        """
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(self, key: str, bucket: TokenBucket) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(bucket.burst), now))
+        tokens = min(bucket.burst, tokens + (now - updated) * bucket.per_second)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / bucket.per_second
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# Refill and take atomically on the server. The wait is returned as a string since
+# Lua numbers are truncated to integers in Redis replies.
+TAKE_TOKEN_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisRateLimitStore:
+    """
+    Token buckets shared by every replica, kept in any server speaking the Redis
+    protocol (Redis, Valkey, KeyDB, ...). `client` is an asyncio client exposing
+    `eval(script, numkeys, *keys_and_args)`, such as `redis.asyncio.Redis`.
+    """
+
+    def __init__(self, client: Any, prefix: str = "identity:admission:"):
+        """
+
+        Args:
+            client: Asyncio Redis-protocol client.
+            prefix: Prefix of the bucket keys.
+        """
+        self.client = client
+        self.prefix = prefix
+
+    async def take(self, key: str, bucket: TokenBucket) -> float:
+        wait = await self.client.eval(
+            TAKE_TOKEN_SCRIPT,
+            1,
+            self.prefix + key,
+            bucket.burst,
+            bucket.per_second,
+            time.time(),
+        )
+        return float(wait)
+
+
+def create_rate_limit_store(url: Optional[str], max_keys: int) -> RateLimitStore:
+    """
+    Creates the bucket store: in-memory when `url` is unset, else a Redis-protocol
+    store at `url` (requires the `redis` package).
+
+    Args:
+        url: Redis URL, e.g. redis://cache:6379/0.
+        max_keys: Maximum number of buckets kept by the in-memory store.
+
+    Returns:
+        RateLimitStore: The configured store.
+    """
+    if not url:
+        return MemoryRateLimitStore(max_keys=max_keys)
+    try:
+        from redis.asyncio import Redis
+    except ImportError:
+        raise RuntimeError("A Redis admission store requires the `redis` package")
+    return RedisRateLimitStore(Redis.from_url(url))
+
+
+class AdmissionController:
+    """
+    Decides, before any database or bcrypt work, whether a credential request may
+    proceed.
+
+    A request is admitted if fewer than `max_concurrent` requests are in flight and
+    both its client address and its account identifier still have a token. Rejected
+    requests cost nothing but a bucket update, whether or not the account exists.
+    """
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        *,
+        max_concurrent: int,
+        client_bucket: TokenBucket,
+        account_bucket: TokenBucket,
+        client_header: Optional[str] = None,
+    ):
+        """
+
+        Args:
+            store: Where token buckets are kept.
+            max_concurrent: Maximum number of admitted requests in flight.
+            client_bucket: Limits per client address.
+            account_bucket: Limits per account identifier (email or username).
+            client_header: Header listing the client addresses, appended to by a
+                trusted proxy (e.g. X-Forwarded-For).
+        """
+        self.store = store
+        self.max_concurrent = max_concurrent
+        self.client_bucket = client_bucket
+        self.account_bucket = account_bucket
+        self.client_header = client_header
+        self.inflight = 0
+
+    def client_address(self, request: Request) -> Optional[str]:
+        """
+        Returns the address a request comes from: the last address of the
+        `client_header` (the one the trusted proxy saw; those before it are supplied
+        by the client) when present, else the peer address.
+
+        Args:
+            request: The incoming request.
+
+        Returns:
+            Optional[str]: The client address, or None if unknown.
+        """
+        if self.client_header:
+            forwarded = request.headers.get(self.client_header, "")
+            address = forwarded.rsplit(",", 1)[-1].strip()
+            if address:
+                return address
+        return request.client.host if request.client else None
+
+    @asynccontextmanager
+    async def admit(
+        self, scope: str, *, client: Optional[str], account: str
+    ) -> AsyncIterator[None]:
+        """
+        Holds a concurrency slot for the duration of the block.
+
+        Args:
+            scope: Name of the guarded operation (e.g. login), keeping its buckets
+                apart from other operations.
+            client: Client address, or None if unknown.
+            account: Account identifier the request is for.
+
+        Raises:
+            AdmissionRejectedError: if a limit is exceeded.
+        """
+        if self.inflight >= self.max_concurrent:
+            self._reject(scope, "concurrency", 1)
+        self.inflight += 1
+        try:
+            if client is not None:
+                await self._take(scope, "client", client, self.client_bucket)
+            await self._take(scope, "account", account.lower(), self.account_bucket)
+            yield
+        finally:
+            self.inflight -= 1
+
+    async def _take(
+        self, scope: str, reason: str, identifier: str, bucket: TokenBucket
+    ) -> None:
+        try:
+            wait = await self.store.take(f"{scope}:{reason}:{identifier}", bucket)
+        except Exception as e:
+            # Fail open: the concurrency cap still bounds the CPU spent on bcrypt.
+            logger.warning(f"Admission store unavailable: {str(e)}")
+            return
+        if wait > 0:
+            self._reject(scope, reason, wait)
+
+    def _reject(self, scope: str, reason: str, retry_after: float) -> None:
+        ADMISSION_REJECTIONS.labels(scope=scope, reason=reason).inc()
+        raise AdmissionRejectedError(reason=reason, retry_after=retry_after)
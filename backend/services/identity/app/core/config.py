@@ -1,6 +1,6 @@
 import os
-import secrets
 from functools import lru_cache
+from typing import List, Optional
 
 import schemas
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -22,7 +22,38 @@ def retrieve_settings() -> BaseSettings:
 
 class Settings(CommonSettings):  # type: ignore[misc]
     ACCESS_TOKEN_EXPIRE_MINUTES: int
-    SECRET_KEY: str = secrets.token_urlsafe(32)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # PEM encoded RSA private key signing access tokens (RS256). Unset: an ephemeral
+    # key is generated at startup, which only suits a single local instance.
+    JWT_PRIVATE_KEY: Optional[str] = None
+    # PEM encoded public keys of retired signing keys, still published in the JWKS.
+    JWT_PUBLISHED_KEYS: List[str] = []
+    JWKS_MAX_AGE_SECONDS: int = 300
+
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 1
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = 5.0
+    # Unset: calibrated at startup to the highest cost meeting BCRYPT_TARGET_MS.
+    BCRYPT_ROUNDS: Optional[int] = None
+    BCRYPT_TARGET_MS: float = 50.0
+    BCRYPT_MIN_ROUNDS: int = 10
+    BCRYPT_MAX_ROUNDS: int = 16
+
+    # Unset: in-memory buckets per process; else a redis:// URL shared by replicas.
+    ADMISSION_STORE_URL: Optional[str] = None
+    ADMISSION_MEMORY_MAX_KEYS: int = 100_000
+    # Unset: the password hashing capacity (workers + queue).
+    ADMISSION_MAX_CONCURRENT: Optional[int] = None
+    ADMISSION_CLIENT_BURST: int = 20
+    ADMISSION_CLIENT_PER_MINUTE: float = 60
+    ADMISSION_ACCOUNT_BURST: int = 5
+    ADMISSION_ACCOUNT_PER_MINUTE: float = 10
+    # Header listing the client addresses, appended to by a trusted proxy (e.g.
+    # X-Forwarded-For); requests without it are limited by their peer address.
+    ADMISSION_CLIENT_HEADER: Optional[str] = None
+
+    ADMIN_API_KEY: Optional[str] = None
+    ACCOUNT_IMPORT_BATCH_SIZE: int = 500
 
 
 class TestSettings(Settings):
@@ -0,0 +1,310 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import statistics
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Optional, TypeVar, cast
+
+from passlib.context import CryptContext
+from prometheus_client import Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+T = TypeVar("T")
+
+HASH_QUEUE_DEPTH = Gauge(
+    "identity_password_hash_queue_depth",
+    "Number of password hashing operations waiting for a free worker process.",
+)
+HASH_DURATION = Histogram(
+    "identity_password_hash_duration_seconds",
+    "Wall-clock time of password hashing operations, including queueing.",
+    ["operation"],
+)
+
+
+class HashingQueueFullError(Exception):
+    def __init__(self, capacity: int):
+        """
+
+        Args:
+            capacity:
+        """
+        self.message = f"Password hashing queue is full (capacity: {capacity})"
+        super().__init__(self.message)
+
+
+class HashingTimeoutError(Exception):
+    def __init__(self, timeout: float):
+        """
+
+        Args:
+            timeout:
+        """
+        self.message = f"Password hashing did not complete within {timeout}s"
+        super().__init__(self.message)
+
+
+@lru_cache()
+def _context_for(rounds: Optional[int]) -> CryptContext:
+    """
+    Returns a context hashing with `rounds`, and flagging hashes made with fewer
+    rounds as needing an update. Hashes with more rounds are left alone, so pods
+    calibrated on faster hardware do not get their hashes downgraded by slower ones.
+    """
+    if rounds is None:
+        return pwd_context
+    return pwd_context.copy(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+
+def calibrate_rounds(
+    target_ms: float, min_rounds: int, max_rounds: int, samples: int = 5
+) -> int:
+    """
+    Finds the highest bcrypt cost whose median hash time stays within `target_ms`.
+
+    Each additional round doubles the hashing time, so rounds are tried in
+    increasing order until the budget is exceeded. `min_rounds` is a security floor
+    and is returned even if it is already over budget.
+
+    Args:
+        target_ms: Latency budget of a single hash, in milliseconds (p50).
+        min_rounds: Lowest acceptable cost.
+        max_rounds: Highest cost to consider.
+        samples: Number of hashes timed per cost.
+
+    Returns:
+        int: The calibrated cost.
+    """
+
+    def p50_ms(rounds: int) -> float:
+        context = _context_for(rounds)
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            context.hash("calibration-password")
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    rounds = min_rounds
+    while rounds < max_rounds and p50_ms(rounds + 1) <= target_ms:
+        rounds += 1
+    return rounds
+
+
+def _verify_in_worker(plain_password: str, hashed_password: str) -> bool:
+    """
+    Worker-process entrypoint for password verification.
+
+    Kept at module level (and free of any settings import) so that it can be
+    pickled by reference and imported cheaply by spawned worker processes.
+    """
+    return cast(bool, pwd_context.verify(plain_password, hashed_password))
+
+
+def _hash_in_worker(password: str, rounds: Optional[int] = None) -> str:
+    """
+    Worker-process entrypoint for password hashing.
+    """
+    return cast(str, _context_for(rounds).hash(password))
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt verify/hash on a process pool so the event loop never blocks on them.
+
+    Submissions beyond `max_workers + max_queue` in-flight operations are rejected
+    immediately with `HashingQueueFullError` instead of piling up behind the pool,
+    and every call is bounded by `timeout` seconds.
+
+    New hashes use `rounds` as the bcrypt cost (the library default when unset,
+    until `calibrate` picks one for the current hardware).
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        timeout: float,
+        rounds: Optional[int] = None,
+    ):
+        """
+
+        Args:
+            max_workers: Number of worker processes.
+            max_queue: Number of operations allowed to wait for a free worker.
+            timeout: Per-call timeout in seconds, including time spent queued.
+            rounds: bcrypt cost of new hashes.
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Number of submitted operations that are not yet running on a worker.
+        """
+        return max(0, self._inflight - self.max_workers)
+
+    def start(self) -> None:
+        """
+        Creates the worker pool. Called from the service lifespan; `verify`/`hash`
+        also start it lazily so the hasher works without a lifespan (e.g. in tests).
+        """
+        self._get_executor()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops the worker pool, cancelling operations that have not started yet.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    async def calibrate(
+        self, target_ms: float, min_rounds: int, max_rounds: int
+    ) -> int:
+        """
+        Measures hashing on a worker process and adopts the highest bcrypt cost that
+        meets the latency budget. Called from the service lifespan when no cost is
+        configured explicitly.
+
+        Args:
+            target_ms: Latency budget of a single hash, in milliseconds (p50).
+            min_rounds: Lowest acceptable cost.
+            max_rounds: Highest cost to consider.
+
+        Returns:
+            int: The adopted cost.
+        """
+        future = self._get_executor().submit(
+            calibrate_rounds, target_ms, min_rounds, max_rounds
+        )
+        rounds: int = await asyncio.wrap_future(future)
+        self.rounds = rounds
+        logger.info(f"Calibrated bcrypt cost to {rounds} rounds ({target_ms}ms)")
+        return rounds
+
+    def needs_update(self, hashed_password: str) -> bool:
+        """
+        Tells whether a stored hash was made with weaker parameters than new hashes
+        get. Cheap: only parses the hash, and does not touch the worker pool.
+
+        Args:
+            hashed_password (str): The stored, hashed password.
+
+        Returns:
+            bool: True if the hash should be replaced after a successful verify.
+        """
+        try:
+            return cast(bool, _context_for(self.rounds).needs_update(hashed_password))
+        except ValueError:
+            # Not a hash this context recognises; verify() rejects it anyway.
+            return False
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verifies a plaintext password against its hash on the worker pool.
+
+        Args:
+            plain_password (str): The raw password input provided by the user.
+            hashed_password (str): The stored, hashed password to compare against.
+
+        Returns:
+            bool: True if the password is valid, False otherwise.
+
+        Raises:
+            HashingQueueFullError: if the pool and its queue are saturated.
+            HashingTimeoutError: if the operation does not finish in time.
+        """
+        return await self._run(
+            "verify", _verify_in_worker, plain_password, hashed_password
+        )
+
+    async def hash(self, password: str) -> str:
+        """
+        Hashes a plaintext password on the worker pool.
+
+        Args:
+            password (str): The plaintext password to hash.
+
+        Returns:
+            str: A securely hashed password suitable for storage.
+
+        Raises:
+            HashingQueueFullError: if the pool and its queue are saturated.
+            HashingTimeoutError: if the operation does not finish in time.
+        """
+        return await self._run("hash", _hash_in_worker, password, self.rounds)
+
+    async def _run(self, operation: str, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            if self._inflight >= self.capacity:
+                raise HashingQueueFullError(capacity=self.capacity)
+            self._inflight += 1
+            HASH_QUEUE_DEPTH.set(self.queue_depth)
+
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is released when the worker is actually done (or the call was
+        # cancelled before starting), not when the caller stops waiting, so that
+        # timed-out work still counts against the queue bound.
+        future.add_done_callback(self._release)
+
+        try:
+            # shield() keeps wait_for from cancelling the underlying future; a
+            # timed-out call is cancelled explicitly below, which only succeeds
+            # if it never reached a worker.
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise HashingTimeoutError(timeout=self.timeout)
+        finally:
+            HASH_DURATION.labels(operation=operation).observe(
+                time.perf_counter() - started
+            )
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _release(self, _future: Optional["Future[Any]"] = None) -> None:
+        with self._lock:
+            self._inflight -= 1
+            HASH_QUEUE_DEPTH.set(self.queue_depth)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Print the bcrypt cost meeting a latency budget on this machine."
+    )
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=16)
+    args = parser.parse_args()
+    print(calibrate_rounds(args.target_ms, args.min_rounds, args.max_rounds))
@@ -1,13 +1,37 @@
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, Union, cast
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple, Union
 
+from core.admission import AdmissionController, TokenBucket, create_rate_limit_store
 from core.config import settings
-from jose import jwt
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-ALGORITHM = "HS256"
+from core.hashing import PasswordHasher
+from core.signing import create_signer
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    timeout=settings.PASSWORD_HASH_TIMEOUT_SECONDS,
+    rounds=settings.BCRYPT_ROUNDS,
+)
+
+admission = AdmissionController(
+    create_rate_limit_store(
+        settings.ADMISSION_STORE_URL, max_keys=settings.ADMISSION_MEMORY_MAX_KEYS
+    ),
+    max_concurrent=settings.ADMISSION_MAX_CONCURRENT or password_hasher.capacity,
+    client_bucket=TokenBucket(
+        burst=settings.ADMISSION_CLIENT_BURST,
+        per_minute=settings.ADMISSION_CLIENT_PER_MINUTE,
+    ),
+    account_bucket=TokenBucket(
+        burst=settings.ADMISSION_ACCOUNT_BURST,
+        per_minute=settings.ADMISSION_ACCOUNT_PER_MINUTE,
+    ),
+    client_header=settings.ADMISSION_CLIENT_HEADER,
+)
+
+token_signer = create_signer(settings.JWT_PRIVATE_KEY, settings.JWT_PUBLISHED_KEYS)
 
 
 def create_access_token(
@@ -18,7 +42,8 @@ def create_access_token(
     Creates a JSON Web Token (JWT) for the given subject (usually a user identifier).
 
     The token includes an expiration time and optional user-specific claims. It is signed
-    using the application's secret key and is intended for authentication purposes.
+    with the service's RSA key (RS256, with its `kid` in the header), so other services
+    verify it locally against the published key set.
 
     Args:
         subject (Union[str, Any]): Identifier for the token subject, typically a user ID or email.
@@ -32,15 +57,45 @@ def create_access_token(
     to_encode = {"exp": expire, "sub": str(subject), "aud": "account"}
     if claims:
         to_encode.update({"claims": claims})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return token_signer.sign(to_encode)
+
+
+def create_refresh_token() -> Tuple[str, str, datetime]:
+    """
+    Generates an opaque refresh token.
 
+    The token carries 256 bits of randomness, so a single SHA-256 digest is enough
+    to store it safely; unlike passwords it needs no slow hash.
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+    Returns:
+        Tuple[str, str, datetime]: The token handed to the client, the digest to
+        store, and its expiry.
+    """
+    token = secrets.token_urlsafe(32)
+    expires_on = datetime.now(timezone.utc) + timedelta(
+        days=settings.REFRESH_TOKEN_EXPIRE_DAYS
+    )
+    return token, hash_refresh_token(token), expires_on
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Digests a refresh token for storage and lookup.
+
+    Args:
+        token (str): The refresh token presented by the client.
+
+    Returns:
+        str: Hex SHA-256 digest of the token.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies whether a plaintext password matches its hashed counterpart.
 
-    Uses the configured password hashing context to perform secure comparison.
+    Runs on the password hashing worker pool (`password_hasher`), off the event loop.
 
     Args:
         plain_password (str): The raw password input provided by the user.
@@ -48,18 +103,29 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
     Returns:
         bool: True if the password is valid, False otherwise.
+
+    Raises:
+        HashingQueueFullError: if the pool and its queue are saturated.
+        HashingTimeoutError: if the operation does not finish in time.
     """
-    return cast(bool, pwd_context.verify(plain_password, hashed_password))
+    valid: bool = await password_hasher.verify(plain_password, hashed_password)
+    return valid
 
 
-def get_password_hash(password: str) -> str:
+async def get_password_hash(password: str) -> str:
     """
-    Hashes a plaintext password using the application's password hashing context.
+    Hashes a plaintext password on the password hashing worker pool
+    (`password_hasher`), with its calibrated bcrypt cost.
 
     Args:
         password (str): The plaintext password to hash.
 
     Returns:
         str: A securely hashed password suitable for storage.
+
+    Raises:
+        HashingQueueFullError: if the pool and its queue are saturated.
+        HashingTimeoutError: if the operation does not finish in time.
     """
-    return cast(str, pwd_context.hash(password))
+    hashed: str = await password_hasher.hash(password)
+    return hashed
@@ -0,0 +1,119 @@
+import base64
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+from jose import jwk, jwt
+from jose.backends.base import Key
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = "RS256"
+
+
+def key_id(public_jwk: Dict[str, Any]) -> str:
+    """
+    Derives a key ID from a public RSA JWK: its RFC 7638 thumbprint. Every replica
+    holding the same key computes the same ID without any configuration.
+    """
+    canonical = json.dumps(
+        {name: public_jwk[name] for name in ("e", "kty", "n")},
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(canonical.encode("utf-8")).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def public_jwk(pem: str) -> Dict[str, Any]:
+    """
+    Returns the public JWK, including its `kid`, of a PEM encoded RSA key. Private
+    keys are reduced to their public half.
+    """
+    key = jwk.construct(pem, algorithm=ALGORITHM)
+    if not key.is_public():
+        key = key.public_key()
+    public = key.to_dict()
+    return {**public, "kid": key_id(public), "use": "sig"}
+
+
+class TokenSigner:
+    """
+    Signs JWTs with an RSA private key and publishes the matching key set.
+
+    Every token carries the `kid` of the signing key. Public keys of retired signing
+    keys stay in the key set (`published_keys`) until the tokens they signed have
+    expired, so keys can be rotated without invalidating sessions.
+    """
+
+    def __init__(self, private_key: str, published_keys: Sequence[str] = ()):
+        """
+
+        Args:
+            private_key: PEM encoded RSA private key used for signing.
+            published_keys: PEM encoded public keys of retired signing keys.
+        """
+        self._key: Key = jwk.construct(private_key, algorithm=ALGORITHM)
+        signing_jwk = public_jwk(private_key)
+        self.kid: str = signing_jwk["kid"]
+        keys: List[Dict[str, Any]] = [signing_jwk]
+        for pem in published_keys:
+            published = public_jwk(pem)
+            if published["kid"] != self.kid:
+                keys.append(published)
+        self.jwks: Dict[str, Any] = {"keys": keys}
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        """
+        Encodes and signs a JWT.
+
+        Args:
+            claims: Payload of the token.
+
+        Returns:
+            str: The compact serialized token.
+        """
+        return str(
+            jwt.encode(
+                claims, self._key, algorithm=ALGORITHM, headers={"kid": self.kid}
+            )
+        )
+
+
+def generate_private_key() -> str:
+    """
+    Generates a throwaway 2048-bit RSA private key, PEM encoded.
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode("ascii")
+
+
+def create_signer(
+    private_key: Optional[str], published_keys: Sequence[str] = ()
+) -> TokenSigner:
+    """
+    Creates the token signer from configuration.
+
+    Without a configured key an ephemeral one is generated, which is only suitable
+    for a single local instance: tokens do not survive a restart and replicas cannot
+    verify each other's tokens.
+
+    Args:
+        private_key: PEM encoded RSA private key, if configured.
+        published_keys: PEM encoded public keys of retired signing keys.
+
+    Returns:
+        TokenSigner: The signer.
+    """
+    if not private_key:
+        logger.warning("JWT_PRIVATE_KEY is not set, signing with an ephemeral key")
+        private_key = generate_private_key()
+    return TokenSigner(private_key, published_keys)
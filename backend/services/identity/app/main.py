@@ -2,10 +2,15 @@ from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from api.health import health_api
+from core import security
 from core.config import settings
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from specter.apiutil.exception_handler import register_handlers
+from specter.cache import cache
+from specter.db.session import last_login_writer, replicas, shards
+from specter.db.tenant_provisioning import tenant_provisioner
+from specter.middlewares.sql_instrumentation import SQLInstrumentationMiddleware
 
 
 @asynccontextmanager
@@ -20,12 +25,27 @@ async def lifespan(fastapi: FastAPI) -> AsyncGenerator[None, None]:
         None
     """
     try:
+        security.password_hasher.start()
+        if settings.BCRYPT_ROUNDS is None:
+            await security.password_hasher.calibrate(
+                target_ms=settings.BCRYPT_TARGET_MS,
+                min_rounds=settings.BCRYPT_MIN_ROUNDS,
+                max_rounds=settings.BCRYPT_MAX_ROUNDS,
+            )
+        last_login_writer.start()
+        await replicas.start()
+        await tenant_provisioner.start()
         yield
     except Exception as e:
         print(f"Unexpected exception encountered: {str(e)}")
         pass
     finally:
-        pass
+        await cache.close()
+        await tenant_provisioner.close()
+        await replicas.close()
+        await shards.close()
+        await last_login_writer.close()
+        security.password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -51,6 +71,8 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+app.add_middleware(SQLInstrumentationMiddleware)
+
 # MOUNTING ENDPOINTS
 if settings.API_VERSION == "v1":
     from api.v1.api import apiv1_router
@@ -5,6 +5,8 @@ from specter.schemas import (
     HealthResponse,
     HealthStatus,
     Msg,
+    RefreshTokenCreate,
 )
+from .account_import import AccountImportResult, ImportStatus
 from .register import RegisterUser
-from .token import Token, TokenPayload, TokenType
+from .token import Token, TokenPayload, TokenRefresh, TokenType
@@ -0,0 +1,20 @@
+import uuid
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ImportStatus(str, Enum):
+    CREATED = "created"
+    CONFLICT = "conflict"
+    INVALID = "invalid"
+    ERROR = "error"
+
+
+class AccountImportResult(BaseModel):
+    line: Optional[int] = None
+    status: ImportStatus
+    email: Optional[str] = None
+    id: Optional[uuid.UUID] = None
+    detail: Optional[str] = None
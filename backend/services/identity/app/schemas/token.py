@@ -12,6 +12,11 @@ class TokenType(str, Enum):
 class Token(BaseModel):
     access_token: str
     token_type: TokenType
+    refresh_token: Optional[str] = None
+
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
 
 
 class TokenPayload(BaseModel):
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from api.v1.endpoints.account_import import hash_passwords
+from core.hashing import HashingTimeoutError
+from fastapi import status
+from httpx import AsyncClient
+
+
+@asynccontextmanager
+async def fake_db(_tenant_schema: None) -> AsyncGenerator[MagicMock, None]:
+    yield MagicMock()
+
+
+def ndjson(*rows: object) -> str:
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows)
+
+
+@pytest.mark.asyncio
+@patch("api.utils.deps.settings.ADMIN_API_KEY", "test-admin-key")
+async def test_import_requires_admin_key(async_client: AsyncClient) -> None:
+    """
+    Test case: Missing admin key
+
+    Simulates a bulk import without the X-Admin-Key header,
+    expecting a 403 Forbidden before the body is processed.
+    """
+    response = await async_client.post(
+        "/api/v1/admin/accounts/import", content=ndjson({"name": "x"})
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert response.json()["detail"] == "Administrative access denied"
+
+
+@pytest.mark.asyncio
+@patch("api.utils.deps.settings.ADMIN_API_KEY", "test-admin-key")
+@patch("api.v1.endpoints.account_import.with_db", fake_db)
+@patch(
+    "api.v1.endpoints.account_import.security.password_hasher.hash",
+    new_callable=AsyncMock,
+    return_value="mocked-hash",
+)
+@patch("specter.crud.account_user.create_many", new_callable=AsyncMock)
+async def test_import_streams_per_row_results(
+    mock_create_many: AsyncMock,
+    mock_hash: AsyncMock,
+    async_client: AsyncClient,
+) -> None:
+    """
+    Test case: Mixed import
+
+    Simulates importing a created row, a malformed line and a duplicate row,
+    expecting one NDJSON result per line and a single batched insert.
+    """
+    created_id = uuid.uuid4()
+    mock_create_many.return_value = [MagicMock(id=created_id), None]
+    row = {
+        "name": "Jane Doe",
+        "password": "securepassword123",
+        "country_code": "IN",
+        "phone": "9876543210",
+    }
+
+    response = await async_client.post(
+        "/api/v1/admin/accounts/import",
+        headers={"X-Admin-Key": "test-admin-key"},
+        content=ndjson(
+            {**row, "email": "jane@example.com"},
+            "{not json",
+            {**row, "email": "john@example.com"},
+        ),
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r["line"], r["status"]) for r in results] == [
+        (2, "invalid"),
+        (1, "created"),
+        (3, "conflict"),
+    ]
+    assert results[1]["id"] == str(created_id)
+    assert mock_hash.await_count == 2
+    mock_create_many.assert_awaited_once()
+    call = mock_create_many.await_args
+    assert call is not None and len(call.kwargs["objs_in"]) == 2
+
+
+@pytest.mark.asyncio
+@patch("api.utils.deps.settings.ADMIN_API_KEY", "test-admin-key")
+@patch("api.v1.endpoints.account_import.with_db", fake_db)
+@patch(
+    "api.v1.endpoints.account_import.security.password_hasher.hash",
+    new_callable=AsyncMock,
+)
+@patch("specter.crud.account_user.create_many", new_callable=AsyncMock)
+async def test_import_fails_invalid_and_timed_out_rows_only(
+    mock_create_many: AsyncMock,
+    mock_hash: AsyncMock,
+    async_client: AsyncClient,
+) -> None:
+    """
+    Test case: Invalid phone and hashing timeout
+
+    Simulates importing a row with an invalid phone number, a row whose password
+    hashing times out and a valid row, expecting the invalid row to be rejected
+    without hashing its password, the timed-out row to be reported as an error,
+    and only the valid row to be inserted.
+    """
+
+    async def fake_hash(password: str) -> str:
+        if password == "slowpassword123":
+            raise HashingTimeoutError(5)
+        return f"hash of {password}"
+
+    mock_hash.side_effect = fake_hash
+    mock_create_many.return_value = [MagicMock(id=uuid.uuid4())]
+    row = {"name": "Jane Doe", "country_code": "IN", "phone": "9876543210"}
+
+    response = await async_client.post(
+        "/api/v1/admin/accounts/import",
+        headers={"X-Admin-Key": "test-admin-key"},
+        content=ndjson(
+            {
+                **row,
+                "email": "bad@example.com",
+                "password": "badpassword1",
+                "phone": "1",
+            },
+            {**row, "email": "slow@example.com", "password": "slowpassword123"},
+            {**row, "email": "jane@example.com", "password": "securepassword123"},
+        ),
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r["line"], r["status"]) for r in results] == [
+        (1, "invalid"),
+        (2, "error"),
+        (3, "created"),
+    ]
+    assert "did not complete" in results[1]["detail"]
+    assert sorted(call.kwargs["password"] for call in mock_hash.await_args_list) == [
+        "securepassword123",
+        "slowpassword123",
+    ]
+    call = mock_create_many.await_args
+    assert call is not None
+    [obj_in] = call.kwargs["objs_in"]
+    assert obj_in.password_hash == "hash of securepassword123"
+
+
+@pytest.mark.asyncio
+@patch(
+    "api.v1.endpoints.account_import.security.password_hasher.max_workers",
+    3,
+)
+@patch(
+    "api.v1.endpoints.account_import.security.password_hasher.hash",
+    new_callable=AsyncMock,
+)
+async def test_hash_passwords_leaves_a_worker_to_logins(mock_hash: AsyncMock) -> None:
+    """
+    Test case: Bounded import hashing
+
+    Simulates hashing a batch larger than the pool, expecting at most all but one
+    of its workers to be used by the import at a time.
+    """
+    running = peak = 0
+
+    async def fake_hash(password: str) -> str:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return password
+
+    mock_hash.side_effect = fake_hash
+
+    assert await hash_passwords([str(i) for i in range(6)]) == [
+        str(i) for i in range(6)
+    ]
+    assert peak == 2
@@ -0,0 +1,46 @@
+import pytest
+from core import security
+from fastapi import status
+from httpx import AsyncClient
+from jose import jwt
+
+
+@pytest.mark.asyncio
+async def test_jwks_publishes_signing_key(async_client: AsyncClient) -> None:
+    """
+    Test case: Fetch the key set
+
+    The key set is cacheable and contains the key that signs access tokens, so a
+    token can be verified with it alone.
+    """
+    response = await async_client.get("/api/v1/.well-known/jwks.json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+    assert response.headers["ETag"]
+    token = security.create_access_token(subject="user123")
+    header = jwt.get_unverified_header(token)
+    assert header["alg"] == "RS256"
+    keys = {key["kid"]: key for key in response.json()["keys"]}
+    claims = jwt.decode(
+        token, keys[header["kid"]], algorithms=["RS256"], audience="account"
+    )
+    assert claims["sub"] == "user123"
+
+
+@pytest.mark.asyncio
+async def test_jwks_honours_if_none_match(async_client: AsyncClient) -> None:
+    """
+    Test case: Revalidate a cached key set
+
+    A request presenting the current ETag gets an empty 304 response.
+    """
+    first = await async_client.get("/api/v1/.well-known/jwks.json")
+
+    response = await async_client.get(
+        "/api/v1/.well-known/jwks.json",
+        headers={"If-None-Match": first.headers["ETag"]},
+    )
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
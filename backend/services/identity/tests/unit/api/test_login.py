@@ -1,36 +1,50 @@
+import uuid
 from typing import Any
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import schemas
+from core import security
+from core.admission import TokenBucket
+from core.hashing import HashingQueueFullError
 from fastapi import status
 from httpx import AsyncClient
+from specter.crud.shared.crud_account_user import AccountCredentials
 
 
 @pytest.mark.asyncio
-@patch("specter.crud.account_user.get_by_email", new_callable=AsyncMock)
-@patch("core.security.verify_password", return_value=True)
+@patch("specter.crud.account_user.get_credentials", new_callable=AsyncMock)
+@patch(
+    "core.security.password_hasher.verify", new_callable=AsyncMock, return_value=True
+)
 @patch("core.security.create_access_token", return_value="mocked-token")
+@patch("api.v1.endpoints.login.last_login_writer.record")
+@patch("specter.crud.refresh_token.issue", new_callable=AsyncMock)
 async def test_successful_login(
+    mock_issue_refresh_token: AsyncMock,
+    mock_record_login: MagicMock,
     mock_create_token: Any,
     mock_verify_password: Any,
-    mock_get_by_email: AsyncMock,
+    mock_get_credentials: AsyncMock,
     async_client: AsyncClient,
 ) -> None:
     """
     Test case: Successful login
 
     Simulates a valid user login scenario with correct email and password,
-    returning a 200 status code and a JWT access token.
+    returning a 200 status code, a JWT access token and a refresh token whose
+    digest is stored.
     """
-    mock_get_by_email.return_value = type(
+    account_id = uuid.uuid4()
+    mock_get_credentials.return_value = type(
         "User",
         (),
         {
-            "id": "user123",
+            "id": account_id,
             "name": "Jane Doe",
             "email": "jane@example.com",
             "password_hash": "hashed",
+            "is_active": True,
         },
     )()
 
@@ -41,16 +55,20 @@ async def test_successful_login(
     )
 
     assert response.status_code == 200
-    assert response.json() == {
-        "access_token": "mocked-token",
-        "token_type": schemas.TokenType.BEARER.value,
-    }
+    body = response.json()
+    assert body["access_token"] == "mocked-token"
+    assert body["token_type"] == schemas.TokenType.BEARER.value
+    stored = mock_issue_refresh_token.call_args.kwargs["obj_in"]
+    assert stored.account_user_id == account_id
+    assert stored.token_hash == security.hash_refresh_token(body["refresh_token"])
+    mock_record_login.assert_called_once()
+    assert mock_record_login.call_args.args[0] == account_id
 
 
 @pytest.mark.asyncio
-@patch("specter.crud.account_user.get_by_email")
+@patch("specter.crud.account_user.get_credentials")
 async def test_user_not_found(
-    mock_get_by_email: AsyncMock, async_client: AsyncClient
+    mock_get_credentials: AsyncMock, async_client: AsyncClient
 ) -> None:
     """
     Test case: User not found
@@ -58,7 +76,7 @@ async def test_user_not_found(
     Simulates login attempt with an email that does not exist,
     expecting a 404 Not Found with appropriate error detail.
     """
-    mock_get_by_email.return_value = None
+    mock_get_credentials.return_value = None
 
     response = await async_client.post(
         "/api/v1/login",
@@ -71,11 +89,13 @@ async def test_user_not_found(
 
 
 @pytest.mark.asyncio
-@patch("specter.crud.account_user.get_by_email", new_callable=AsyncMock)
-@patch("core.security.verify_password", return_value=False)
+@patch("specter.crud.account_user.get_credentials", new_callable=AsyncMock)
+@patch(
+    "core.security.password_hasher.verify", new_callable=AsyncMock, return_value=False
+)
 async def test_incorrect_password(
     mock_verify_password: Any,
-    mock_get_by_email: AsyncMock,
+    mock_get_credentials: AsyncMock,
     async_client: AsyncClient,
 ) -> None:
     """
@@ -84,7 +104,7 @@ async def test_incorrect_password(
     Simulates a login attempt with a valid user but incorrect password,
     expecting a 401 Unauthorized with appropriate error detail.
     """
-    mock_get_by_email.return_value = type(
+    mock_get_credentials.return_value = type(
         "User",
         (),
         {
@@ -92,6 +112,7 @@ async def test_incorrect_password(
             "name": "Jane Doe",
             "email": "jane@example.com",
             "password_hash": "hashed",
+            "is_active": True,
         },
     )()
 
@@ -106,9 +127,9 @@ async def test_incorrect_password(
 
 
 @pytest.mark.asyncio
-@patch("specter.crud.account_user.get_by_email")
+@patch("specter.crud.account_user.get_credentials")
 async def test_internal_server_error(
-    mock_get_by_email: AsyncMock,
+    mock_get_credentials: AsyncMock,
     async_client: AsyncClient,
 ) -> None:
     """
@@ -117,7 +138,7 @@ async def test_internal_server_error(
     Simulates an unexpected server-side error (e.g., DB connection issue),
     expecting a 500 Internal Server Error with appropriate detail.
     """
-    mock_get_by_email.side_effect = Exception("Database error")
+    mock_get_credentials.side_effect = Exception("Database error")
 
     response = await async_client.post(
         "/api/v1/login",
@@ -127,3 +148,153 @@ async def test_internal_server_error(
 
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     assert "Request failed" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+@patch("specter.crud.account_user.get_credentials", new_callable=AsyncMock)
+@patch(
+    "core.security.password_hasher.verify",
+    new_callable=AsyncMock,
+    side_effect=HashingQueueFullError(capacity=4),
+)
+async def test_login_hashing_queue_full(
+    mock_verify_password: AsyncMock,
+    mock_get_credentials: AsyncMock,
+    async_client: AsyncClient,
+) -> None:
+    """
+    Test case: Password hashing pool saturated
+
+    Simulates a login while the hashing pool and its queue are full,
+    expecting a fast 503 Service Unavailable with a Retry-After header.
+    """
+    mock_get_credentials.return_value = type(
+        "User",
+        (),
+        {
+            "id": "user123",
+            "name": "Jane Doe",
+            "email": "jane@example.com",
+            "password_hash": "hashed",
+            "is_active": True,
+        },
+    )()
+
+    response = await async_client.post(
+        "/api/v1/login",
+        data={"username": "jane@example.com", "password": "correctpassword"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+    assert "queue is full" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+@patch("specter.crud.account_user.get_credentials", new_callable=AsyncMock)
+@patch(
+    "core.security.password_hasher.verify", new_callable=AsyncMock, return_value=True
+)
+async def test_inactive_account(
+    mock_verify_password: AsyncMock,
+    mock_get_credentials: AsyncMock,
+    async_client: AsyncClient,
+) -> None:
+    """
+    Test case: Inactive account
+
+    Simulates a login with correct credentials for a deactivated account,
+    expecting a 403 Forbidden instead of an access token.
+    """
+    mock_get_credentials.return_value = AccountCredentials(
+        id=uuid.uuid4(),
+        name="Jane Doe",
+        email="jane@example.com",
+        password_hash="hashed",
+        is_active=False,
+    )
+
+    response = await async_client.post(
+        "/api/v1/login",
+        data={"username": "jane", "password": "correctpassword"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert response.json()["detail"] == "Account is inactive"
+    mock_get_credentials.assert_awaited_once()
+    call = mock_get_credentials.await_args
+    assert call is not None and call.kwargs["login"] == "jane"
+
+
+@pytest.mark.asyncio
+@patch("specter.crud.account_user.get_credentials", new_callable=AsyncMock)
+@patch(
+    "core.security.password_hasher.verify", new_callable=AsyncMock, return_value=True
+)
+@patch("core.security.password_hasher.needs_update", return_value=True)
+@patch("api.v1.endpoints.login.rehash_password", new_callable=AsyncMock)
+@patch("api.v1.endpoints.login.last_login_writer.record")
+@patch("specter.crud.refresh_token.issue", new_callable=AsyncMock)
+async def test_outdated_hash_is_rehashed_in_background(
+    mock_issue_refresh_token: AsyncMock,
+    mock_record_login: MagicMock,
+    mock_rehash_password: AsyncMock,
+    mock_needs_update: MagicMock,
+    mock_verify_password: AsyncMock,
+    mock_get_credentials: AsyncMock,
+    async_client: AsyncClient,
+) -> None:
+    """
+    Test case: Login with a hash made with outdated parameters
+
+    The login succeeds as usual and a rehash is scheduled as a background task
+    with the verified password and the stored hash.
+    """
+    account_id = uuid.uuid4()
+    mock_get_credentials.return_value = AccountCredentials(
+        id=account_id,
+        name="Jane Doe",
+        email="jane@example.com",
+        password_hash="old-hash",
+        is_active=True,
+    )
+
+    response = await async_client.post(
+        "/api/v1/login",
+        data={"username": "jane@example.com", "password": "correctpassword"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+
+    assert response.status_code == 200
+    mock_needs_update.assert_called_once_with("old-hash")
+    mock_rehash_password.assert_awaited_once_with(
+        account_id, "correctpassword", "old-hash"
+    )
+
+
+@pytest.mark.asyncio
+@patch("specter.crud.account_user.get_credentials", new_callable=AsyncMock)
+@patch("core.security.admission.account_bucket", TokenBucket(burst=1, per_minute=1))
+async def test_login_rate_limited_per_account(
+    mock_get_credentials: AsyncMock,
+    async_client: AsyncClient,
+) -> None:
+    """
+    Test case: Repeated logins for the same account
+
+    Once the account's bucket is empty, further attempts are rejected with 429 and a
+    Retry-After header, without looking the account up.
+    """
+    mock_get_credentials.return_value = None
+    data = {"username": "flooded@example.com", "password": "guess"}
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    first = await async_client.post("/api/v1/login", data=data, headers=headers)
+    second = await async_client.post("/api/v1/login", data=data, headers=headers)
+
+    assert first.status_code == 404
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) >= 1
+    mock_get_credentials.assert_awaited_once()
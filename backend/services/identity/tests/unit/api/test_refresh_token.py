@@ -0,0 +1,77 @@
+import uuid
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import schemas
+from core import security
+from fastapi import status
+from httpx import AsyncClient
+from specter.crud.shared.crud_refresh_token import RotatedToken
+
+
+@pytest.mark.asyncio
+@patch("specter.crud.refresh_token.rotate", new_callable=AsyncMock)
+@patch("core.security.create_access_token", return_value="mocked-token")
+async def test_refresh_rotates_token(
+    mock_create_token: Any,
+    mock_rotate: AsyncMock,
+    async_client: AsyncClient,
+) -> None:
+    """
+    Test case: Valid refresh token
+
+    The presented token is looked up by its digest and replaced, and a new access
+    token is minted for its owner without any password verification.
+    """
+    account_id = uuid.uuid4()
+    mock_rotate.return_value = RotatedToken(
+        account_user_id=account_id,
+        name="Jane Doe",
+        email="jane@example.com",
+        family_id=uuid.uuid4(),
+    )
+
+    response = await async_client.post(
+        "/api/v1/token/refresh", json={"refresh_token": "old-token"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["access_token"] == "mocked-token"
+    assert body["token_type"] == schemas.TokenType.BEARER.value
+    assert body["refresh_token"] != "old-token"
+    kwargs = mock_rotate.call_args.kwargs
+    assert kwargs["token_hash"] == security.hash_refresh_token("old-token")
+    assert kwargs["new_token_hash"] == security.hash_refresh_token(
+        body["refresh_token"]
+    )
+    assert mock_create_token.call_args.kwargs["subject"] == account_id
+
+
+@pytest.mark.asyncio
+@patch("specter.crud.refresh_token.rotate", new_callable=AsyncMock, return_value=None)
+@patch("specter.crud.refresh_token.revoke_family", new_callable=AsyncMock)
+async def test_refresh_rejects_unusable_token(
+    mock_revoke_family: AsyncMock,
+    mock_rotate: AsyncMock,
+    async_client: AsyncClient,
+) -> None:
+    """
+    Test case: Unknown, expired or reused refresh token
+
+    The request fails with 401, and the token's family is revoked in case the
+    token had already been rotated.
+    """
+    mock_revoke_family.return_value = 2
+
+    response = await async_client.post(
+        "/api/v1/token/refresh", json={"refresh_token": "replayed-token"}
+    )
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json() == {"detail": "Invalid refresh token"}
+    mock_revoke_family.assert_awaited_once()
+    assert mock_revoke_family.call_args.kwargs[
+        "token_hash"
+    ] == security.hash_refresh_token("replayed-token")
@@ -3,22 +3,24 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 from fastapi import status
 from httpx import AsyncClient
+from specter.crud.base import CreateResult
 
 
 @pytest.mark.asyncio
 @patch(
-    "api.v1.endpoints.register.security.get_password_hash", return_value="mocked-hash"
+    "api.v1.endpoints.register.security.password_hasher.hash",
+    new_callable=AsyncMock,
+    return_value="mocked-hash",
 )
-@patch("api.v1.endpoints.register.crud.account_user.create", new_callable=AsyncMock)
 @patch(
-    "api.v1.endpoints.register.crud.account_user.get_by_email", new_callable=AsyncMock
+    "api.v1.endpoints.register.crud.account_user.create_or_conflict",
+    new_callable=AsyncMock,
 )
 @patch("api.v1.endpoints.register.schemas.AccountUserCreate")
 async def test_successful_registration(
     mock_account_user_create: MagicMock,
-    mock_get_by_email: AsyncMock,
-    mock_create: AsyncMock,
-    mock_hash: MagicMock,
+    mock_create_or_conflict: AsyncMock,
+    mock_hash: AsyncMock,
     async_client: AsyncClient,
 ) -> None:
     """
@@ -27,8 +29,7 @@ async def test_successful_registration(
     Simulates creating a new user when the email does not exist.
     Expects HTTP 201 Created with success message.
     """
-    mock_get_by_email.return_value = None
-    mock_create.return_value = None
+    mock_create_or_conflict.return_value = CreateResult(obj=MagicMock(), conflicts=[])
     mock_account_user_create.return_value = MagicMock()
 
     payload = {
@@ -44,12 +45,19 @@ async def test_successful_registration(
 
     assert response.status_code == status.HTTP_201_CREATED
     assert response.json() == {"message": "Registration successful!"}
+    mock_create_or_conflict.assert_awaited_once()
 
 
 @pytest.mark.asyncio
-@patch("specter.crud.account_user.get_by_email", new_callable=AsyncMock)
+@patch(
+    "api.v1.endpoints.register.security.password_hasher.hash",
+    new_callable=AsyncMock,
+    return_value="mocked-hash",
+)
+@patch("specter.crud.account_user.create_or_conflict", new_callable=AsyncMock)
 async def test_registration_email_already_exists(
-    mock_get_by_email: AsyncMock,
+    mock_create_or_conflict: AsyncMock,
+    mock_hash: AsyncMock,
     async_client: AsyncClient,
 ) -> None:
     """
@@ -58,15 +66,15 @@ async def test_registration_email_already_exists(
     Simulates user registration attempt with an email that already exists.
     Expects HTTP 400 Bad Request with appropriate error detail.
     """
-    mock_get_by_email.return_value = object()  # Any non-None value
+    mock_create_or_conflict.return_value = CreateResult(obj=None, conflicts=["email"])
 
     payload = {
         "name": "Test User",
         "email": "duplicate@example.com",
         "password": "irrelevant",
         "username": "dupuser",
-        "country_code": "+1",
-        "phone": "9999999999",
+        "country_code": "IN",
+        "phone": "9876543210",
     }
 
     response = await async_client.post("/api/v1/register", json=payload)
@@ -76,9 +84,56 @@ async def test_registration_email_already_exists(
 
 
 @pytest.mark.asyncio
-@patch("specter.crud.account_user.get_by_email", side_effect=Exception("DB crashed"))
+@patch(
+    "api.v1.endpoints.register.security.password_hasher.hash",
+    new_callable=AsyncMock,
+    return_value="mocked-hash",
+)
+@patch("specter.crud.account_user.create_or_conflict", new_callable=AsyncMock)
+async def test_registration_username_already_exists(
+    mock_create_or_conflict: AsyncMock,
+    mock_hash: AsyncMock,
+    async_client: AsyncClient,
+) -> None:
+    """
+    Test case: Username already exists
+
+    Simulates user registration with a new email but a username that is taken.
+    Expects HTTP 400 Bad Request naming the username as the colliding key.
+    """
+    mock_create_or_conflict.return_value = CreateResult(
+        obj=None, conflicts=["username"]
+    )
+
+    payload = {
+        "name": "Test User",
+        "email": "fresh@example.com",
+        "password": "irrelevant",
+        "username": "dupuser",
+        "country_code": "IN",
+        "phone": "9876543210",
+    }
+
+    response = await async_client.post("/api/v1/register", json=payload)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid username. Reason - Already exists!"
+
+
+@pytest.mark.asyncio
+@patch(
+    "api.v1.endpoints.register.security.password_hasher.hash",
+    new_callable=AsyncMock,
+    return_value="mocked-hash",
+)
+@patch(
+    "specter.crud.account_user.create_or_conflict",
+    new_callable=AsyncMock,
+    side_effect=Exception("DB crashed"),
+)
 async def test_registration_internal_server_error(
-    mock_get_by_email: AsyncMock,
+    mock_create_or_conflict: AsyncMock,
+    mock_hash: AsyncMock,
     async_client: AsyncClient,
 ) -> None:
     """
@@ -92,11 +147,12 @@ async def test_registration_internal_server_error(
         "email": "test@example.com",
         "password": "securepassword123",
         "username": "testuser",
-        "country_code": "+91",
-        "phone": "1234567890",
+        "country_code": "IN",
+        "phone": "9876543210",
     }
 
     response = await async_client.post("/api/v1/register", json=payload)
 
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     assert response.json()["detail"].startswith("Request failed:")
+    mock_create_or_conflict.assert_awaited_once()
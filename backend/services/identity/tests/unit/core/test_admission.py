@@ -0,0 +1,167 @@
+import asyncio
+from typing import Any, List, Tuple
+from unittest.mock import AsyncMock
+
+import pytest
+from core.admission import (
+    AdmissionController,
+    AdmissionRejectedError,
+    MemoryRateLimitStore,
+    RedisRateLimitStore,
+    TokenBucket,
+)
+from fastapi import Request
+
+
+def controller(
+    max_concurrent: int = 10, client_burst: int = 10, account_burst: int = 10
+) -> AdmissionController:
+    return AdmissionController(
+        MemoryRateLimitStore(max_keys=100),
+        max_concurrent=max_concurrent,
+        client_bucket=TokenBucket(burst=client_burst, per_minute=60),
+        account_bucket=TokenBucket(burst=account_burst, per_minute=60),
+    )
+
+
+@pytest.mark.asyncio
+async def test_memory_bucket_allows_burst_then_reports_wait() -> None:
+    """
+    Test that a bucket admits `burst` requests and then reports the refill time.
+    """
+    store = MemoryRateLimitStore(max_keys=100)
+    bucket = TokenBucket(burst=2, per_minute=60)
+
+    assert await store.take("key", bucket) == 0
+    assert await store.take("key", bucket) == 0
+    assert await store.take("key", bucket) == pytest.approx(1, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_memory_store_evicts_least_recently_used() -> None:
+    """
+    Test that the in-memory store never keeps more than `max_keys` buckets.
+    """
+    store = MemoryRateLimitStore(max_keys=2)
+    bucket = TokenBucket(burst=1, per_minute=60)
+
+    for key in ("a", "b", "c"):
+        await store.take(key, bucket)
+
+    assert len(store) == 2
+    assert await store.take("a", bucket) == 0
+
+
+@pytest.mark.asyncio
+async def test_account_limit_is_case_insensitive_and_per_scope() -> None:
+    """
+    Test that an account bucket is shared across spellings but not across scopes.
+    """
+    admission = controller(account_burst=1)
+
+    async with admission.admit("login", client="10.0.0.1", account="jane@x.com"):
+        pass
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        async with admission.admit("login", client="10.0.0.2", account="JANE@x.com"):
+            pass
+    async with admission.admit("register", client="10.0.0.1", account="jane@x.com"):
+        pass
+
+    assert exc_info.value.reason == "account"
+    assert exc_info.value.retry_after == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_rejects_without_touching_buckets() -> None:
+    """
+    Test that requests beyond the concurrency cap are rejected immediately.
+    """
+    admission = controller(max_concurrent=1)
+    store: Any = admission.store
+    entered = asyncio.Event()
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with admission.admit("login", client="10.0.0.1", account="a"):
+            entered.set()
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await entered.wait()
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        async with admission.admit("login", client="10.0.0.2", account="b"):
+            pass
+    release.set()
+    await holder
+
+    assert exc_info.value.reason == "concurrency"
+    assert len(store) == 2
+    assert admission.inflight == 0
+
+
+@pytest.mark.asyncio
+async def test_store_failure_fails_open() -> None:
+    """
+    Test that an unavailable bucket store does not lock every user out.
+    """
+    client = AsyncMock()
+    client.eval.side_effect = ConnectionError("connection refused")
+    admission = AdmissionController(
+        RedisRateLimitStore(client),
+        max_concurrent=1,
+        client_bucket=TokenBucket(burst=1, per_minute=60),
+        account_bucket=TokenBucket(burst=1, per_minute=60),
+    )
+
+    async with admission.admit("login", client="10.0.0.1", account="a"):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_redis_store_runs_bucket_script_atomically() -> None:
+    """
+    Test that the Redis store sends one EVAL per take with the bucket parameters.
+    """
+    calls: List[Any] = []
+
+    async def fake_eval(script: str, numkeys: int, *args: Any) -> bytes:
+        calls.append((numkeys, args))
+        return b"2.5"
+
+    client = AsyncMock()
+    client.eval.side_effect = fake_eval
+    store = RedisRateLimitStore(client, prefix="test:")
+
+    wait = await store.take(
+        "login:client:10.0.0.1", TokenBucket(burst=5, per_minute=30)
+    )
+
+    assert wait == 2.5
+    numkeys, args = calls[0]
+    assert numkeys == 1
+    assert args[:3] == ("test:login:client:10.0.0.1", 5, 0.5)
+
+
+def test_client_address_trusts_the_last_forwarded_address() -> None:
+    """
+    Test that with a client header configured, requests are keyed by the address
+    the trusted proxy appended, not by addresses the client put before it, and
+    fall back to the peer address without the header.
+    """
+    admission = AdmissionController(
+        MemoryRateLimitStore(max_keys=100),
+        max_concurrent=1,
+        client_bucket=TokenBucket(burst=1, per_minute=60),
+        account_bucket=TokenBucket(burst=1, per_minute=60),
+        client_header="X-Forwarded-For",
+    )
+
+    def request(*headers: Tuple[bytes, bytes]) -> Request:
+        return Request(
+            {"type": "http", "headers": list(headers), "client": ("10.0.0.9", 4321)}
+        )
+
+    forwarded = (b"x-forwarded-for", b"1.2.3.4, 203.0.113.7")
+    assert admission.client_address(request(forwarded)) == "203.0.113.7"
+    assert admission.client_address(request()) == "10.0.0.9"
+    assert controller().client_address(request(forwarded)) == "10.0.0.9"
@@ -0,0 +1,101 @@
+import asyncio
+from typing import Generator
+
+import pytest
+from core.hashing import (
+    HashingQueueFullError,
+    HashingTimeoutError,
+    PasswordHasher,
+    calibrate_rounds,
+)
+
+
+@pytest.fixture
+def hasher() -> Generator[PasswordHasher, None, None]:
+    """
+    Provides a single-worker PasswordHasher without any queue slack.
+    """
+    instance = PasswordHasher(max_workers=1, max_queue=0, timeout=30)
+    yield instance
+    instance.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_on_worker_pool(hasher: PasswordHasher) -> None:
+    """
+    Test that hashing and verification run on the pool and round-trip correctly.
+    """
+    hashed = await hasher.hash("mysecretpassword")
+
+    assert hashed != "mysecretpassword"
+    assert await hasher.verify("mysecretpassword", hashed) is True
+    assert await hasher.verify("wrongpassword", hashed) is False
+    assert hasher.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_rejects_immediately(hasher: PasswordHasher) -> None:
+    """
+    Test that submissions beyond workers + queue fail fast instead of waiting.
+    """
+    results = await asyncio.gather(
+        hasher.hash("first-password"),
+        hasher.hash("second-password"),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[0], str)
+    assert isinstance(results[1], HashingQueueFullError)
+
+
+@pytest.mark.asyncio
+async def test_timeout_is_enforced() -> None:
+    """
+    Test that a call exceeding the per-call timeout raises HashingTimeoutError.
+    """
+    hasher = PasswordHasher(max_workers=1, max_queue=0, timeout=0.001)
+    try:
+        with pytest.raises(HashingTimeoutError):
+            await hasher.hash("slowpassword")
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_needs_update_flags_only_weaker_hashes() -> None:
+    """
+    Test that hashes below the configured cost need an update, and others do not.
+    """
+    weak = PasswordHasher(max_workers=1, max_queue=0, timeout=30, rounds=4)
+    strong = PasswordHasher(max_workers=1, max_queue=0, timeout=30, rounds=5)
+    try:
+        weak_hash = await weak.hash("mysecretpassword")
+        strong_hash = await strong.hash("mysecretpassword")
+
+        assert strong.needs_update(weak_hash) is True
+        assert strong.needs_update(strong_hash) is False
+        assert weak.needs_update(strong_hash) is False
+        assert weak.needs_update("not-a-hash") is False
+    finally:
+        weak.shutdown()
+        strong.shutdown()
+
+
+def test_calibrate_rounds_respects_budget_and_bounds() -> None:
+    """
+    Test that calibration stays within the configured cost bounds.
+    """
+    assert calibrate_rounds(target_ms=0, min_rounds=4, max_rounds=6, samples=1) == 4
+    assert calibrate_rounds(target_ms=1e6, min_rounds=4, max_rounds=6, samples=1) == 6
+
+
+@pytest.mark.asyncio
+async def test_calibrate_adopts_rounds_for_new_hashes(hasher: PasswordHasher) -> None:
+    """
+    Test that the calibrated cost is used for subsequent hashes.
+    """
+    rounds = await hasher.calibrate(target_ms=1e6, min_rounds=4, max_rounds=5)
+    hashed = await hasher.hash("mysecretpassword")
+
+    assert rounds == 5
+    assert hashed.startswith("$2b$05$")
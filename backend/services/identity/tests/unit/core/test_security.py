@@ -49,30 +49,32 @@ async def test_create_access_token_without_claims() -> None:
     assert "claims" not in payload
 
 
-def test_verify_password_valid_and_invalid() -> None:
+@pytest.mark.asyncio
+async def test_verify_password_valid_and_invalid() -> None:
     """
     Test verify_password returns True for correct password and False otherwise.
     """
     raw_password = "mysecretpassword"
-    hashed_password = security.get_password_hash(raw_password)
+    hashed_password = await security.get_password_hash(raw_password)
 
     # Correct password
-    assert security.verify_password(raw_password, hashed_password) is True
+    assert await security.verify_password(raw_password, hashed_password) is True
 
     # Incorrect password
-    assert security.verify_password("wrongpassword", hashed_password) is False
+    assert await security.verify_password("wrongpassword", hashed_password) is False
 
 
-def test_get_password_hash_returns_string() -> None:
+@pytest.mark.asyncio
+async def test_get_password_hash_returns_string() -> None:
     """
     Test get_password_hash returns a string hash for a plaintext password.
     """
     raw_password = "anotherpassword"
-    hashed = security.get_password_hash(raw_password)
+    hashed = await security.get_password_hash(raw_password)
 
     assert isinstance(hashed, str)
     # The hashed password should not be the same as the raw password
     assert hashed != raw_password
 
     # Verify the hash matches the original password
-    assert security.verify_password(raw_password, hashed) is True
+    assert await security.verify_password(raw_password, hashed) is True
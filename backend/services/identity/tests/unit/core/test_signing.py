@@ -0,0 +1,20 @@
+from core.signing import ALGORITHM, TokenSigner, generate_private_key, public_jwk
+from jose import jwk
+
+
+def test_key_id_is_stable_and_retired_keys_are_published() -> None:
+    """
+    Test that the kid depends on the key only, and that retired keys stay published.
+    """
+    current, retired = generate_private_key(), generate_private_key()
+
+    retired_public = jwk.construct(retired, algorithm=ALGORITHM).public_key().to_pem()
+
+    signer = TokenSigner(current, published_keys=[retired_public.decode("ascii")])
+
+    assert signer.kid == TokenSigner(current).kid
+    assert [key["kid"] for key in signer.jwks["keys"]] == [
+        signer.kid,
+        public_jwk(retired)["kid"],
+    ]
+    assert all("d" not in key for key in signer.jwks["keys"])
@@ -0,0 +1,24 @@
+--liquibase formatted sql
+
+--changeset dkothari:3 splitStatements:false
+
+-- Notify listeners (specter's tenant cache) with the affected host(s) whenever a
+-- tenant's routing-relevant columns change, so cached resolutions are invalidated.
+CREATE OR REPLACE FUNCTION notify_tenant_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('tenant_changed', OLD.host);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.host IS DISTINCT FROM OLD.host) THEN
+        -- The new host may be cached as unknown.
+        PERFORM pg_notify('tenant_changed', NEW.host);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tenant_changed_notify ON tenant;
+
+CREATE TRIGGER tenant_changed_notify
+    AFTER INSERT OR DELETE OR UPDATE OF host, schema, is_active ON tenant
+    FOR EACH ROW EXECUTE FUNCTION notify_tenant_changed();
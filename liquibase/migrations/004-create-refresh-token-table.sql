@@ -0,0 +1,20 @@
+--liquibase formatted sql
+
+--changeset dkothari:4
+
+-- Opaque refresh tokens, stored as SHA-256 digests. Tokens issued by rotating
+-- one another share a family_id, so a replayed token revokes its whole chain.
+CREATE TABLE IF NOT EXISTS refresh_token (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    created_on TIMESTAMPTZ NOT NULL DEFAULT current_timestamp,
+    token_hash VARCHAR(64) NOT NULL UNIQUE,
+    family_id UUID NOT NULL DEFAULT gen_random_uuid(),
+    account_user_id UUID NOT NULL REFERENCES account_user(id) ON DELETE CASCADE,
+    expires_on TIMESTAMPTZ NOT NULL,
+    used_on TIMESTAMPTZ,
+    revoked_on TIMESTAMPTZ
+);
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS ix_refresh_token_family_id ON refresh_token(family_id);
+CREATE INDEX IF NOT EXISTS ix_refresh_token_account_user_id ON refresh_token(account_user_id);
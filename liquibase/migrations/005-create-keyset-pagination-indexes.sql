@@ -0,0 +1,8 @@
+--liquibase formatted sql
+
+--changeset dkothari:5
+
+-- Keyset pagination orders by (created_on, id): with these indexes every page is an
+-- index range scan, however deep it is.
+CREATE INDEX IF NOT EXISTS ix_account_user_created_on_id ON account_user(created_on, id);
+CREATE INDEX IF NOT EXISTS ix_tenant_created_on_id ON tenant(created_on, id);
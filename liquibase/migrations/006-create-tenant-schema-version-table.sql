@@ -0,0 +1,12 @@
+--liquibase formatted sql
+
+--changeset dkothari:6
+
+-- Version of the tenant_metadata tables in each tenant schema, maintained by
+-- specter.db.tenant_migrations. A schema without a row is at version 0.
+CREATE TABLE IF NOT EXISTS tenant_schema_version (
+    schema VARCHAR(64) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_on TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,18 @@
+--liquibase formatted sql
+
+--changeset dkothari:7 splitStatements:false
+
+-- Cluster holding the tenant's schema, a key of SQLALCHEMY_SHARD_URIS ("primary"
+-- is the cluster of this database). Moving a tenant updates it, so it notifies the
+-- tenant caches like the other routing columns.
+-- Each shard cluster tracks its own tenant schemas in its tenant_schema_version
+-- table: this changelog is applied to every shard.
+ALTER TABLE tenant ADD COLUMN IF NOT EXISTS shard VARCHAR(64) NOT NULL DEFAULT 'primary';
+
+CREATE INDEX IF NOT EXISTS ix_tenant_shard ON tenant(shard);
+
+DROP TRIGGER IF EXISTS tenant_changed_notify ON tenant;
+
+CREATE TRIGGER tenant_changed_notify
+    AFTER INSERT OR DELETE OR UPDATE OF host, schema, shard, is_active ON tenant
+    FOR EACH ROW EXECUTE FUNCTION notify_tenant_changed();